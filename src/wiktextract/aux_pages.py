@@ -0,0 +1,150 @@
+# Parse trees of the auxiliary pages used when extracting a page:
+# translation subpages, and conjugation, inflection and thesaurus pages in
+# other namespaces.
+#
+# Many sections of a page may refer to the same auxiliary page, e.g., every
+# part-of-speech section of "water" gets its translations from
+# "water/translations".  The page is parsed once for the extracted page and
+# the sections found in it are saved, so the later lookups are dictionary
+# hits.  Templates in the auxiliary page are expanded in the context of the
+# extracted page, so the trees are only kept until another page is
+# extracted.
+#
+# In the second phase the auxiliary pages used by each page are saved in
+# the page database, and in the next run they are sent to the worker with
+# the page; see `scheduler.with_aux_pages()`.  Trees of these pages that
+# are parsed without expanding templates don't depend on the extracted page
+# and are shared by all the pages of the batch.
+
+from collections.abc import Callable, Hashable
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from wikitextprocessor import WikiNode
+
+if TYPE_CHECKING:
+    from .wxr_context import WiktextractContext
+
+T = TypeVar("T")
+
+
+class AuxPageCache:
+    """Parse trees of the auxiliary pages of page `page_title`, and the
+    sections found in them."""
+
+    __slots__ = (
+        "page_title",
+        "trees",
+        "sections",
+        "used",
+        "prefetched",
+        "shared_trees",
+        "saved_pages",
+    )
+
+    def __init__(self) -> None:
+        self.page_title: str | None = None
+        # (title, namespace id, parse options) -> tree, None if no page
+        self.trees: dict[tuple, WikiNode | None] = {}
+        # (id(tree), key) -> section
+        self.sections: dict[tuple[int, Hashable], Any] = {}
+        # (title, namespace id) of the auxiliary pages used by the page
+        self.used: dict[tuple[str, int], None] = {}
+        # (title, namespace id) -> body of the pages sent with the batch
+        self.prefetched: dict[tuple[str, int], str] = {}
+        # Trees of prefetched pages that don't depend on the current page
+        self.shared_trees: dict[tuple, WikiNode | None] = {}
+        # (title, namespace id) of the pages of the batch that have saved
+        # auxiliary pages
+        self.saved_pages: set[tuple[str, int]] = set()
+
+    def start_page(self, page_title: str | None) -> None:
+        self.page_title = page_title
+        self.trees.clear()
+        self.sections.clear()
+        self.used.clear()
+
+    def start_batch(
+        self,
+        prefetched: dict[tuple[str, int], str],
+        saved_pages: set[tuple[str, int]],
+    ) -> None:
+        self.prefetched = prefetched
+        self.saved_pages = saved_pages
+        self.shared_trees.clear()
+
+    def pages_to_save(
+        self, page_key: tuple[str, int], aux_pages: list[tuple[str, int]]
+    ) -> list[tuple[str, int]] | None:
+        """Returns the auxiliary pages of page `page_key` to save in the
+        page database, None if it has none and had none saved."""
+        if len(aux_pages) == 0 and page_key not in self.saved_pages:
+            return None
+        return aux_pages
+
+
+def parse_options_key(options: dict[str, Any]) -> tuple:
+    return tuple(
+        (k, frozenset(v) if isinstance(v, (set, frozenset)) else v)
+        for k, v in sorted(options.items())
+    )
+
+
+def parse_aux_page(
+    wxr: "WiktextractContext",
+    title: str,
+    namespace_id: int | None = None,
+    **options: Any,
+) -> WikiNode | None:
+    """Returns the parse tree of page `title`, or None if there is no such
+    page.  `options` are passed to `Wtp.parse()`.  The tree is shared with
+    the other callers and must not be modified."""
+    cache = wxr.aux_pages
+    if cache.page_title != wxr.wtp.title:
+        cache.start_page(wxr.wtp.title)
+    key = (title, namespace_id, parse_options_key(options))
+    if key in cache.trees:
+        return cache.trees[key]
+    # Pages looked up without a namespace are saved with the namespace of
+    # their title prefix
+    page_key = (
+        title,
+        namespace_id
+        if namespace_id is not None
+        else wxr.namespace_patterns.title_namespace_id(title),
+    )
+    shared = page_key in cache.prefetched and not (
+        options.get("pre_expand")
+        or options.get("expand_all")
+        or options.get("additional_expand")
+    )
+    if shared and key in cache.shared_trees:
+        tree = cache.shared_trees[key]
+    else:
+        body = cache.prefetched.get(page_key)
+        if body is None:
+            body = wxr.wtp.get_page_body(title, namespace_id)  # type: ignore[arg-type]
+        tree = None if body is None else wxr.wtp.parse(body, **options)
+        if shared:
+            cache.shared_trees[key] = tree
+    cache.trees[key] = tree
+    if tree is not None:
+        cache.used[page_key] = None
+    return tree
+
+
+def find_aux_page_section(
+    wxr: "WiktextractContext",
+    tree: WikiNode,
+    key: Hashable,
+    find: Callable[[], T],
+) -> T:
+    """Returns the section `key` of `tree`, a tree returned by
+    `parse_aux_page()`.  `find()` finds the section the first time it is
+    looked up."""
+    cache = wxr.aux_pages
+    cache_key = (id(tree), key)
+    if cache_key in cache.sections:
+        return cache.sections[cache_key]
+    section = find()
+    cache.sections[cache_key] = section
+    return section
@@ -18,6 +18,8 @@ from wikitextprocessor.core import (
     HTMLTagData,
 )
 
+from .error_sink import MESSAGE_KINDS, ErrorSink
+
 SoundFileRedirects = dict[str, str]
 
 POSSubtitleData = TypedDict(
@@ -60,6 +62,7 @@ class WiktionaryConfig:
         "errors",
         "warnings",
         "debugs",
+        "error_sink",
         "redirects",
         "data_folder",
         "extract_thesaurus_pages",
@@ -70,6 +73,7 @@ class WiktionaryConfig:
         "notes",
         "wiki_notices",
         "linktrailing_regex_pattern",
+        "pure_templates",
     )
 
     def __init__(
@@ -127,6 +131,8 @@ class WiktionaryConfig:
         self.debugs: list[ErrorMessageData] = []
         self.notes: list[ErrorMessageData] = []
         self.wiki_notices: list[ErrorMessageData] = []
+        # Receives the messages instead of the lists above if set
+        self.error_sink: ErrorSink | None = None
         self.redirects: SoundFileRedirects = {}
         self.data_folder = files("wiktextract") / "data" / dump_file_lang_code
         self.extract_thesaurus_pages = False
@@ -138,6 +144,9 @@ class WiktionaryConfig:
         self.allowed_html_tags: dict[str, HTMLTagData] = {}
         self.parser_function_aliases: dict[str, str] = {}
         self.linktrailing_regex_pattern: str | None = None
+        # Templates whose expansion only depends on their arguments, see
+        # `template_cache.py`
+        self.pure_templates: list[str] = []
         self.load_edition_settings()
 
     def merge_return(self, ret: CollatedErrorReturnData):
@@ -153,6 +162,11 @@ class WiktionaryConfig:
         #         self.pos_counts[k] += v
         #     for k, v in ret["section_counts"].items():
         #         self.section_counts[k] += v
+        if self.error_sink is not None:
+            for kind in MESSAGE_KINDS:
+                for message in ret.get(kind, ()):  # type: ignore[misc]
+                    self.error_sink.add(kind, message)
+            return
         if "errors" in ret and len(self.errors) < 100_000:
             self.errors.extend(ret.get("errors", []))
         if "warnings" in ret and len(self.warnings) < 100_000:
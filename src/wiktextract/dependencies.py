@@ -0,0 +1,392 @@
+# Finding the templates and modules a page depends on.
+#
+# Before a page is extracted, its dependencies are found by scanning the
+# wikitext of pages and templates and the Lua code of modules for template
+# calls, `#invoke` calls, `require()`, `mw.loadData()` and
+# `frame:expandTemplate()`.  Names that are generated during expansion
+# can't be found this way; to cover the common case of modules loading
+# their data modules with computed names, the subpages of a used module are
+# counted as its dependencies.  While a page is extracted,
+# `UsedPageRecorder` records the templates and modules that are actually
+# fetched from the page database, including the ones with computed names.
+#
+# The dependency graph is also saved in the `wiktextract_dependencies` table
+# of the page database: template and module edges in the first phase and
+# the templates and modules fetched while extracting each page in the
+# second phase (with `wiktwords --dependency-graph`).  `affected_pages()`
+# uses the table to find the pages that need to be extracted again after a
+# template or module has changed.
+
+import hashlib
+import re
+import sqlite3
+from collections.abc import Callable, Iterable, Iterator
+from functools import wraps
+
+from wikitextprocessor import Page, Wtp
+
+from .wxr_context import WiktextractContext
+
+TEMPLATE_CALL_RE = re.compile(
+    r"\{\{\s*([^{}|\[\]<>\n#][^{}|\[\]<>\n]*?)\s*(?:\||\}\})"
+)
+INVOKE_RE = re.compile(r"\{\{\s*#invoke\s*:\s*([^{}|\n]+?)\s*(?:\||\}\})", re.I)
+LUA_MODULE_RE = re.compile(
+    r"""(?:\brequire|\bmw\.loadData|\bmw\.loadJsonData)\s*\(?\s*
+        (?P<quote>["'])(?P<name>[^"'\n]+)(?P=quote)""",
+    re.VERBOSE,
+)
+LUA_TEMPLATE_RE = re.compile(
+    r"""expandTemplate\s*\{\s*title\s*=\s*
+        (?P<quote>["'])(?P<name>[^"'\n]+)(?P=quote)""",
+    re.VERBOSE,
+)
+
+# (namespace id, full page title)
+PageKey = tuple[int, str]
+
+
+def normalize_name(name: str) -> str:
+    return re.sub(r"[\s_]+", " ", name).strip()
+
+
+class DependencyHasher:
+    """Computes a hash of the bodies of all templates and modules that a
+    page uses, directly or through other templates and modules.  The
+    scanned dependencies of templates and modules are remembered, so that
+    each of them is read from the database only once per process."""
+
+    __slots__ = (
+        "db_conn",
+        "template_ns_id",
+        "template_prefixes",
+        "module_ns_id",
+        "module_prefixes",
+        "nodes",
+    )
+
+    def __init__(self, wxr: WiktextractContext):
+        self.db_conn: sqlite3.Connection = wxr.wtp.db_conn
+        template_ns = wxr.wtp.NAMESPACE_DATA["Template"]
+        module_ns = wxr.wtp.NAMESPACE_DATA["Module"]
+        self.template_ns_id: int = template_ns["id"]  # type: ignore[typeddict-item]
+        self.module_ns_id: int = module_ns["id"]  # type: ignore[typeddict-item]
+        self.template_prefixes = namespace_prefixes(template_ns)
+        self.module_prefixes = namespace_prefixes(module_ns)
+        # page key -> (body hash, direct dependencies)
+        self.nodes: dict[PageKey, tuple[str, list[PageKey]]] = {}
+
+    def template_key(self, name: str) -> PageKey | None:
+        name = normalize_name(name)
+        if ":" in name:
+            prefix, rest = name.split(":", 1)
+            if prefix.strip().lower() not in self.template_prefixes:
+                # Parser functions, magic words and pages in other
+                # namespaces
+                return None
+            name = rest.strip()
+        if len(name) == 0:
+            return None
+        return self.template_ns_id, self.template_prefixes[0] + ":" + name
+
+    def module_key(self, name: str, prefixed: bool = False) -> PageKey | None:
+        name = normalize_name(name)
+        if ":" in name:
+            prefix, rest = name.split(":", 1)
+            if prefix.strip().lower() not in self.module_prefixes:
+                return None
+            name = rest.strip()
+        elif prefixed:
+            # `require()` argument without namespace, a Lua library
+            return None
+        if len(name) == 0:
+            return None
+        return self.module_ns_id, self.module_prefixes[0] + ":" + name
+
+    def page_key(self, title: str) -> PageKey | None:
+        """Returns the key of a template or module title, the title must
+        have the namespace prefix."""
+        key = self.module_key(title, prefixed=True)
+        if key is None:
+            key = self.template_key(title)
+        return key
+
+    def wikitext_dependencies(self, text: str) -> list[PageKey]:
+        """Returns the templates and modules called directly from
+        wikitext."""
+        keys: dict[PageKey, None] = {}
+        for m in TEMPLATE_CALL_RE.finditer(text):
+            key = self.template_key(m.group(1))
+            if key is not None:
+                keys[key] = None
+        for m in INVOKE_RE.finditer(text):
+            key = self.module_key(m.group(1))
+            if key is not None:
+                keys[key] = None
+        return list(keys)
+
+    def lua_dependencies(self, key: PageKey, code: str) -> list[PageKey]:
+        keys: dict[PageKey, None] = {}
+        for m in LUA_MODULE_RE.finditer(code):
+            module_key = self.module_key(m.group("name"), prefixed=True)
+            if module_key is not None:
+                keys[module_key] = None
+        for m in LUA_TEMPLATE_RE.finditer(code):
+            template_key = self.template_key(m.group("name"))
+            if template_key is not None:
+                keys[template_key] = None
+        # Data modules are often loaded with computed names
+        ns_id, title = key
+        for (subpage_title,) in self.db_conn.execute(
+            "SELECT title FROM pages WHERE namespace_id = ? "
+            "AND title > ? AND title < ?",
+            (ns_id, title + "/", title + "0"),
+        ):
+            keys[(ns_id, subpage_title)] = None
+        return list(keys)
+
+    def node(self, key: PageKey) -> tuple[str, list[PageKey]]:
+        if key in self.nodes:
+            return self.nodes[key]
+        ns_id, title = key
+        body_hash = ""
+        deps: list[PageKey] = []
+        for body, redirect_to in self.db_conn.execute(
+            "SELECT body, redirect_to FROM pages "
+            "WHERE title = ? AND namespace_id = ?",
+            (title, ns_id),
+        ):
+            if redirect_to is not None:
+                body_hash = "->" + redirect_to
+                deps = [(ns_id, redirect_to)]
+            elif body is not None:
+                body_hash = text_hash(body)
+                if ns_id == self.module_ns_id:
+                    deps = self.lua_dependencies(key, body)
+                else:
+                    deps = self.wikitext_dependencies(body)
+        self.nodes[key] = (body_hash, deps)
+        return body_hash, deps
+
+    def transitive_dependencies(self, text: str) -> dict[PageKey, str]:
+        """Returns the hashes of all templates and modules used by the
+        wikitext, directly or indirectly.  Pages that don't exist have an
+        empty hash, creating them changes the result."""
+        found: dict[PageKey, str] = {}
+        stack = self.wikitext_dependencies(text)
+        while len(stack) > 0:
+            key = stack.pop()
+            if key in found:
+                continue
+            body_hash, deps = self.node(key)
+            found[key] = body_hash
+            stack.extend(dep for dep in deps if dep not in found)
+        return found
+
+    def dependency_hash(self, text: str) -> str:
+        h = hashlib.blake2b(digest_size=16)
+        for (ns_id, title), body_hash in sorted(
+            self.transitive_dependencies(text).items()
+        ):
+            h.update(f"{ns_id}\0{title}\0{body_hash}\n".encode("utf-8"))
+        return h.hexdigest()
+
+
+class UsedPageRecorder:
+    """Records the templates and modules fetched from the page database
+    between `start_page()` and `stop_page()`: the templates expanded on the
+    page and the modules loaded by Lua code, also when their names are
+    computed during expansion.  `install()` wraps the page lookups of
+    `Wtp`, it is called once in each worker process."""
+
+    __slots__ = ("hasher", "pages", "recording")
+
+    def __init__(self, hasher: DependencyHasher):
+        self.hasher = hasher
+        self.pages: dict[PageKey, None] = {}
+        self.recording = False
+
+    def start_page(self) -> None:
+        self.pages.clear()
+        self.recording = True
+
+    def stop_page(self) -> list[PageKey]:
+        self.recording = False
+        pages = list(self.pages)
+        self.pages.clear()
+        return pages
+
+    def record(self, title: str, namespace_id: int | None) -> None:
+        if not self.recording or not isinstance(title, str):
+            return
+        if namespace_id == self.hasher.template_ns_id:
+            key = self.hasher.template_key(title)
+        elif namespace_id == self.hasher.module_ns_id:
+            key = self.hasher.module_key(title)
+        elif namespace_id is None:
+            key = self.hasher.page_key(title)
+        else:
+            # Auxiliary pages, see `aux_pages.py`
+            return
+        if key is not None:
+            self.pages[key] = None
+
+    def install(self) -> None:
+        for name in ("get_page", "get_page_body"):
+            setattr(Wtp, name, self.recording_method(getattr(Wtp, name)))
+
+    def recording_method(self, method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(wtp, title, namespace_id=None, *args, **kwargs):
+            self.record(title, namespace_id)
+            return method(wtp, title, namespace_id, *args, **kwargs)
+
+        return wrapper
+
+
+def init_dependency_table(db_conn: sqlite3.Connection) -> None:
+    db_conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS wiktextract_dependencies (
+        source_ns INTEGER,
+        source TEXT,
+        target_ns INTEGER,
+        target TEXT
+        );
+        CREATE INDEX IF NOT EXISTS wiktextract_dependencies_source
+        ON wiktextract_dependencies (source, source_ns);
+        CREATE INDEX IF NOT EXISTS wiktextract_dependencies_target
+        ON wiktextract_dependencies (target, target_ns);
+        """
+    )
+
+
+def save_dependencies(
+    db_conn: sqlite3.Connection, source: PageKey, targets: Iterable[PageKey]
+) -> None:
+    """Replaces the saved dependencies of the `source` page, the caller
+    commits."""
+    source_ns, source_title = source
+    db_conn.execute(
+        "DELETE FROM wiktextract_dependencies "
+        "WHERE source = ? AND source_ns = ?",
+        (source_title, source_ns),
+    )
+    db_conn.executemany(
+        "INSERT INTO wiktextract_dependencies "
+        "(source_ns, source, target_ns, target) VALUES(?, ?, ?, ?)",
+        (
+            (source_ns, source_title, target_ns, target_title)
+            for target_ns, target_title in targets
+        ),
+    )
+
+
+def recording_analyze_template(
+    wxr: WiktextractContext,
+    analyze_template: Callable[[Wtp, Page], tuple[set[str], bool]] | None,
+) -> Callable[[Wtp, Page], tuple[set[str], bool]]:
+    """Wraps the `analyze_template()` function of an extractor, the
+    returned function also saves the templates and modules called by each
+    analyzed template to the dependency table."""
+    init_dependency_table(wxr.wtp.db_conn)
+    hasher = DependencyHasher(wxr)
+
+    def analyze(wtp: Wtp, page: Page) -> tuple[set[str], bool]:
+        if analyze_template is not None:
+            included, pre_expand = analyze_template(wtp, page)
+        else:
+            included, pre_expand = set(), False
+        if page.redirect_to is not None:
+            targets = [(page.namespace_id, page.redirect_to)]
+        else:
+            keys: dict[PageKey, None] = {}
+            for name in included:
+                key = hasher.template_key(name)
+                if key is not None:
+                    keys[key] = None
+            if page.body is not None:
+                keys.update(
+                    (key, None)
+                    for key in hasher.wikitext_dependencies(page.body)
+                )
+            targets = list(keys)
+        save_dependencies(wtp.db_conn, (page.namespace_id, page.title), targets)
+        return included, pre_expand
+
+    return analyze
+
+
+def save_module_dependencies(wxr: WiktextractContext) -> None:
+    """Saves the modules and templates used by all modules."""
+    init_dependency_table(wxr.wtp.db_conn)
+    hasher = DependencyHasher(wxr)
+    for page in wxr.wtp.get_all_pages([hasher.module_ns_id]):
+        key = (page.namespace_id, page.title)
+        if page.redirect_to is not None:
+            targets = [(page.namespace_id, page.redirect_to)]
+        elif page.body is not None:
+            targets = hasher.lua_dependencies(key, page.body)
+        else:
+            continue
+        save_dependencies(wxr.wtp.db_conn, key, targets)
+    wxr.wtp.db_conn.commit()
+
+
+def save_template_dependencies(wxr: WiktextractContext) -> None:
+    """Saves the templates and modules called by all templates and modules,
+    e.g. after `wiktwords --override` has changed them.  The templates
+    included by `analyze_template()` of the extractor are not saved."""
+    init_dependency_table(wxr.wtp.db_conn)
+    hasher = DependencyHasher(wxr)
+    for page in wxr.wtp.get_all_pages([hasher.template_ns_id]):
+        key = (page.namespace_id, page.title)
+        if page.redirect_to is not None:
+            targets = [(page.namespace_id, page.redirect_to)]
+        elif page.body is not None:
+            targets = hasher.wikitext_dependencies(page.body)
+        else:
+            continue
+        save_dependencies(wxr.wtp.db_conn, key, targets)
+    save_module_dependencies(wxr)
+
+
+def affected_pages(
+    db_conn: sqlite3.Connection, changed: list[PageKey]
+) -> Iterator[PageKey]:
+    """Yields the `changed` templates or modules and the pages, templates
+    and modules that use them, directly or indirectly.  Pages of the second
+    phase are only found if their dependencies have been saved."""
+    if len(changed) == 0:
+        return
+    init_dependency_table(db_conn)
+    values = ", ".join("(?, ?)" for _ in changed)
+    yield from db_conn.execute(
+        f"""
+        WITH RECURSIVE affected(ns, title) AS (
+        VALUES {values}
+        UNION
+        SELECT source_ns, source FROM wiktextract_dependencies
+        JOIN affected ON target = affected.title AND target_ns = affected.ns
+        )
+        SELECT ns, title FROM affected
+        """,
+        [value for key in changed for value in key],
+    )
+
+
+def namespace_prefixes(ns_data: dict) -> list[str]:
+    """Returns the local name of the namespace followed by its lowercased
+    names and aliases."""
+    names = [ns_data["name"]]
+    names.extend(
+        name.lower()
+        for name in [ns_data["name"], ns_data.get("canonical", "")]
+        + list(ns_data.get("aliases", []))
+        if len(name) > 0
+    )
+    return names
+
+
+def text_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
@@ -0,0 +1,87 @@
+# Sinks for the error, warning and debug messages collected from the
+# worker processes, used instead of the message lists of
+# `WiktionaryConfig` when `wiktwords --error-log` is given.
+#
+# `WiktionaryConfig.merge_return()` passes every message to the sink as it
+# arrives.  `ErrorSink` only counts the messages by kind, `called_from`
+# sort id and language, `JsonlErrorSink` also writes them to a JSON Lines
+# file.  When the sink is closed the counts are written to a summary JSON
+# file, so memory use doesn't depend on the number of messages.
+
+import json
+from collections import Counter
+from pathlib import Path
+from typing import TextIO
+
+from wikitextprocessor.core import ErrorMessageData
+
+# Keys of `CollatedErrorReturnData` and the lists of `WiktionaryConfig`
+MESSAGE_KINDS = ("errors", "warnings", "debugs", "notes", "wiki_notices")
+
+
+class ErrorSink:
+    """Counts the messages it receives and writes the counts to
+    `summary_path` when closed."""
+
+    __slots__ = ("summary_path", "counts")
+
+    def __init__(self, summary_path: Path):
+        self.summary_path = summary_path
+        # (kind, called_from, language) -> number of messages
+        self.counts: Counter[tuple[str, str, str]] = Counter()
+
+    def add(self, kind: str, message: ErrorMessageData) -> None:
+        self.counts[
+            (
+                kind,
+                message.get("called_from") or "",
+                message.get("section") or "",
+            )
+        ] += 1
+
+    def summary(self) -> dict:
+        totals: Counter[str] = Counter()
+        for (kind, _, _), count in self.counts.items():
+            totals[kind] += count
+        return {
+            "totals": {kind: totals[kind] for kind in MESSAGE_KINDS},
+            "counts": [
+                {
+                    "kind": kind,
+                    "called_from": called_from,
+                    "language": language,
+                    "count": count,
+                }
+                for (kind, called_from, language), count in sorted(
+                    self.counts.items(), key=lambda item: (-item[1], item[0])
+                )
+            ],
+        }
+
+    def close(self) -> None:
+        with self.summary_path.open("w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2, ensure_ascii=False)
+
+
+class JsonlErrorSink(ErrorSink):
+    """Writes every message as a line of JSON to `path`, with its kind in
+    the "kind" field, and the message counts to `summary_path`."""
+
+    __slots__ = ("path", "out_f")
+
+    def __init__(self, path: Path, summary_path: Path):
+        super().__init__(summary_path)
+        self.path = path
+        self.out_f: TextIO = path.open(
+            "w", buffering=1024 * 1024, encoding="utf-8"
+        )
+
+    def add(self, kind: str, message: ErrorMessageData) -> None:
+        super().add(kind, message)
+        self.out_f.write(
+            json.dumps({"kind": kind, **message}, ensure_ascii=False) + "\n"
+        )
+
+    def close(self) -> None:
+        self.out_f.close()
+        super().close()
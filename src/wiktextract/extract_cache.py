@@ -0,0 +1,322 @@
+# Cache of extracted pages for incremental extraction.
+#
+# The JSONL output of each extracted page is saved in a SQLite database
+# together with a hash of the page text and a hash of the templates and
+# modules the page uses (see `dependencies.py`).  The templates and modules
+# fetched while the page was extracted, also the ones whose names were
+# computed during expansion (see `dependencies.UsedPageRecorder`), and the
+# auxiliary pages the page used (see `aux_pages.py`) are only known after
+# the page has been extracted, they are saved with a hash of their bodies.
+# When a later dump is extracted with the same cache, pages whose text,
+# dependencies and used pages haven't changed are not parsed again; their
+# saved output is used instead.
+# Messages (errors, warnings etc.) are not saved, so they are only reported
+# for the pages that are extracted again.
+
+import hashlib
+import json
+import sqlite3
+from importlib.metadata import version
+from importlib.resources import files
+from pathlib import Path
+
+import wikitextprocessor
+
+from .dependencies import DependencyHasher, PageKey, text_hash
+from .wxr_context import WiktextractContext
+from .wxr_logging import logger
+
+# Saved entries are committed after this many pages
+COMMIT_INTERVAL = 10_000
+
+
+def init_extract_cache_db(db_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path)
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS pages (
+        title TEXT,
+        namespace_id INTEGER,
+        content_hash TEXT,
+        deps_hash TEXT,
+        thesaurus_hash TEXT,
+        aux_pages TEXT,  -- JSON list of (title, namespace id) lists
+        aux_hash TEXT,
+        used_pages TEXT,  -- JSON list of (namespace id, title) lists
+        used_hash TEXT,
+        text TEXT,
+        emitted TEXT,  -- JSON list of (word, lang_code, pos) lists
+        run INTEGER,
+        PRIMARY KEY(title, namespace_id)
+        );
+
+        PRAGMA journal_mode = WAL;
+        """
+    )
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(pages)")}
+    if "used_hash" not in columns:
+        # Created by an older version, the saved pages can't be used
+        conn.execute("DROP TABLE pages")
+        conn.commit()
+        conn.close()
+        return init_extract_cache_db(db_path)
+    return conn
+
+
+def extraction_fingerprint(
+    wxr: WiktextractContext, human_readable: bool
+) -> str:
+    """Returns a hash of everything other than the page and its templates
+    that affects the extracted data: the extractor code and data files, the
+    wikitextprocessor version and code and the configuration."""
+    h = hashlib.blake2b(digest_size=16)
+    hash_package_files(h, "wiktextract", (".py", ".json"))
+    # Installs from git have the same version for many commits
+    h.update(version("wikitextprocessor").encode())
+    hash_package_files(h, wikitextprocessor.__name__, (".py", ".lua", ".json"))
+    config = wxr.config
+    h.update(
+        json.dumps(
+            {
+                "edition": config.dump_file_lang_code,
+                "languages": sorted(config.capture_language_codes)
+                if config.capture_language_codes is not None
+                else None,
+                "translations": config.capture_translations,
+                "pronunciation": config.capture_pronunciation,
+                "linkages": config.capture_linkages,
+                "compounds": config.capture_compounds,
+                "redirects": config.capture_redirects,
+                "examples": config.capture_examples,
+                "etymologies": config.capture_etymologies,
+                "inflections": config.capture_inflections,
+                "descendants": config.capture_descendants,
+                "expand_tables": config.expand_tables,
+                "sound_file_redirects": config.redirects,
+                "human_readable": human_readable,
+            },
+            sort_keys=True,
+        ).encode("utf-8")
+    )
+    return h.hexdigest()
+
+
+def hash_package_files(
+    h: "hashlib._Hash", package: str, suffixes: tuple[str, ...]
+) -> None:
+    package_dir = files(package)
+    for path in sorted(
+        Path(str(package_dir)).rglob("*"), key=lambda p: p.as_posix()
+    ):
+        if path.is_file() and path.suffix in suffixes:
+            h.update(path.relative_to(str(package_dir)).as_posix().encode())
+            h.update(path.read_bytes())
+
+
+class ExtractCache:
+    """Parent process side of the cache: checks that the saved entries
+    were created with the same code and configuration and saves the
+    entries of the extracted pages."""
+
+    __slots__ = ("db_path", "db_conn", "run", "pending")
+
+    def __init__(self, db_path: Path, fingerprint: str):
+        self.db_path = db_path
+        self.db_conn = init_extract_cache_db(db_path)
+        self.pending = 0
+        saved = dict(self.db_conn.execute("SELECT key, value FROM meta"))
+        if saved.get("fingerprint") != fingerprint:
+            if "fingerprint" in saved:
+                logger.info(
+                    "Extractor code or configuration changed, "
+                    f"clearing extraction cache {db_path}"
+                )
+            self.db_conn.execute("DELETE FROM pages")
+            saved["run"] = "0"
+        self.run = int(saved.get("run", "0")) + 1
+        self.db_conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES(?, ?)",
+            (("fingerprint", fingerprint), ("run", str(self.run))),
+        )
+        self.db_conn.commit()
+
+    def save(
+        self,
+        title: str,
+        namespace_id: int,
+        entry: tuple[
+            str, str, str, list[tuple[str, int]], str, list[PageKey], str, str
+        ]
+        | None,
+        emitted: list[tuple[str, str, str]],
+    ) -> None:
+        """Saves a new entry of an extracted page, or marks the saved entry
+        as used if `entry` is None."""
+        if entry is None:
+            self.db_conn.execute(
+                "UPDATE pages SET run = ? WHERE title = ? AND namespace_id = ?",
+                (self.run, title, namespace_id),
+            )
+        else:
+            (
+                content_hash,
+                deps_hash,
+                thesaurus_hash,
+                aux_pages,
+                aux_hash,
+                used_pages,
+                used_hash,
+                text,
+            ) = entry
+            self.db_conn.execute(
+                """
+                INSERT OR REPLACE INTO pages
+                (title, namespace_id, content_hash, deps_hash, thesaurus_hash,
+                aux_pages, aux_hash, used_pages, used_hash, text, emitted, run)
+                VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    title,
+                    namespace_id,
+                    content_hash,
+                    deps_hash,
+                    thesaurus_hash,
+                    json.dumps(aux_pages, ensure_ascii=False),
+                    aux_hash,
+                    json.dumps(used_pages, ensure_ascii=False),
+                    used_hash,
+                    text,
+                    json.dumps(emitted, ensure_ascii=False),
+                    self.run,
+                ),
+            )
+        self.pending += 1
+        if self.pending >= COMMIT_INTERVAL:
+            self.db_conn.commit()
+            self.pending = 0
+
+    def close(self, remove_unused: bool) -> None:
+        """Commits the saved entries.  If `remove_unused` is True, the
+        entries of pages that were not seen in this run (deleted pages) are
+        removed."""
+        if remove_unused:
+            self.db_conn.execute(
+                "DELETE FROM pages WHERE run != ?", (self.run,)
+            )
+        self.db_conn.commit()
+        self.db_conn.close()
+
+
+class CachedPageLookup:
+    """Worker process side of the cache."""
+
+    __slots__ = ("db_conn", "hasher", "wxr")
+
+    def __init__(self, wxr: WiktextractContext, db_path: Path):
+        self.wxr = wxr
+        self.db_conn = sqlite3.connect(f"{db_path.as_uri()}?mode=ro", uri=True)
+        self.hasher = DependencyHasher(wxr)
+
+    def page_hashes(self, text: str) -> tuple[str, str]:
+        return text_hash(text), self.hasher.dependency_hash(text)
+
+    def lookup(
+        self, title: str, namespace_id: int, content_hash: str, deps_hash: str
+    ) -> (
+        tuple[
+            str,
+            list[tuple[str, str, str]],
+            list[tuple[str, int]],
+            list[PageKey],
+        ]
+        | None
+    ):
+        """Returns the saved text, emitted keys, auxiliary pages and used
+        templates and modules if the page, its dependencies and the pages
+        it used haven't changed."""
+        for (
+            text,
+            emitted,
+            thesaurus_hash,
+            aux_pages_json,
+            aux_hash,
+            used_pages_json,
+            used_hash,
+        ) in self.db_conn.execute(
+            "SELECT text, emitted, thesaurus_hash, aux_pages, aux_hash, "
+            "used_pages, used_hash "
+            "FROM pages WHERE title = ? AND namespace_id = ? "
+            "AND content_hash = ? AND deps_hash = ?",
+            (title, namespace_id, content_hash, deps_hash),
+        ):
+            used_pages = [tuple(key) for key in json.loads(used_pages_json)]
+            if self.used_pages_hash(used_pages) != used_hash:  # type: ignore[arg-type]
+                return None
+            aux_pages = [tuple(key) for key in json.loads(aux_pages_json)]
+            if self.aux_pages_hash(aux_pages) != aux_hash:  # type: ignore[arg-type]
+                return None
+            keys = [tuple(key) for key in json.loads(emitted)]
+            if self.thesaurus_hash(keys) != thesaurus_hash:  # type: ignore[arg-type]
+                return None
+            return text, keys, aux_pages, used_pages  # type: ignore[return-value]
+        return None
+
+    def used_pages_hash(self, used_pages: list[PageKey]) -> str:
+        """Hash of the bodies of the templates and modules fetched while the
+        page was extracted, and of the targets of the redirects among
+        them."""
+        h = hashlib.blake2b(digest_size=16)
+        for key in used_pages:
+            seen: set[PageKey] = set()
+            while key not in seen:
+                seen.add(key)
+                body_hash, deps = self.hasher.node(key)
+                h.update(f"{key[0]}\0{key[1]}\0{body_hash}\n".encode("utf-8"))
+                if not body_hash.startswith("->"):
+                    break
+                key = deps[0]
+        return h.hexdigest()
+
+    def aux_pages_hash(self, aux_pages: list[tuple[str, int]]) -> str:
+        """Hash of the bodies of the auxiliary pages the page used, they
+        can change without the page changing."""
+        h = hashlib.blake2b(digest_size=16)
+        for title, namespace_id in aux_pages:
+            body = self.wxr.wtp.get_page_body(title, namespace_id)
+            h.update(
+                json.dumps(
+                    [title, namespace_id, body], ensure_ascii=False
+                ).encode("utf-8")
+            )
+        return h.hexdigest()
+
+    def thesaurus_hash(self, emitted: list[tuple[str, str, str]]) -> str:
+        """Hash of the thesaurus linkages injected to the entries, the
+        thesaurus pages can change without the page changing."""
+        if not self.wxr.config.extract_thesaurus_pages:
+            return ""
+        from .thesaurus import lookup_thesaurus
+
+        h = hashlib.blake2b(digest_size=16)
+        for word, lang_code, pos in emitted:
+            for (
+                term,
+                linkage,
+                tags,
+                topics,
+                roman,
+                sense,
+                raw_tags,
+            ) in lookup_thesaurus(self.wxr, word, lang_code, pos):
+                h.update(
+                    json.dumps(
+                        [linkage, term, sense, tags, raw_tags, topics, roman],
+                        ensure_ascii=False,
+                    ).encode("utf-8")
+                )
+        return h.hexdigest()
@@ -4,6 +4,7 @@ from typing import Any
 from mediawiki_langcodes import name_to_code
 from wikitextprocessor.parser import LEVEL_KIND_FLAGS, LevelNode, NodeKind
 
+from ...language_sections import plain_heading_text
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from .declension import extract_declension_section
@@ -103,6 +104,18 @@ def parse_section(
         )
 
 
+def language_section_code(level: int, title: str) -> str | None:
+    # Used by `language_sections.select_language_sections()`
+    if level < 2:
+        return ""
+    if level > 2:
+        return None
+    lang_name = plain_heading_text(title)
+    if lang_name is None:
+        return ""
+    return name_to_code(lang_name, "cs") or "unknown"
+
+
 def parse_page(
     wxr: WiktextractContext, page_title: str, page_text: str
 ) -> list[dict[str, Any]]:
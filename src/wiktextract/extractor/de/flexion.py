@@ -9,6 +9,7 @@ from wikitextprocessor.parser import (
     WikiNode,
 )
 
+from ...aux_pages import parse_aux_page
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from .models import Form, WordEntry
@@ -21,12 +22,11 @@ def parse_flexion_page(
     # https://de.wiktionary.org/wiki/Hilfe:Flexionsseiten
     LEVEL2_TAGS = ["Hilfsverb haben", "Hilfsverb sein"]
 
-    flexion_page = wxr.wtp.get_page_body(
-        page_title, wxr.wtp.NAMESPACE_DATA["Flexion"]["id"]
+    flexion_root = parse_aux_page(
+        wxr, page_title, wxr.wtp.NAMESPACE_DATA["Flexion"]["id"]
     )
-    if flexion_page is None:
+    if flexion_root is None:
         return
-    flexion_root = wxr.wtp.parse(flexion_page)
     shared_raw_tags = []
     for node in flexion_root.find_child_recursively(
         NodeKind.TEMPLATE | NodeKind.LEVEL2
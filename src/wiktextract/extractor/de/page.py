@@ -3,6 +3,7 @@ from typing import Any
 from mediawiki_langcodes import name_to_code
 from wikitextprocessor.parser import LevelNode, NodeKind, TemplateNode, WikiNode
 
+from ...language_sections import heading_templates
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from ...wxr_logging import logger
@@ -239,6 +240,22 @@ def process_pos_section(
     translate_raw_tags(page_data[-1])
 
 
+def language_section_code(level: int, title: str) -> str | None:
+    # Used by `language_sections.select_language_sections()`
+    if level < 2:
+        return ""
+    if level > 2:
+        return None
+    lang_names = [
+        arg for name, arg in heading_templates(title) if name == "Sprache"
+    ]
+    if len(lang_names) == 0:
+        return None
+    if len(lang_names) > 1 or lang_names[0] == "":
+        return ""
+    return name_to_code(lang_names[0], "de") or "unknown"
+
+
 def parse_page(
     wxr: WiktextractContext, page_title: str, page_text: str
 ) -> list[dict[str, Any]]:
@@ -6,17 +6,12 @@
 #
 # Copyright (c) 2020-2022 Tatu Ylonen.  See file LICENSE and https://ylonen.org
 
-import nltk  # type: ignore[import-untyped]
-from nltk.corpus import brown  # type: ignore[import-untyped]
+from importlib.metadata import version
+from pathlib import Path
 
+from ...import_cache import cached_import_data
 from .form_descriptions_known_firsts import known_firsts  # w/ our additions
 
-# Download Brown corpus if not already downloaded
-try:
-    nltk.data.find("corpora/brown.zip")
-except LookupError:
-    nltk.download("brown", quiet=True)
-
 # English words added to the default set from Brown corpus.  Multi-word
 # expressions separated by spaces can also be added but must match the whole
 # text (they can be used when we don't want to add the components).
@@ -1941,10 +1936,33 @@ potentially_english_words = set(
 
 not_english_words = not_english_words_1 | potentially_english_words
 
+
+def brown_corpus_words() -> set[str]:
+    import nltk  # type: ignore[import-untyped]
+    from nltk.corpus import brown  # type: ignore[import-untyped]
+
+    # Download Brown corpus if not already downloaded
+    try:
+        nltk.data.find("corpora/brown.zip")
+    except LookupError:
+        nltk.download("brown", quiet=True)
+    return set(brown.words())
+
+
+# Reading the words of the Brown corpus takes seconds, the word set is
+# saved in the import cache.  The corpus is read by nltk, a new nltk
+# version builds a new snapshot.
+brown_words = cached_import_data(
+    "brown_words",
+    [Path(__file__)],
+    brown_corpus_words,
+    [f"nltk {version('nltk')}"],
+)
+
 # Construct a set of (most) English words.  Multi-word expressions where we
 # do not want to include the components can also be put here space-separated.
 english_words = (
-    set(brown.words())
+    brown_words
     | known_firsts
     |
     # XXX the second words of species names add too much garbage
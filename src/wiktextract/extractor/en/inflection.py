@@ -791,6 +791,145 @@ def parse_title(
     return global_tags, table_tags, extra_forms
 
 
+# Compiled `infl_map` value: alternative tagsets, each a tuple of tags
+InflTagsets = tuple[tuple[str, ...], ...]
+
+
+class InflCondition:
+    """Conditional expression of `infl_map`, with the values of its
+    conditions converted to sets and its branches compiled."""
+
+    __slots__ = (
+        "langs",
+        "lang_is_list",
+        "depths",
+        "columns",
+        "templates",
+        "poses",
+        "if_tags",
+        "if_any",
+        "default",
+        "default_rule",
+        "then",
+        "else_",
+    )
+
+    def __init__(self, v: dict) -> None:
+        self.langs: frozenset[str] | None = None
+        self.lang_is_list = False
+        if "lang" in v:
+            c = v["lang"]
+            # The language may be given as a name or a code
+            if isinstance(c, str):
+                self.langs = frozenset((c, code_to_name(c, "en")))
+            else:
+                assert isinstance(c, (list, tuple, set))
+                self.langs = frozenset(c)
+                self.lang_is_list = True
+        self.depths = condition_values(v, "nested-table-depth", int)
+        self.columns = condition_values(v, "column-index", int)
+        self.templates = condition_values(v, "inflection-template", str)
+        self.poses = condition_values(v, "pos", str)
+        self.if_tags: tuple[str, ...] | None = None
+        self.if_any = False
+        if "if" in v:
+            c = v["if"]
+            assert isinstance(c, str)
+            self.if_any = c.startswith("any: ")
+            self.if_tags = tuple(c[5:].split() if self.if_any else c.split())
+        self.default: str | None = None
+        self.default_rule: InflRule | None = None
+        if "default" in v:
+            assert isinstance(v["default"], str)
+            self.default = v["default"]
+            self.default_rule = compile_infl_value(self.default)
+        self.then = compile_infl_value(v.get("then", ""))
+        v1 = v.get("else")
+        self.else_ = None if v1 is None else compile_infl_value(v1)
+
+
+class InflInvalid:
+    """Value of `infl_map` that is not a string, list or dictionary."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value) -> None:
+        self.value = value
+
+
+InflRule = Union[InflTagsets, InflCondition, InflInvalid]
+
+INFL_ERROR_RULE: InflTagsets = (("error-unrecognized-form",),)
+
+
+def condition_values(
+    v: dict, key: str, value_type: type
+) -> Optional[frozenset]:
+    """Returns the values of condition ``key`` of conditional expression
+    ``v`` as a set, or None if ``v`` doesn't have the condition."""
+    if key not in v:
+        return None
+    c = v[key]
+    if isinstance(c, value_type):
+        return frozenset((c,))
+    assert isinstance(c, (list, tuple, set))
+    return frozenset(c)
+
+
+def compile_infl_value(v) -> InflRule:
+    """Compiles a value of `infl_map` or `infl_start_map` for
+    `expand_header_tagsets()`."""
+    if isinstance(v, str):
+        return (tuple(v.split()),)
+    # For a list, just interpret it as alternatives.  (Currently the
+    # alternatives must directly be strings.)
+    if isinstance(v, (list, tuple)):
+        return tuple(tuple(x.split()) for x in v)
+    if isinstance(v, dict):
+        return InflCondition(v)
+    return InflInvalid(v)
+
+
+class InflRules:
+    """Values of `infl_map` and `infl_start_map`, each compiled the first
+    time it is used."""
+
+    __slots__ = ("source", "rules", "start_rules")
+
+    def __init__(self, source: dict) -> None:
+        self.source = source
+        self.rules: dict[str, InflRule] = {}
+        self.start_rules: dict[str, InflRule] = {}
+
+    def get(self, text: str) -> Optional[InflRule]:
+        rule = self.rules.get(text)
+        if rule is None and text in self.source:
+            rule = compile_infl_value(self.source[text])
+            self.rules[text] = rule
+        return rule
+
+    def get_start(self, start: str) -> InflRule:
+        rule = self.start_rules.get(start)
+        if rule is None:
+            rule = compile_infl_value(infl_start_map[start])
+            self.start_rules[start] = rule
+        return rule
+
+
+compiled_infl_rules = InflRules(infl_map)
+
+
+def get_infl_rules() -> InflRules:
+    """Returns the compiled values of the current `infl_map`."""
+    global compiled_infl_rules
+    if compiled_infl_rules.source is not infl_map:
+        # infl_map has been replaced (tests patch it), drop the compiled
+        # values and the header expansions of the old map
+        compiled_infl_rules = InflRules(infl_map)
+        cached_header_tagsets.cache_clear()
+    return compiled_infl_rules
+
+
 def expand_header(
     wxr: WiktextractContext,
     tablecontext: "TableContext",
@@ -822,6 +961,90 @@ def expand_header(
     assert silent in (True, False)
     assert isinstance(depth, int)
     # print("EXPAND_HDR: text={!r} base_tags={!r}".format(text, base_tags))
+    rules = get_infl_rules()
+    # None for no table context, the condition "inflection-template" is
+    # then not tested
+    template_name = tablecontext.template_name if tablecontext else None
+    # The same headers occur in a great many tables, the expansion is
+    # cached without the debug messages.  The expansions that have
+    # messages are done again to print the messages.
+    tagsets, quiet = cached_header_tagsets(
+        wxr,
+        lang,
+        pos,
+        text,
+        frozenset(base_tags),
+        ignore_tags,
+        depth,
+        column_number,
+        template_name,
+    )
+    if quiet or silent:
+        return list(tagsets)
+    return expand_header_tagsets(
+        wxr,
+        rules,
+        word,
+        lang,
+        pos,
+        text,
+        base_tags,
+        silent,
+        ignore_tags,
+        depth,
+        column_number,
+        template_name,
+    )[0]
+
+
+@functools.lru_cache(65536)
+def cached_header_tagsets(
+    wxr: WiktextractContext,
+    lang: str,
+    pos: str,
+    text: str,
+    base_tags: frozenset[str],
+    ignore_tags: bool,
+    depth: int,
+    column_number: int | None,
+    template_name: str | None,
+) -> tuple[InflTagsets, bool]:
+    """Cached `expand_header_tagsets()` without the debug messages."""
+    tagsets, quiet = expand_header_tagsets(
+        wxr,
+        get_infl_rules(),
+        "",
+        lang,
+        pos,
+        text,
+        base_tags,
+        True,
+        ignore_tags,
+        depth,
+        column_number,
+        template_name,
+    )
+    return tuple(tagsets), quiet
+
+
+def expand_header_tagsets(
+    wxr: WiktextractContext,
+    rules: InflRules,
+    word: str,
+    lang: str,
+    pos: str,
+    text: str,
+    base_tags: Union[list[str], set[str], tuple[str, ...], frozenset[str]],
+    silent: bool,
+    ignore_tags: bool,
+    depth: int,
+    column_number: int | None,
+    template_name: str | None,
+) -> tuple[list[tuple[str, ...]], bool]:
+    """Expands a cell header for `expand_header()` using the compiled values
+    of `infl_map`.  This returns the tagsets and False if the expansion
+    has debug messages (they are printed if ``silent`` is False)."""
+    quiet = True
     # First map the text using the inflection map
     text = clean_value(wxr, text)
     combined_return: list[tuple[str, ...]] = []
@@ -829,13 +1052,12 @@ def expand_header(
     for text in parts:
         if not text:
             continue
-        if text in infl_map:
-            v = infl_map[text]  # list or string
-        else:
+        rule = rules.get(text)
+        if rule is None:
             m = re.match(infl_start_re, text)
             if m is not None:
-                v = infl_start_map[m.group(1)]
-                # print("INFL_START {} -> {}".format(text, v))
+                rule = rules.get_start(m.group(1))
+                # print("INFL_START {} -> {}".format(text, rule))
             elif re.match(r"Notes", text):
                 # Ignored header
                 # print("IGNORING NOTES")
@@ -851,9 +1073,11 @@ def expand_header(
                 continue
             # Try without final parenthesized part
             text_without_parens = re.sub(r"[,/]?\s+\([^)]*\)\s*$", "", text)
-            if text_without_parens in infl_map:
-                v = infl_map[text_without_parens]
+            rule_without_parens = rules.get(text_without_parens)
+            if rule_without_parens is not None:
+                rule = rule_without_parens
             elif m is None:
+                quiet = False
                 if not silent:
                     wxr.wtp.debug(
                         "inflection table: unrecognized header: {}".format(
@@ -867,158 +1091,107 @@ def expand_header(
                 )
                 continue
 
-        # Then loop interpreting the value, until the value is a simple string.
-        # This may evaluate nested conditional expressions.
+        # Then evaluate the nested conditional expressions until the rule
+        # is a tuple of tagsets.
         default_else = None
-        while True:
-            # If it is a string, we are done.
-            if isinstance(v, str):
-                tags = set(v.split())
-                remove_useless_tags(lang, pos, tags)
-                tagset = [tuple(sorted(tags))]
-                break
-            # For a list, just interpret it as alternatives.  (Currently the
-            # alternatives must directly be strings.)
-            if isinstance(v, (list, tuple)):
-                tagset = []
-                for x in v:
-                    tags = set(x.split())
-                    remove_useless_tags(lang, pos, tags)
-                    tags_t = tuple(sorted(tags))
-                    if tags_t not in tagset:
-                        tagset.append(tags_t)
-                break
-            # Otherwise the value should be a dictionary describing a
-            # conditional expression.
-            if not isinstance(v, dict):
-                wxr.wtp.debug(
-                    "inflection table: internal: "
-                    "UNIMPLEMENTED INFL_MAP VALUE: {}".format(infl_map[text]),
-                    sortid="inflection/767",
-                )
-                tagset = [()]
-                break
-            # Evaluate the conditional expression.
-            assert isinstance(v, dict)
+        default_rule = None
+        while isinstance(rule, InflCondition):
+            # Each condition is only tested if the previous ones are True.
+            # "default-true" means that the expression has no conditions.
             cond: Union[bool, str] = "default-true"
-            c: Union[str, list[str], set[str]] = ""
-            # Handle "lang" condition.  The value must be either a
-            # single language or a list of languages, and the
-            # condition evaluates to True if the table is one of
-            # those languages.
-            if "lang" in v:
-                c = v["lang"]
-                # check if it's a code and transform if necessary
-                if isinstance(c, str):
-                    if c != lang:
-                        cond = lang == code_to_name(c, "en")
-                    else:
-                        cond = True
-                else:
-                    assert isinstance(c, (list, tuple, set))
-                    if lang not in c:
-                        cond = name_to_code(lang, "en") in c
-                    else:
-                        cond = True
-            # Handle "nested-table-depth" condition. The value must
-            # be an int or list of ints, and the condition evaluates
-            # True if the depth is one of those values.
+            # Handle "lang" condition, the language may be given as a
+            # name or a code.
+            if rule.langs is not None:
+                cond = lang in rule.langs or (
+                    rule.lang_is_list and name_to_code(lang, "en") in rule.langs
+                )
+            # Handle "nested-table-depth" condition.
             # "depth" is how deep into a nested table tree the current
             # table lies. It is first started in handle_wikitext_table,
             # so only applies to tables-within-tables, not other
             # WikiNode content. `depth` is currently only passed as a
             # parameter down the table parsing stack, and not stored.
-            if cond and "nested-table-depth" in v:
-                d = v["nested-table-depth"]
-                if isinstance(d, int):
-                    cond = d == depth
-                else:
-                    assert isinstance(d, (list, tuple, set))
-                    cond = depth in d
+            if cond and rule.depths is not None:
+                cond = depth in rule.depths
             # Column index: check if we're in position X of the row
-            if cond and "column-index" in v:
-                index = v["column-index"]
-                if isinstance(index, int):
-                    cond = index == column_number
-                else:
-                    assert isinstance(index, (list, tuple, set))
-                    cond = column_number in index
-            # Handle inflection-template condition. Must be a string
-            # or list of strings, and if tablecontext.template_name is in
-            # those, accept the condition.
+            if cond and rule.columns is not None:
+                cond = column_number in rule.columns
+            # Handle inflection-template condition.
             # TableContext.template_name is passed down from page/
             # parse_inflection, before parsing and expanding itself
             # has begun.
-            if cond and tablecontext and "inflection-template" in v:
-                d1 = v["inflection-template"]
-                if isinstance(d1, str):
-                    cond = d1 == tablecontext.template_name
-                else:
-                    assert isinstance(d1, (list, tuple, set))
-                    cond = tablecontext.template_name in d1
-            # Handle "pos" condition.  The value must be either a single
-            # part-of-speech or a list of them, and the condition evaluates to
-            # True if the part-of-speech is any of those listed.
-            if cond and "pos" in v:
-                c = v["pos"]
-                if isinstance(c, str):
-                    cond = c == pos
-                else:
-                    assert isinstance(c, (list, tuple, set))
-                    cond = pos in c
-            # Handle "if" condition.  The value must be a string containing a
-            # space-separated list of tags.  The condition evaluates to True if
-            # ``base_tags`` contains all of the listed tags.  If the condition
-            # is of the form "any: ...tags...", then any of the tags will be
-            # enough.
-            if cond and "if" in v and not ignore_tags:
-                c = v["if"]
-                assert isinstance(c, str)
-                # "if" condition is true if any of the listed tags is present if
-                # it starts with "any:", otherwise all must be present
-                if c.startswith("any: "):
-                    cond = any(t in base_tags for t in c[5:].split())
+            if (
+                cond
+                and template_name is not None
+                and rule.templates is not None
+            ):
+                cond = template_name in rule.templates
+            # Handle "pos" condition.
+            if cond and rule.poses is not None:
+                cond = pos in rule.poses
+            # Handle "if" condition.  The condition evaluates to True if
+            # ``base_tags`` contains all of the listed tags, or any of them
+            # for "any: ...tags...".
+            if cond and rule.if_tags is not None and not ignore_tags:
+                if rule.if_any:
+                    cond = any(t in base_tags for t in rule.if_tags)
                 else:
-                    cond = all(t in base_tags for t in c.split())
+                    cond = all(t in base_tags for t in rule.if_tags)
 
             # Handle "default" assignment. Store the value to be used
             # as a default later.
-            if "default" in v:
-                assert isinstance(v["default"], str)
-                default_else = v["default"]
+            if rule.default is not None:
+                default_else = rule.default
+                default_rule = rule.default_rule
 
             # Warning message about missing conditions for debugging.
-
-            if cond == "default-true" and not default_else and not silent:
-                wxr.wtp.debug(
-                    "inflection table: IF MISSING COND: word={} "
-                    "lang={} text={} base_tags={} c={} cond={}".format(
-                        word, lang, text, base_tags, c, cond
-                    ),
-                    sortid="inflection/851",
-                )
+            if cond == "default-true" and not default_else:
+                quiet = False
+                if not silent:
+                    wxr.wtp.debug(
+                        "inflection table: IF MISSING COND: word={} "
+                        "lang={} text={} base_tags={} c={} cond={}".format(
+                            word, lang, text, base_tags, "", cond
+                        ),
+                        sortid="inflection/851",
+                    )
             # Based on the result of evaluating the condition, select either
             # "then" part or "else" part.
             if cond:
-                v = v.get("then", "")
+                rule = rule.then
+            elif rule.else_ is not None:
+                rule = rule.else_
+            elif default_rule is not None:
+                rule = default_rule
             else:
-                v1 = v.get("else")
-                if v1 is None:
-                    if default_else is not None:
-                        v = default_else
-                    else:
-                        if not silent:
-                            wxr.wtp.debug(
-                                "inflection table: IF WITHOUT ELSE EVALS "
-                                "False: "
-                                "{}/{} {!r} base_tags={}".format(
-                                    word, lang, text, base_tags
-                                ),
-                                sortid="inflection/865",
-                            )
-                        v = "error-unrecognized-form"
-                else:
-                    v = v1
+                quiet = False
+                if not silent:
+                    wxr.wtp.debug(
+                        "inflection table: IF WITHOUT ELSE EVALS False: "
+                        "{}/{} {!r} base_tags={}".format(
+                            word, lang, text, base_tags
+                        ),
+                        sortid="inflection/865",
+                    )
+                rule = INFL_ERROR_RULE
+
+        if isinstance(rule, InflInvalid):
+            quiet = False
+            if not silent:
+                wxr.wtp.debug(
+                    "inflection table: internal: "
+                    "UNIMPLEMENTED INFL_MAP VALUE: {}".format(rule.value),
+                    sortid="inflection/767",
+                )
+            tagset = [()]
+        else:
+            tagset = []
+            for tags_t in rule:
+                tags = set(tags_t)
+                remove_useless_tags(lang, pos, tags)
+                tags_t = tuple(sorted(tags))
+                if tags_t not in tagset:
+                    tagset.append(tags_t)
 
         # Merge the resulting tagset from this header part with the other
         # tagsets from the whole header
@@ -1027,7 +1200,7 @@ def expand_header(
     # Return the combined tagsets, or empty tagset if we got no tagsets
     if not combined_return:
         combined_return = [()]
-    return combined_return
+    return combined_return, quiet
 
 
 def compute_coltags(
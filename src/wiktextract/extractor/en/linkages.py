@@ -25,7 +25,7 @@ from ...datautils import (
     ns_title_prefix_tuple,
     split_at_comma_semi,
 )
-from ...page import clean_node, is_panel_template
+from ...page import clean_node, expand_template_node, is_panel_template
 from ...tags import linkage_beginning_tags, valid_tags
 from ...wxr_context import WiktextractContext
 from ..ruby import extract_ruby, parse_ruby  # noqa: F401
@@ -256,9 +256,7 @@ def extract_l_template(
     wxr: WiktextractContext, word_entry: WordData, t_node: TemplateNode
 ) -> None:
     forms: list[FormData] = []
-    expanded_node = wxr.wtp.parse(
-        wxr.wtp.node_to_wikitext(t_node), expand_all=True
-    )
+    expanded_node = expand_template_node(wxr, t_node)
     lang_code = clean_node(wxr, None, t_node.template_parameters.get(1, ""))
     for span_tag in expanded_node.find_html("span"):
         span_lang = span_tag.attrs.get("lang", "")
@@ -314,9 +312,7 @@ def extract_zh_dial_template(
     from .pronunciation import split_zh_pron_raw_tag
 
     linkage_list: list[LinkageData] = []
-    expanded_node = wxr.wtp.parse(
-        wxr.wtp.node_to_wikitext(t_node), expand_all=True
-    )
+    expanded_node = expand_template_node(wxr, t_node)
     for table_node in expanded_node.find_child_recursively(NodeKind.TABLE):
         is_note_row = False
         note_tags = {}
@@ -30,6 +30,7 @@ from wikitextprocessor.parser import (
     WikiNode,
 )
 
+from ...aux_pages import find_aux_page_section, parse_aux_page
 from ...clean import clean_template_args, clean_value
 from ...datautils import (
     data_append,
@@ -2648,8 +2649,17 @@ def parse_language(
             for x in seq:
                 assert isinstance(x, str)
         subpage_title = word + "/" + subtitle
-        subpage_content = wxr.wtp.get_page_body(subpage_title, 0)
-        if subpage_content is None:
+        # The subpage is parsed once for all the part-of-speech sections
+        # of the page
+        tree = parse_aux_page(
+            wxr,
+            subpage_title,
+            0,
+            pre_expand=True,
+            additional_expand=ADDITIONAL_EXPAND_TEMPLATES,
+            do_not_pre_expand=DO_NOT_PRE_EXPAND_TEMPLATES,
+        )
+        if tree is None:
             wxr.wtp.error(
                 "/translations not found despite "
                 "{{see translation subpage|...}}",
@@ -2679,15 +2689,14 @@ def parse_language(
                     return ret
             return None
 
-        tree = wxr.wtp.parse(
-            subpage_content,
-            pre_expand=True,
-            additional_expand=ADDITIONAL_EXPAND_TEMPLATES,
-            do_not_pre_expand=DO_NOT_PRE_EXPAND_TEMPLATES,
-        )
         assert tree.kind == NodeKind.ROOT
         for seq in seqs:
-            ret = recurse(tree, seq)
+            ret = find_aux_page_section(
+                wxr,
+                tree,
+                tuple(x.lower() for x in seq),
+                partial(recurse, tree, seq),
+            )
         if ret is None:
             wxr.wtp.debug(
                 "Failed to find subpage section {}/{} seq {}".format(
@@ -3989,6 +3998,15 @@ def fix_subtitle_hierarchy(wxr: WiktextractContext, text: str) -> str:
     return text
 
 
+def language_section_code(level: int, title: str) -> str | None:
+    # Language names start a language section at any level, see
+    # `fix_subtitle_hierarchy()`
+    title = re.sub(r"^\[\[", "", title)
+    title = re.sub(r"\]\]$", "", title)
+    lang_code = name_to_code(title, "en")
+    return lang_code if lang_code != "" else None
+
+
 def parse_page(wxr: WiktextractContext, word: str, text: str) -> list[WordData]:
     # Skip translation pages
     if word.endswith("/" + TRANSLATIONS_TITLE):
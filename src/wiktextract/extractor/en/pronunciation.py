@@ -1,7 +1,7 @@
 import hashlib
 import re
 import urllib
-from copy import deepcopy
+from copy import copy, deepcopy
 from dataclasses import dataclass
 from typing import Iterator
 
@@ -15,7 +15,12 @@ from wikitextprocessor import (
 
 from ...clean import clean_value
 from ...datautils import data_append, data_extend, split_at_comma_semi
-from ...page import LEVEL_KINDS, clean_node, is_panel_template
+from ...page import (
+    LEVEL_KINDS,
+    clean_node,
+    expand_template_node,
+    is_panel_template,
+)
 from ...tags import valid_tags
 from ...wxr_context import WiktextractContext
 from ..share import create_audio_url_dict
@@ -234,10 +239,7 @@ def parse_pronunciation(
         new_contents: list[str | WikiNode] = []
         for lst in contents:
             if isinstance(lst, TemplateNode):
-                temp = wxr.wtp.node_to_wikitext(lst)
-                temp = wxr.wtp.expand(temp)
-                temp_parsed = wxr.wtp.parse(temp)
-                new_contents.extend(temp_parsed.children)
+                new_contents.extend(expand_template_node(wxr, lst).children)
             else:
                 new_contents.append(lst)
         contents = new_contents
@@ -426,18 +428,17 @@ def parse_pronunciation(
                     sublist = child
                 else:
                     new_children.append(child)
-            node.children = new_children
-            node.sarg = "*"
-            yield node
+            # The tree may be shared with other sections of the page, see
+            # `expand_template_node()`
+            new_node = copy(node)
+            new_node.children = new_children
+            new_node.sarg = "*"
+            yield new_node
             if sublist:
                 yield from flattened_tree1(sublist)
         else:
             yield node
 
-    # XXX Do not use flattened_tree more than once here, for example for
-    # debug printing... The underlying data is changed, and the separated
-    # sublists disappear.
-
     # Kludge for templates that generate several lines, but haven't
     # been caught by earlier kludges...
     def split_cleaned_node_on_newlines(
@@ -758,9 +759,7 @@ def extract_th_pron_template(
         raw_tags: list[str]
         rowspan: int
 
-    expanded_node = wxr.wtp.parse(
-        wxr.wtp.node_to_wikitext(t_node), expand_all=True
-    )
+    expanded_node = expand_template_node(wxr, t_node)
     sounds = []
     for table_tag in expanded_node.find_html("table"):
         row_headers = []
@@ -859,9 +858,7 @@ def extract_zh_pron_template(
     wxr: WiktextractContext, word_entry: WordData, t_node: TemplateNode
 ):
     # https://en.wiktionary.org/wiki/Template:zh-pron
-    expanded_node = wxr.wtp.parse(
-        wxr.wtp.node_to_wikitext(t_node), expand_all=True
-    )
+    expanded_node = expand_template_node(wxr, t_node)
     seen_lists = set()
     sounds = []
     for list_node in expanded_node.find_child_recursively(NodeKind.LIST):
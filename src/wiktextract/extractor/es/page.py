@@ -5,6 +5,7 @@ from wikitextprocessor.parser import (
     WikiNode,
 )
 
+from ...language_sections import heading_templates
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from ...wxr_logging import logger
@@ -143,6 +144,18 @@ def parse_section(
         parse_section(wxr, page_data, base_data, next_level_node)
 
 
+def language_section_code(level: int, title: str) -> str | None:
+    # Used by `language_sections.select_language_sections()`
+    if level < 2:
+        return ""
+    if level > 2:
+        return None
+    for name, arg in heading_templates(title):
+        if name == "lengua":
+            return arg.lower()
+    return "unknown"
+
+
 def parse_page(
     wxr: WiktextractContext, page_title: str, page_text: str
 ) -> list[dict[str, any]]:
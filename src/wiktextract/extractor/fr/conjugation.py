@@ -11,7 +11,8 @@ from wikitextprocessor.parser import (
     WikiNode,
 )
 
-from ...page import clean_node
+from ...aux_pages import parse_aux_page
+from ...page import clean_node, expand_template_node
 from ...wxr_context import WiktextractContext
 from .models import Form, WordEntry
 from .tags import translate_raw_tags
@@ -30,12 +31,11 @@ def extract_conjugation(
     https://fr.wiktionary.org/wiki/Wiktionnaire:Liste_de_tous_les_modèles/Français/Conjugaison
     https://fr.wiktionary.org/wiki/Aide:Conjugaisons
     """
-    conj_page = wxr.wtp.get_page_body(
-        conj_page_title, wxr.wtp.NAMESPACE_DATA["Conjugaison"]["id"]
+    conj_root = parse_aux_page(
+        wxr, conj_page_title, wxr.wtp.NAMESPACE_DATA["Conjugaison"]["id"]
     )
-    if conj_page is None:
+    if conj_root is None:
         return
-    conj_root = wxr.wtp.parse(conj_page)
     for node in conj_root.children:
         if isinstance(node, TemplateNode):
             extract_conj_templates(
@@ -155,9 +155,7 @@ def process_conj_template(
 ) -> None:
     # https://fr.wiktionary.org/wiki/Catégorie:Modèles_de_conjugaison_en_français
     # https://fr.wiktionary.org/wiki/Modèle:fr-conj-1-ger
-    expanded_template = wxr.wtp.parse(
-        wxr.wtp.node_to_wikitext(template_node), expand_all=True
-    )
+    expanded_template = expand_template_node(wxr, template_node)
     process_expanded_conj_template(
         wxr, entry, expanded_template, conj_page_title
     )
@@ -375,9 +373,7 @@ def process_ja_flx_adj_template(
 ) -> None:
     # https://fr.wiktionary.org/wiki/Modèle:ja-adj
     # https://fr.wiktionary.org/wiki/Modèle:ja-flx-adj-な
-    expanded_template = wxr.wtp.parse(
-        wxr.wtp.node_to_wikitext(template_node), expand_all=True
-    )
+    expanded_template = expand_template_node(wxr, template_node)
     for table_node in expanded_template.find_child(NodeKind.TABLE):
         first_tag = ""
         for row in table_node.find_child(NodeKind.TABLE_ROW):
@@ -420,9 +416,7 @@ def process_ja_conj_template(
 ) -> None:
     # https://fr.wiktionary.org/wiki/Modèle:ja-verbe-conj
     # Modèle:ja-在る
-    expanded_template = wxr.wtp.parse(
-        wxr.wtp.node_to_wikitext(template_node), expand_all=True
-    )
+    expanded_template = expand_template_node(wxr, template_node)
     for table_node in expanded_template.find_child(NodeKind.TABLE):
         first_tag = ""
         row_headers = {}
@@ -484,9 +478,7 @@ def extract_ku_conj_trans_template(
     t_node: TemplateNode,
     conj_page_title: str,
 ) -> None:
-    expanded_node = wxr.wtp.parse(
-        wxr.wtp.node_to_wikitext(t_node), expand_all=True
-    )
+    expanded_node = expand_template_node(wxr, t_node)
     for table in expanded_node.find_child(NodeKind.TABLE):
         extract_ku_conj_trans_table_node(wxr, entry, table, conj_page_title)
     for link_node in expanded_node.find_child(NodeKind.LINK):
@@ -566,9 +558,7 @@ def extract_ko_conj_template(
 ) -> None:
     word_page_title = wxr.wtp.title
     wxr.wtp.title = conj_page_title
-    expanded_node = wxr.wtp.parse(
-        wxr.wtp.node_to_wikitext(t_node), expand_all=True
-    )
+    expanded_node = expand_template_node(wxr, t_node)
     for h3 in expanded_node.find_html("h3"):
         clean_node(wxr, entry, h3)
     for table_index, table in enumerate(
@@ -688,9 +678,7 @@ def extract_de_conj_template(
 ):
     word_page_title = wxr.wtp.title
     wxr.wtp.title = conj_page_title
-    expanded_node = wxr.wtp.parse(
-        wxr.wtp.node_to_wikitext(t_node), expand_all=True
-    )
+    expanded_node = expand_template_node(wxr, t_node)
     wxr.wtp.title = word_page_title
     for table_index, table in enumerate(
         expanded_node.find_child(NodeKind.TABLE)
@@ -752,12 +740,11 @@ def extract_de_conj_template(
 def extract_declension_page(
     wxr: WiktextractContext, word_entry: WordEntry, page_title: str
 ):
-    page_body = wxr.wtp.get_page_body(
-        page_title, wxr.wtp.NAMESPACE_DATA["Appendix"]["id"]
+    root = parse_aux_page(
+        wxr, page_title, wxr.wtp.NAMESPACE_DATA["Appendix"]["id"]
     )
-    if page_body is None:
+    if root is None:
         return
-    root = wxr.wtp.parse(page_body)
     for t_node in root.find_child(NodeKind.TEMPLATE):
         extract_declension_template(wxr, word_entry, page_title, t_node, "")
 
@@ -803,9 +790,7 @@ def extract_de_adj_declension_template(
     tab_name: str,
 ):
     # https://fr.wiktionary.org/wiki/Modèle:de-adjectif-déclinaisons
-    expanded_node = wxr.wtp.parse(
-        wxr.wtp.node_to_wikitext(t_node), expand_all=True
-    )
+    expanded_node = expand_template_node(wxr, t_node)
     for level_node in expanded_node.find_child(LEVEL_KIND_FLAGS):
         section_title = clean_node(wxr, None, level_node.largs)
         for table in level_node.find_child(NodeKind.TABLE):
@@ -876,9 +861,7 @@ def extract_pt_conj_template(
     t_node: TemplateNode,
     page_title: str,
 ):
-    expanded_node = wxr.wtp.parse(
-        wxr.wtp.node_to_wikitext(t_node), expand_all=True
-    )
+    expanded_node = expand_template_node(wxr, t_node)
     for table in expanded_node.find_child(NodeKind.TABLE):
         col_headers = []
         row_headers = []
@@ -997,9 +980,7 @@ def extract_cs_conj_template(
             form_nodes.clear()
             raw_tags.clear()
 
-    expanded_node = wxr.wtp.parse(
-        wxr.wtp.node_to_wikitext(t_node), expand_all=True
-    )
+    expanded_node = expand_template_node(wxr, t_node)
     for table in expanded_node.find_child(NodeKind.TABLE):
         col_headers = []
         for row in table.find_child(NodeKind.TABLE_ROW):
@@ -8,6 +8,7 @@ from wikitextprocessor.parser import (
     WikiNode,
 )
 
+from ...language_sections import heading_templates
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from ...wxr_logging import logger
@@ -222,6 +223,20 @@ def process_pos_block(
             page_data[-1].senses.append(Sense(glosses=[gloss_text]))
 
 
+def language_section_code(level: int, title: str) -> str | None:
+    # Used by `language_sections.select_language_sections()`
+    if level < 2:
+        return ""
+    if level > 2:
+        return None
+    lang_codes = [
+        arg for name, arg in heading_templates(title) if name == "langue"
+    ]
+    if len(lang_codes) == 0:
+        return None
+    return lang_codes[0] if len(lang_codes) == 1 else ""
+
+
 def parse_page(
     wxr: WiktextractContext, page_title: str, page_text: str
 ) -> list[dict[str, Any]]:
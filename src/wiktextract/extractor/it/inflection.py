@@ -3,6 +3,7 @@ from itertools import chain
 
 from wikitextprocessor import NodeKind, TemplateNode, WikiNode
 
+from ...aux_pages import parse_aux_page
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from .models import Form, WordEntry
@@ -85,10 +86,9 @@ def extract_appendix_conjugation_page(
     wxr: WiktextractContext, word_entry: WordEntry, page_title: str
 ) -> None:
     # https://it.wiktionary.org/wiki/Appendice:Coniugazioni
-    page_text = wxr.wtp.get_page_body(page_title, 100)
-    if page_text is None:
+    root = parse_aux_page(wxr, page_title, 100)
+    if root is None:
         return
-    root = wxr.wtp.parse(page_text)
     for t_node in root.find_child(NodeKind.TEMPLATE):
         if t_node.template_name.lower().endswith("-conj"):
             extract_conj_template(wxr, word_entry, t_node, page_title)
@@ -2,6 +2,7 @@ from typing import Any
 
 from wikitextprocessor.parser import LEVEL_KIND_FLAGS, LevelNode, NodeKind
 
+from ...language_sections import heading_templates
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from .etymology import extract_citation_section, extract_etymology_section
@@ -57,6 +58,18 @@ def parse_section(
         parse_section(wxr, page_data, base_data, next_level)
 
 
+def language_section_code(level: int, title: str) -> str | None:
+    # Used by `language_sections.select_language_sections()`
+    if level < 2:
+        return ""
+    if level > 2:
+        return None
+    templates = heading_templates(title)
+    if len(templates) == 0:
+        return "unknown"
+    return templates[0][0].strip("-")
+
+
 def parse_page(
     wxr: WiktextractContext, page_title: str, page_text: str
 ) -> list[dict[str, Any]]:
@@ -2,7 +2,7 @@ import re
 
 from wikitextprocessor import LevelNode, NodeKind, TemplateNode, WikiNode
 
-from ...page import clean_node
+from ...page import clean_node, expand_template_node
 from ...wxr_context import WiktextractContext
 from ..ruby import extract_ruby
 from .models import Form, WordEntry
@@ -59,9 +59,7 @@ def extract_ja_conj_template(
 ):
     # extract templates use this Lua module
     # https://ja.wiktionary.org/wiki/モジュール:日本語活用表
-    expanded_node = wxr.wtp.parse(
-        wxr.wtp.node_to_wikitext(t_node), expand_all=True
-    )
+    expanded_node = expand_template_node(wxr, t_node)
     for link_node in expanded_node.find_child(NodeKind.LINK):
         clean_node(wxr, word_entry, link_node)
     for table_index, table_node in enumerate(
@@ -213,9 +211,7 @@ def extract_ja_auxiliary_verb_conj_template(
     wxr: WiktextractContext, word_entry: WordEntry, t_node: TemplateNode
 ):
     forms = []
-    expanded_node = wxr.wtp.parse(
-        wxr.wtp.node_to_wikitext(t_node), expand_all=True
-    )
+    expanded_node = expand_template_node(wxr, t_node)
     col_headers = []
     raw_tag = ""
     for table in expanded_node.find_child(NodeKind.TABLE):
@@ -247,9 +243,7 @@ def extract_classical_ja_conj_template(
     wxr: WiktextractContext, word_entry: WordEntry, t_node: TemplateNode
 ):
     forms = []
-    expanded_node = wxr.wtp.parse(
-        wxr.wtp.node_to_wikitext(t_node), expand_all=True
-    )
+    expanded_node = expand_template_node(wxr, t_node)
     col_headers = []
     stem = ""
     raw_tag = ""
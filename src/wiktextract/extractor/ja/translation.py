@@ -7,6 +7,7 @@ from wikitextprocessor.parser import (
     WikiNode,
 )
 
+from ...aux_pages import parse_aux_page
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from .models import Translation, WordEntry
@@ -256,10 +257,9 @@ def extract_trans_see_template(
         index = page_title.index("#")
         target_id = page_title[index + 1 :]
         page_title = page_title[:index]
-    page_body = wxr.wtp.get_page_body(page_title, 0)
-    if page_body is None:
+    root = parse_aux_page(wxr, page_title, 0)
+    if root is None:
         return
-    root = wxr.wtp.parse(page_body)
     target_node = find_subpage_section(wxr, root, "翻訳", target_id)
     if target_node is not None:
         extract_translation_section(
@@ -11,6 +11,7 @@ from wikitextprocessor.parser import (
     WikiNode,
 )
 
+from ...language_sections import plain_heading_text
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from .etymology import extract_etymology_section, extract_ja_kanjitab_template
@@ -168,6 +169,18 @@ def parse_language_section(
         extract_pos_section(wxr, page_data, base_data, level2_node, "")
 
 
+def language_section_code(level: int, title: str) -> str | None:
+    # Used by `language_sections.select_language_sections()`
+    if level < 2:
+        return ""
+    if level > 2:
+        return None
+    lang_name = plain_heading_text(title)
+    if lang_name is None:
+        return ""
+    return name_to_code(lang_name, "ko") or "unknown"
+
+
 def parse_page(
     wxr: WiktextractContext, page_title: str, page_text: str
 ) -> list[dict[str, Any]]:
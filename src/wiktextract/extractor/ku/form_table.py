@@ -3,7 +3,7 @@ from dataclasses import dataclass
 
 from wikitextprocessor import NodeKind, TemplateNode
 
-from ...page import clean_node
+from ...page import clean_node, expand_template_node
 from ...wxr_context import WiktextractContext
 from .models import Form, WordEntry
 from .tags import translate_raw_tags
@@ -14,9 +14,7 @@ def extract_ku_tewîn_nav_template(
     wxr: WiktextractContext, word_entry: WordEntry, t_node: TemplateNode
 ) -> None:
     # https://ku.wiktionary.org/wiki/Şablon:ku-tewîn-nav
-    expanded_node = wxr.wtp.parse(
-        wxr.wtp.node_to_wikitext(t_node), expand_all=True
-    )
+    expanded_node = expand_template_node(wxr, t_node)
     gender_tags = []
     gender_arg = clean_node(wxr, None, t_node.template_parameters.get(2, ""))
     if gender_arg == "mê":
@@ -73,9 +71,7 @@ def extract_ku_tewîn_lk_template(
     wxr: WiktextractContext, word_entry: WordEntry, t_node: TemplateNode
 ) -> None:
     # https://ku.wiktionary.org/wiki/Şablon:ku-tewîn-lk
-    expanded_node = wxr.wtp.parse(
-        wxr.wtp.node_to_wikitext(t_node), expand_all=True
-    )
+    expanded_node = expand_template_node(wxr, t_node)
     for table_node in expanded_node.find_child(NodeKind.TABLE):
         row_index = 0
         shared_tags = []
@@ -3,6 +3,7 @@ from itertools import count
 
 from wikitextprocessor.parser import LEVEL_KIND_FLAGS, NodeKind, TemplateNode
 
+from ...aux_pages import parse_aux_page
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from .models import Form, WordEntry
@@ -12,10 +13,9 @@ from .tags import translate_raw_tags
 def extract_tewandin_page(
     wxr: WiktextractContext, word_entry: WordEntry, title: str
 ) -> None:
-    page = wxr.wtp.get_page(title, 106)
-    if page is None or page.body is None:
+    root = parse_aux_page(wxr, title, 106)
+    if root is None:
         return
-    root = wxr.wtp.parse(page.body)
     for t_node in root.find_child(NodeKind.TEMPLATE):
         extract_tewandin_template(wxr, word_entry, t_node, title)
     for level_node in root.find_child(LEVEL_KIND_FLAGS):
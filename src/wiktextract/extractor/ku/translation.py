@@ -9,6 +9,7 @@ from wikitextprocessor.parser import (
     WikiNode,
 )
 
+from ...aux_pages import parse_aux_page
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from .models import Translation, WordEntry
@@ -197,10 +198,9 @@ def extract_w_template(
 def extract_translation_page(
     wxr: WiktextractContext, word_entry: WordEntry, page_title: str
 ) -> None:
-    page = wxr.wtp.get_page(page_title, 0)
-    if page is None or page.body is None:
+    root = parse_aux_page(wxr, page_title, 0)
+    if root is None:
         return
-    root = wxr.wtp.parse(page.body)
     target_node = find_subpage_section(wxr, root, "Werger")
     if target_node is not None:
         extract_translation_section(
@@ -228,10 +228,9 @@ def extract_trans_see_template(
     for page_title in page_titles:
         if "#" in page_title:
             page_title = page_title[: page_title.index("#")]
-        page = wxr.wtp.get_page(page_title)
-        if page is None:
+        root = parse_aux_page(wxr, page_title)
+        if root is None:
             return
-        root = wxr.wtp.parse(page.body)
         target_node = find_subpage_section(wxr, root, "Werger")
         if target_node is not None:
             extract_translation_section(
@@ -8,6 +8,7 @@ from wikitextprocessor.parser import (
     WikiNode,
 )
 
+from ...aux_pages import parse_aux_page
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from .models import Form, WordEntry
@@ -116,10 +117,9 @@ def extract_nlstam_template(
 def extract_vervoeging_page(
     wxr: WiktextractContext, word_entry: WordEntry
 ) -> None:
-    page = wxr.wtp.get_page(f"{wxr.wtp.title}/vervoeging", 0)
-    if page is None:
+    root = parse_aux_page(wxr, f"{wxr.wtp.title}/vervoeging", 0)
+    if root is None:
         return
-    root = wxr.wtp.parse(page.body)
     table_templates = [
         "-nlverb-",
         "-nlverb-reflex-",
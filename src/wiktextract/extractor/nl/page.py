@@ -8,6 +8,7 @@ from wikitextprocessor.parser import (
     NodeKind,
 )
 
+from ...language_sections import plain_heading_text
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from .descendant import extract_descendant_section
@@ -139,6 +140,18 @@ def parse_section(
     return etymology_data
 
 
+def language_section_code(level: int, title: str) -> str | None:
+    # Used by `language_sections.select_language_sections()`
+    if level < 2:
+        return ""
+    if level > 2:
+        return None
+    lang_name = plain_heading_text(title)
+    if lang_name is None:
+        return ""
+    return name_to_code(lang_name, "nl") or "unknown"
+
+
 def parse_page(
     wxr: WiktextractContext, page_title: str, page_text: str
 ) -> list[dict[str, Any]]:
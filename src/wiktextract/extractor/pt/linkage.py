@@ -8,6 +8,7 @@ from wikitextprocessor.parser import (
     WikiNode,
 )
 
+from ...aux_pages import parse_aux_page
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from .models import Form, Linkage, WordEntry
@@ -233,10 +234,9 @@ def extract_wikisaurus_page(
     sense_index: int,
     tags: list[str],
 ) -> None:
-    page = wxr.wtp.get_page(page_title, 0)
-    if page is None or page.body is None:
+    root = parse_aux_page(wxr, page_title, 0)
+    if root is None:
         return
-    root = wxr.wtp.parse(page.body)
     for level1_node in root.find_child(NodeKind.LEVEL1):
         lang_name = clean_node(wxr, None, level1_node.largs)
         if lang_name != word_entry.lang:
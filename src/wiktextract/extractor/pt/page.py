@@ -6,6 +6,7 @@ from wikitextprocessor.parser import (
     NodeKind,
 )
 
+from ...language_sections import heading_templates
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from .etymology import extract_etymology_section
@@ -161,6 +162,17 @@ def save_section_cats(
         page_data[-1].categories.extend(cats)
 
 
+def language_section_code(level: int, title: str) -> str | None:
+    # Used by `language_sections.select_language_sections()`
+    if level > 1:
+        return None
+    templates = heading_templates(title)
+    if len(templates) == 0:
+        return "unknown"
+    # `parse_page()` uses the last template
+    return templates[-1][0].strip("-") or "unknown"
+
+
 def parse_page(
     wxr: WiktextractContext, page_title: str, page_text: str
 ) -> list[dict[str, Any]]:
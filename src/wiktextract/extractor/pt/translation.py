@@ -2,6 +2,7 @@ import re
 
 from wikitextprocessor import LevelNode, NodeKind, TemplateNode, WikiNode
 
+from ...aux_pages import parse_aux_page
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from .models import Translation, WordEntry
@@ -255,7 +256,6 @@ def extract_xlatio_template(
 def extract_translation_subpage(
     wxr: WiktextractContext, word_entry: WordEntry, page_title: str
 ) -> None:
-    page = wxr.wtp.get_page(page_title, 0)
-    if page is not None and page.body is not None:
-        root = wxr.wtp.parse(page.body)
+    root = parse_aux_page(wxr, page_title, 0)
+    if root is not None:
         extract_translation_section(wxr, word_entry, root, "Tradução")
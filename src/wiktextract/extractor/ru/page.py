@@ -10,6 +10,7 @@ from wikitextprocessor.parser import (
 )
 
 from ...config import POSSubtitleData
+from ...language_sections import heading_templates
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from ...wxr_logging import logger
@@ -284,6 +285,16 @@ def parse_section(
     extract_section_end_templates(wxr, page_data[-1], level_node)
 
 
+def language_section_code(level: int, title: str) -> str | None:
+    # Used by `language_sections.select_language_sections()`
+    if level > 1:
+        return None
+    templates = heading_templates(title)
+    if len(templates) == 0:
+        return "unknown"
+    return templates[0][0].strip(" -") or "unknown"
+
+
 def parse_page(
     wxr: WiktextractContext, page_title: str, page_text: str
 ) -> list[dict[str, Any]]:
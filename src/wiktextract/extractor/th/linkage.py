@@ -8,6 +8,7 @@ from wikitextprocessor.parser import (
     WikiNode,
 )
 
+from ...aux_pages import parse_aux_page
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from .models import Linkage, WordEntry
@@ -148,10 +149,9 @@ def extract_thesaurus_page(
     page_title: str,
     sense: str,
 ) -> None:
-    page = wxr.wtp.get_page(page_title, 110)
-    if page is None or page.body is None:
+    root = parse_aux_page(wxr, page_title, 110)
+    if root is None:
         return
-    root = wxr.wtp.parse(page.body)
     for level2_node in root.find_child(NodeKind.LEVEL2):
         lang_name = clean_node(wxr, None, level2_node.largs).removeprefix(
             "ภาษา"
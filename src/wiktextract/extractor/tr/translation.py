@@ -7,6 +7,7 @@ from wikitextprocessor.parser import (
     WikiNode,
 )
 
+from ...aux_pages import parse_aux_page
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from .models import Translation, WordEntry
@@ -156,10 +157,9 @@ def extract_trans_see_template(
     for page_title in page_titles:
         if "#" in page_title:
             page_title = page_title[: page_title.index("#")]
-        page_body = wxr.wtp.get_page_body(page_title, 0)
-        if page_body is None:
+        root = parse_aux_page(wxr, page_title, 0)
+        if root is None:
             return
-        root = wxr.wtp.parse(page_body)
         target_node = find_subpage_section(wxr, root, "Çeviriler")
         if target_node is not None:
             extract_translation_section(
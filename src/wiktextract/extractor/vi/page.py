@@ -11,6 +11,7 @@ from wikitextprocessor.parser import (
     WikiNode,
 )
 
+from ...language_sections import plain_heading_text
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from .descendant import extract_descendant_section
@@ -79,6 +80,18 @@ def parse_section(
         parse_section(wxr, page_data, base_data, next_level)
 
 
+def language_section_code(level: int, title: str) -> str | None:
+    # Used by `language_sections.select_language_sections()`
+    if level < 2:
+        return ""
+    if level > 2:
+        return None
+    lang_name = plain_heading_text(title)
+    if lang_name is None:
+        return ""
+    return name_to_code(lang_name, "vi") or "unknown"
+
+
 def parse_page(
     wxr: WiktextractContext, page_title: str, page_text: str
 ) -> list[dict[str, Any]]:
@@ -9,6 +9,7 @@ from wikitextprocessor.parser import (
     WikiNode,
 )
 
+from ...aux_pages import parse_aux_page
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from .linkage import QUALIFIER_TEMPLATES, extract_qualifier_template
@@ -200,10 +201,9 @@ def extract_trans_see_template(
     for page_title in page_titles:
         if "#" in page_title:
             page_title = page_title[: page_title.index("#")]
-        page = wxr.wtp.get_page(page_title)
-        if page is None:
+        root = parse_aux_page(wxr, page_title, pre_expand=True)
+        if root is None:
             return
-        root = wxr.wtp.parse(page.body, pre_expand=True)
         target_node = find_subpage_section(wxr, root, TRANSLATION_SECTIONS)
         if target_node is not None:
             extract_translation_section(
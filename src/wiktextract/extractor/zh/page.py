@@ -11,6 +11,7 @@ from wikitextprocessor.parser import (
     WikiNode,
 )
 
+from ...language_sections import plain_heading_text
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from ...wxr_logging import logger
@@ -182,6 +183,18 @@ def process_pos_block(
                 page_data[-1].senses.append(Sense(tags=["no-gloss"]))
 
 
+def language_section_code(level: int, title: str) -> str | None:
+    # Used by `language_sections.select_language_sections()`
+    if level < 2:
+        return ""
+    if level > 2:
+        return None
+    lang_name = plain_heading_text(title)
+    if lang_name is None:
+        return ""
+    return name_to_code(lang_name, "zh") or "unknown"
+
+
 def parse_page(
     wxr: WiktextractContext, page_title: str, page_text: str
 ) -> list[dict[str, Any]]:
@@ -7,6 +7,7 @@ from wikitextprocessor.parser import (
     WikiNode,
 )
 
+from ...aux_pages import parse_aux_page
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from .models import Translation, WordEntry
@@ -177,10 +178,9 @@ def extract_trans_see_template(
     for page_title in page_titles:
         if "#" in page_title:
             page_title = page_title[: page_title.index("#")]
-        page = wxr.wtp.get_page(page_title)
-        if page is None:
+        root = parse_aux_page(wxr, page_title)
+        if root is None:
             return
-        root = wxr.wtp.parse(page.body)
         target_node = find_subpage_section(wxr, root, TRANSLATIONS_TITLES)
         if target_node is not None:
             extract_translation_section(
@@ -207,10 +207,9 @@ def extract_see_trans_subpage_template(
     else:
         subpage_title = f"{wxr.wtp.title}/翻譯"
 
-    page = wxr.wtp.get_page(subpage_title)
-    if page is None:
+    root = parse_aux_page(wxr, subpage_title)
+    if root is None:
         return
-    root = wxr.wtp.parse(page.body)
     target_section = find_subpage_section(wxr, root, target_pos)
     if target_section is not None:
         new_target_section = find_subpage_section(
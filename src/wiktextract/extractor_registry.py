@@ -0,0 +1,68 @@
+# The functions and data of the extractor of each Wiktionary edition,
+# resolved once per process.
+#
+# `import_extractor_module()` looks up the module spec and imports the
+# module on every call, which is too slow for functions that are called for
+# every expanded template, like `is_panel_template()`.
+
+from collections.abc import Callable
+
+from .import_utils import import_extractor_module
+
+
+class EditionExtractor:
+    """The extractor functions of one edition, None if the edition doesn't
+    have them."""
+
+    __slots__ = (
+        "lang_code",
+        "parse_page",
+        "language_section_code",
+        "extract_thesaurus_page",
+        "analyze_template",
+        "panel_templates",
+        "panel_prefixes",
+    )
+
+    def __init__(self, lang_code: str):
+        self.lang_code = lang_code
+        page_mod = import_extractor_module(lang_code, "page")
+        self.parse_page: Callable | None = getattr(page_mod, "parse_page", None)
+        self.language_section_code: Callable[[int, str], str | None] | None = (
+            getattr(page_mod, "language_section_code", None)
+        )
+        self.panel_templates: frozenset[str] = frozenset(
+            getattr(page_mod, "PANEL_TEMPLATES", ())
+        )
+        # `str.startswith()` takes a tuple
+        self.panel_prefixes: tuple[str, ...] = tuple(
+            getattr(page_mod, "PANEL_PREFIXES", ())
+        )
+        thesaurus_mod = import_extractor_module(lang_code, "thesaurus")
+        self.extract_thesaurus_page: Callable | None = getattr(
+            thesaurus_mod, "extract_thesaurus_page", None
+        )
+        analyze_template_mod = import_extractor_module(
+            lang_code, "analyze_template"
+        )
+        self.analyze_template: Callable | None = getattr(
+            analyze_template_mod, "analyze_template", None
+        )
+
+    def is_panel_template(self, template_name: str) -> bool:
+        return template_name in self.panel_templates or (
+            len(self.panel_prefixes) > 0
+            and template_name.startswith(self.panel_prefixes)
+        )
+
+
+# Edition code -> extractor
+edition_extractors: dict[str, EditionExtractor] = {}
+
+
+def edition_extractor(lang_code: str) -> EditionExtractor:
+    extractor = edition_extractors.get(lang_code)
+    if extractor is None:
+        extractor = EditionExtractor(lang_code)
+        edition_extractors[lang_code] = extractor
+    return extractor
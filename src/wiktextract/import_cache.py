@@ -0,0 +1,86 @@
+# Cache of data that extractor modules derive from large sources when they
+# are imported.
+#
+# Every worker process imports the extractor of the edition again, so data
+# that takes long to build at import time is built once and saved as a
+# pickle file.  The file name has a hash of the source files the data is
+# built from and of the versions of the packages that read its data, a
+# changed source file or package builds a new snapshot and removes the old
+# one.  Snapshots are saved in $WIKTEXTRACT_CACHE_DIR, by default in
+# $XDG_CACHE_HOME/wiktextract or ~/.cache/wiktextract.
+
+import hashlib
+import os
+import pickle
+import tempfile
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import TypeVar
+
+from .wxr_logging import logger
+
+# Changing this invalidates all snapshots
+SNAPSHOT_VERSION = 1
+
+T = TypeVar("T")
+
+
+def import_cache_dir() -> Path:
+    cache_dir = os.environ.get("WIKTEXTRACT_CACHE_DIR")
+    if cache_dir:
+        return Path(cache_dir)
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME")
+    if xdg_cache_home:
+        return Path(xdg_cache_home) / "wiktextract"
+    return Path.home() / ".cache" / "wiktextract"
+
+
+def snapshot_key(source_files: Iterable[Path], versions: Iterable[str]) -> str:
+    h = hashlib.blake2b(
+        f"{SNAPSHOT_VERSION}:{pickle.HIGHEST_PROTOCOL}".encode(),
+        digest_size=16,
+    )
+    for path in source_files:
+        h.update(path.read_bytes())
+    for version in versions:
+        h.update(f"\0{version}".encode())
+    return h.hexdigest()
+
+
+def cached_import_data(
+    name: str,
+    source_files: Iterable[Path],
+    build: Callable[[], T],
+    versions: Iterable[str] = (),
+) -> T:
+    """Returns the data saved in the snapshot `name` if it was built from
+    the current `source_files` and `versions`, otherwise calls `build()`
+    and saves its return value in a new snapshot.  `versions` names the
+    versions of the packages and data files that `build()` reads."""
+    cache_dir = import_cache_dir()
+    key = snapshot_key(source_files, versions)
+    path = cache_dir / f"{name}-{key}.pickle"
+    try:
+        with path.open("rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        pass
+    except (OSError, EOFError, pickle.UnpicklingError) as e:
+        logger.warning(f"Can't load import cache file {path}: {e}")
+
+    data = build()
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # Processes that build the same snapshot at the same time each
+        # write their own temporary file
+        with tempfile.NamedTemporaryFile(
+            dir=cache_dir, prefix=f"{name}-", suffix=".tmp", delete=False
+        ) as f:
+            pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(f.name, path)
+        for old_path in cache_dir.glob(f"{name}-*.pickle"):
+            if old_path != path:
+                old_path.unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning(f"Can't save import cache file {path}: {e}")
+    return data
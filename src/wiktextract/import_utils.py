@@ -1,6 +1,8 @@
 import importlib
 import importlib.util
 import types
+from multiprocessing import get_all_start_methods, get_context
+from multiprocessing.context import BaseContext
 
 
 def import_extractor_module(
@@ -14,3 +16,22 @@ def import_extractor_module(
         print(f"ModuleNotFoundError: {e}")
         return None
     return None
+
+
+def worker_mp_context(lang_code: str) -> BaseContext:
+    """Returns the multiprocessing context of the worker process pools.
+    The forkserver process imports the extractor of the edition before it
+    forks the workers, so the workers don't import it again and share the
+    memory of its modules and tables copy-on-write.  The modules must be
+    set before the forkserver is started by the first pool."""
+    if "forkserver" not in get_all_start_methods():
+        return get_context("spawn")
+    mp_context = get_context("forkserver")
+    mp_context.set_forkserver_preload(
+        [
+            "wiktextract.wiktionary",
+            f"wiktextract.extractor.{lang_code}.page",
+            f"wiktextract.extractor.{lang_code}.thesaurus",
+        ]
+    )
+    return mp_context
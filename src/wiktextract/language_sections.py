@@ -0,0 +1,235 @@
+# Removes the sections of languages that are not extracted from the page
+# text before it is parsed.
+#
+# Most pages are mostly made of sections of languages other than the ones
+# given in `capture_language_codes`, and parsing and pre-expanding them is
+# the largest cost of extracting the page even though the extractors skip
+# them afterwards.  The page text is split at the language section headings
+# and only the text before the first language heading and the sections of
+# captured languages are kept.  When only some languages are captured, the
+# second phase also saves the languages of each page in the page database
+# the first time it runs after the pages were saved, and doesn't extract
+# pages that have no sections of the captured languages at all.
+#
+# An extractor opts in by defining `language_section_code(level, title)` in
+# its `page` module.  It gets the level and the unparsed text of a heading
+# and returns the language code of the section the heading starts, ""
+# if the language can't be determined without parsing (the section is
+# kept) or None if the heading doesn't start a language section.  It must
+# give the same codes as the extractor's `parse_page()`, which still checks
+# the language of every section it parses.
+
+import re
+import sqlite3
+import time
+from bisect import bisect_right
+from collections.abc import Callable, Iterator
+
+from .extractor_registry import edition_extractor
+from .wxr_context import WiktextractContext
+from .wxr_logging import logger
+
+# The heading pattern of `fix_subtitle_hierarchy()` in the English
+# extractor, also allowing comments after the heading like MediaWiki
+HEADING_RE = re.compile(
+    r"(?m)^(=+)[ \t]*([^= \t](?:[^=\n]|=[^=])*?)[ \t]*(=+)"
+    r"[ \t]*(?:<!--(?s:.*?)-->[ \t]*)*$"
+)
+# Headings in these are not headings
+PROTECTED_RE = re.compile(
+    r"(?si)<!--.*?(?:-->|$)"
+    r"|<(nowiki|pre|math|syntaxhighlight|source)\b[^>]*?(?<!/)>.*?"
+    r"(?:</\1\s*>|$)"
+)
+TEMPLATE_RE = re.compile(r"\{\{\s*([^{}|]+?)\s*(?:\|\s*([^{}|]*?)\s*)?[|}]")
+MARKUP_CHARS_RE = re.compile(r"[{}\[\]<>&']")
+
+
+def language_headings(
+    text: str, language_section_code: Callable[[int, str], str | None]
+) -> Iterator[tuple[int, str]]:
+    """Yields the position and the language code of the headings that start
+    a language section."""
+    if "=" not in text:
+        return
+    protected_starts = []
+    protected_ends = []
+    if "<" in text:
+        for m in PROTECTED_RE.finditer(text):
+            protected_starts.append(m.start())
+            protected_ends.append(m.end())
+    for m in HEADING_RE.finditer(text):
+        index = bisect_right(protected_starts, m.start()) - 1
+        if index >= 0 and m.start() < protected_ends[index]:
+            continue
+        lang_code = language_section_code(
+            min(len(m.group(1)), len(m.group(3))), m.group(2)
+        )
+        if lang_code is not None:
+            yield m.start(), lang_code
+
+
+def select_language_sections(
+    wxr: WiktextractContext,
+    text: str,
+    language_section_code: Callable[[int, str], str | None],
+) -> str:
+    """Returns `text` without the sections of languages that are not
+    captured."""
+    capture_language_codes = wxr.config.capture_language_codes
+    if not capture_language_codes:
+        return text
+    parts = []
+    keep = True
+    dropped = False
+    section_start = 0
+    for heading_start, lang_code in language_headings(
+        text, language_section_code
+    ):
+        if keep:
+            parts.append(text[section_start:heading_start])
+        else:
+            dropped = True
+        keep = lang_code == "" or lang_code in capture_language_codes
+        section_start = heading_start
+    if not keep:
+        dropped = True
+    if not dropped:
+        return text
+    if keep:
+        parts.append(text[section_start:])
+    return "".join(parts)
+
+
+def init_page_languages_table(db_conn: sqlite3.Connection) -> None:
+    db_conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS wiktextract_page_languages (
+        title TEXT,
+        namespace_id INTEGER,
+        lang_code TEXT,
+        PRIMARY KEY(title, namespace_id, lang_code)
+        );
+        CREATE INDEX IF NOT EXISTS wiktextract_page_languages_lang_code
+        ON wiktextract_page_languages(lang_code);
+        """
+    )
+
+
+def index_page_languages(
+    wxr: WiktextractContext, namespace_ids: list[int]
+) -> None:
+    """Saves the languages of the sections of each page, "" for pages with
+    sections whose language can't be determined without parsing or with no
+    language sections.  Redirect pages are not indexed.  See
+    `page_language_filter_sql()`."""
+    language_section_code = edition_extractor(
+        wxr.wtp.lang_code
+    ).language_section_code
+    db_conn = wxr.wtp.db_conn
+    init_page_languages_table(db_conn)
+    db_conn.execute("DELETE FROM wiktextract_page_languages")
+    if language_section_code is None:
+        db_conn.commit()
+        return
+    start_t = time.time()
+    rows = []
+    num_pages = 0
+    for title, ns_id, body in db_conn.execute(
+        "SELECT title, namespace_id, body FROM pages "
+        f"WHERE namespace_id IN ({', '.join('?' * len(namespace_ids))}) "
+        "AND model = 'wikitext' AND redirect_to IS NULL",
+        namespace_ids,
+    ):
+        num_pages += 1
+        lang_codes = {
+            lang_code
+            for _, lang_code in language_headings(body, language_section_code)
+        }
+        for lang_code in lang_codes or {""}:
+            rows.append((title, ns_id, lang_code))
+        if len(rows) >= 10000:
+            db_conn.executemany(
+                "INSERT OR IGNORE INTO wiktextract_page_languages "
+                "VALUES(?, ?, ?)",
+                rows,
+            )
+            rows = []
+    db_conn.executemany(
+        "INSERT OR IGNORE INTO wiktextract_page_languages VALUES(?, ?, ?)",
+        rows,
+    )
+    db_conn.commit()
+    logger.info(
+        f"Indexed the languages of {num_pages} pages "
+        f"(took {time.time() - start_t:.1f}s)"
+    )
+
+
+def index_page_languages_if_needed(
+    wxr: WiktextractContext, namespace_ids: list[int]
+) -> None:
+    """Saves the languages of the sections of each page if only some
+    languages are captured and they haven't been saved since the pages
+    were.  Reading every page takes a while, runs that capture all
+    languages don't use the index."""
+    if wxr.config.capture_language_codes and not page_languages_indexed(
+        wxr.wtp.db_conn
+    ):
+        index_page_languages(wxr, namespace_ids)
+
+
+def page_languages_indexed(db_conn: sqlite3.Connection) -> bool:
+    init_page_languages_table(db_conn)
+    return (
+        db_conn.execute(
+            "SELECT 1 FROM wiktextract_page_languages LIMIT 1"
+        ).fetchone()
+        is not None
+    )
+
+
+def clear_page_languages(db_conn: sqlite3.Connection) -> None:
+    """Removes the page language index, e.g. after page texts have been
+    changed.  All pages are extracted when there's no index."""
+    init_page_languages_table(db_conn)
+    db_conn.execute("DELETE FROM wiktextract_page_languages")
+    db_conn.commit()
+
+
+def page_language_filter_sql(
+    wxr: WiktextractContext,
+) -> tuple[str, list] | None:
+    """Returns an SQL condition on the `pages` table that is false for the
+    pages that have no sections of the captured languages, None if all pages
+    must be extracted.  Pages that are not in the language index are always
+    extracted."""
+    capture_language_codes = wxr.config.capture_language_codes
+    if not capture_language_codes:
+        return None
+    if not page_languages_indexed(wxr.wtp.db_conn):
+        return None
+    lang_codes = sorted(set(capture_language_codes) | {""})
+    return (
+        "(NOT EXISTS (SELECT 1 FROM wiktextract_page_languages AS l "
+        "WHERE l.title = pages.title AND l.namespace_id = pages.namespace_id) "
+        "OR EXISTS (SELECT 1 FROM wiktextract_page_languages AS l "
+        "WHERE l.title = pages.title AND l.namespace_id = pages.namespace_id "
+        f"AND l.lang_code IN ({', '.join('?' * len(lang_codes))})))",
+        lang_codes,
+    )
+
+
+def heading_templates(title: str) -> list[tuple[str, str]]:
+    """Returns the names and the first arguments of the templates in a
+    heading.  The argument is "" if the template has no arguments or the
+    argument has markup."""
+    return [(m.group(1), m.group(2) or "") for m in TEMPLATE_RE.finditer(title)]
+
+
+def plain_heading_text(title: str) -> str | None:
+    """Returns the text of a heading, None if it has markup that must be
+    parsed."""
+    if MARKUP_CHARS_RE.search(title) is not None:
+        return None
+    return title
@@ -9,7 +9,6 @@ from typing import Any, Callable, Optional, Sequence, Union
 
 from mediawiki_langcodes import name_to_code
 from wikitextprocessor.core import (
-    NamespaceDataEntry,
     PostTemplateFnCallable,
     TemplateArgs,
     TemplateFnCallable,
@@ -17,9 +16,11 @@ from wikitextprocessor.core import (
 from wikitextprocessor.node_expand import NodeHandlerFnCallable
 from wikitextprocessor.parser import GeneralNode, NodeKind, WikiNode
 
-from .clean import clean_value
+from . import perf
+from .clean import WHITESPACE_RE, clean_value
 from .datautils import data_append, data_extend
-from .import_utils import import_extractor_module
+from .extractor_registry import edition_extractor
+from .language_sections import select_language_sections
 from .wxr_context import WiktextractContext
 
 # NodeKind values for subtitles
@@ -32,6 +33,14 @@ LEVEL_KINDS = {
 }
 
 
+# Wikitext link, the groups are:
+#        1   2               3       4  5
+LINK_RE = re.compile(
+    r"(?is)\[\[:?(\s*([^][|:]+):)?\s*([^]|]+)(\|([^]|]+))?\]\]"
+)
+NAMESPACE_PREFIX_RE = re.compile(r"([^:]+):.+")
+
+
 def parse_page(
     wxr: WiktextractContext, page_title: str, page_text: str
 ) -> list[dict[str, Any]]:
@@ -41,8 +50,13 @@ def parse_page(
     all available languages).  ``word`` is page title, and ``text`` is
     page text in Wikimedia format.  Other arguments indicate what is
     captured."""
-    page_extractor_mod = import_extractor_module(wxr.wtp.lang_code, "page")
-    page_data = page_extractor_mod.parse_page(wxr, page_title, page_text)
+    extractor = edition_extractor(wxr.wtp.lang_code)
+    if extractor.language_section_code is not None:
+        # Don't parse the sections of languages that are not captured
+        page_text = select_language_sections(
+            wxr, page_text, extractor.language_section_code
+        )
+    page_data = extractor.parse_page(wxr, page_title, page_text)  # type: ignore[misc]
     if wxr.config.extract_thesaurus_pages:
         inject_linkages(wxr, page_data)
     if wxr.config.dump_file_lang_code == "en":
@@ -55,17 +69,7 @@ def is_panel_template(wxr: WiktextractContext, template_name: str) -> bool:
     """Checks if `Template_name` is a known panel template name (i.e., one that
     produces an infobox in Wiktionary, but this also recognizes certain other
     templates that we do not wish to expand)."""
-    page_extractor_mod = import_extractor_module(wxr.wtp.lang_code, "page")
-    if (
-        hasattr(page_extractor_mod, "PANEL_TEMPLATES")
-        and template_name in page_extractor_mod.PANEL_TEMPLATES
-    ):
-        return True
-    if hasattr(
-        page_extractor_mod, "PANEL_PREFIXES"
-    ) and template_name.startswith(tuple(page_extractor_mod.PANEL_PREFIXES)):
-        return True
-    return False
+    return edition_extractor(wxr.wtp.lang_code).is_panel_template(template_name)
 
 
 def recursively_extract(
@@ -161,7 +165,7 @@ def recursively_extract(
 
 def inject_linkages(wxr: WiktextractContext, page_data: list[dict]) -> None:
     # Inject linkages from thesaurus entries
-    from .thesaurus import search_thesaurus
+    from .thesaurus import lookup_thesaurus
 
     local_thesaurus_ns = wxr.wtp.NAMESPACE_DATA.get("Thesaurus", {}).get("name")  # type: ignore[call-overload]
     for data in page_data:
@@ -170,33 +174,36 @@ def inject_linkages(wxr: WiktextractContext, page_data: list[dict]) -> None:
         word = data["word"]
         lang_code = data["lang_code"]
         pos = data["pos"]
-        for term in search_thesaurus(
-            wxr.thesaurus_db_conn,  # type:ignore[arg-type]
-            word,
-            lang_code,
-            pos,  # type: ignore[arg-type]
-        ):
-            for dt in data.get(term.linkage, ()):
-                if dt.get("word") == term.term and (
-                    not term.sense or dt.get("sense") == term.sense
+        for (
+            term,
+            linkage,
+            tags,
+            topics,
+            roman,
+            sense,
+            raw_tags,
+        ) in lookup_thesaurus(wxr, word, lang_code, pos):  # type: ignore[arg-type]
+            for dt in data.get(linkage, ()):
+                if dt.get("word") == term and (
+                    not sense or dt.get("sense") == sense
                 ):
                     break
             else:
                 dt = {
-                    "word": term.term,
+                    "word": term,
                     "source": f"{local_thesaurus_ns}:{word}",
                 }
-                if len(term.sense) > 0:
-                    dt["sense"] = term.sense
-                if len(term.tags) > 0:
-                    dt["tags"] = term.tags
-                if len(term.raw_tags) > 0:
-                    dt["raw_tags"] = term.raw_tags
-                if len(term.topics) > 0:
-                    dt["topics"] = term.topics
-                if len(term.roman) > 0:
-                    dt["roman"] = term.roman
-                data_append(data, term.linkage, dt)
+                if len(sense) > 0:
+                    dt["sense"] = sense
+                if len(tags) > 0:
+                    dt["tags"] = tags
+                if len(raw_tags) > 0:
+                    dt["raw_tags"] = raw_tags
+                if len(topics) > 0:
+                    dt["topics"] = topics
+                if len(roman) > 0:
+                    dt["roman"] = roman
+                data_append(data, linkage, dt)
 
 
 def process_categories(
@@ -322,6 +329,19 @@ def remove_duplicate_data(page_data: dict) -> None:
                 del s["raw_glosses"]
 
 
+def expand_template_node(wxr: WiktextractContext, node: WikiNode) -> WikiNode:
+    """Returns the parse tree of the expanded template call `node`.
+    Identical template calls are expanded once per page, the tree is
+    shared and must not be modified."""
+    cache = wxr.expanded_templates
+    key = (wxr.wtp.title, wxr.wtp.node_to_wikitext(node))
+    tree = cache.trees.get(key)
+    if tree is None:
+        tree = wxr.wtp.parse(key[1], expand_all=True)
+        cache.trees[key] = tree
+    return tree
+
+
 def clean_node(
     wxr: WiktextractContext,
     sense_data: Optional[Any],
@@ -369,6 +389,15 @@ def clean_node(
         clean_node_handler_fn = clean_node_handler_fn_default
 
     # print("clean_node: value={!r}".format(value))
+    if wxr.template_cache is not None:
+        template_fn, post_template_fn = wxr.template_cache.template_hooks(
+            wxr.wtp.title, template_fn, post_template_fn
+        )
+    if perf.current_timer is not None:
+        # Time the expansion of each template for `wiktwords --perf-report`
+        template_fn, post_template_fn = perf.current_timer.template_hooks(
+            template_fn, post_template_fn
+        )
     v = wxr.wtp.node_to_html(
         wikinode,
         node_handler_fn=clean_node_handler_fn,
@@ -382,15 +411,7 @@ def clean_node(
     # Capture categories if sense_data has been given.  We also track
     # Lua execution errors here.
     # If collect_links=True (for glosses), capture links
-    category_ns_data: NamespaceDataEntry = wxr.wtp.NAMESPACE_DATA.get(
-        "Category",
-        {},  # type: ignore[typeddict-item]
-    )
-    category_ns_names: set[str] = {category_ns_data.get("name")} | set(
-        category_ns_data.get("aliases")  # type:ignore[assignment,arg-type]
-    )
-    category_ns_names |= {"Category", "category"}
-    category_names_pattern = rf"(?:{'|'.join(category_ns_names)})"
+    namespace_patterns = wxr.namespace_patterns
     if sense_data is not None:
         # Check for Lua execution error
         if '<strong class="error">Lua execution error' in v:
@@ -399,12 +420,9 @@ def clean_node(
             data_append(sense_data, "tags", "error-lua-timeout")
         # Capture Category tags
         if not collect_links:
-            for m in re.finditer(
-                rf"(?is)\[\[:?\s*{category_names_pattern}\s*:([^]|]+)",
-                v,
-            ):
+            for m in namespace_patterns.category_tag_re.finditer(v):
                 cat = clean_value(wxr, m.group(1))
-                cat = re.sub(r"\s+", " ", cat)
+                cat = WHITESPACE_RE.sub(" ", cat)
                 cat = cat.strip()
                 if not cat:
                     continue
@@ -414,7 +432,7 @@ def clean_node(
             links, categories = extract_links_from_node(
                 wxr,
                 v,
-                category_ns_names=category_ns_names,
+                category_ns_names=namespace_patterns.category_ns_names,
                 remove_anchor_tags=remove_anchors_from_links,
             )
             for cat in categories:
@@ -433,14 +451,11 @@ def clean_node(
     # to clean up erroneous codings in the original text.
     # v = re.sub(r"(?s)\{\{.*", "", v)
     # Some templates create <sup>(Category: ...)</sup>; remove
-    v = re.sub(
-        rf"(?si)\s*(?:<sup>)?\({category_names_pattern}:[^)]+\)(?:</sup>)?",
-        "",
-        v,
-    )
+    if "(" in v:
+        v = namespace_patterns.category_sup_re.sub("", v)
     # Some templates create question mark in <sup>, e.g.,
     # some Korean Hanja form
-    v = re.sub(r"\^\?", "", v)
+    v = v.replace("^?", "")
     return v
 
 
@@ -481,18 +496,14 @@ def extract_links_from_node(
     for node in nodes:
         # print(f"{node=}")
         if isinstance(node, str) and node.strip():
-            for m in re.finditer(
-                r"(?is)\[\[:?(\s*([^][|:]+):)?\s*([^]|]+)(\|([^]|]+))?\]\]",
-                #            1   2               3       4  5
-                node,
-            ):
+            for m in LINK_RE.finditer(node):
                 if (
                     m.group(2)
                     and category_ns_names is not None
                     and m.group(2).strip() in category_ns_names
                 ):
                     cat = clean_value(wxr, m.group(3))
-                    cat = re.sub(r"\s+", " ", cat).strip()
+                    cat = WHITESPACE_RE.sub(" ", cat).strip()
                     if not cat:
                         continue
                     cat_ret.add(cat)
@@ -506,8 +517,8 @@ def extract_links_from_node(
                         txt = clean_value(wxr, m.group(3))
                         ltext = txt
                         ltarget = txt
-                    ltarget = re.sub(r"\s+", " ", ltarget).strip()
-                    ltext = re.sub(r"\s+", " ", ltext).strip()
+                    ltarget = WHITESPACE_RE.sub(" ", ltarget).strip()
+                    ltext = WHITESPACE_RE.sub(" ", ltext).strip()
                     if not ltext and not ltarget:
                         continue
                     if not ltext and ltarget:
@@ -529,7 +540,7 @@ def extract_links_from_node(
             if ltext.strip() or not ltarget.strip():
                 new_ret.append((ltext, ltarget))
                 continue
-            m2 = re.match(r"([^:]+):.+", ltarget)
+            m2 = NAMESPACE_PREFIX_RE.match(ltarget)
             if m2 is not None and m2.group(1).strip() in category_ns_names:
                 cat_ret.add(ltarget[ltarget.index(":") + 1 :])
             else:
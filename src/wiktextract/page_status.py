@@ -0,0 +1,274 @@
+# Diagnostics of pages that hang or take very long to extract.
+#
+# Every worker process owns one fixed-size slot in a memory-mapped status
+# file and records the title and start time of the page it is extracting
+# there.  Recording a page is a few memory writes, there are no system
+# calls per page.  A watchdog thread in the parent process reads the slots,
+# warns about pages that have been running for a long time and, if a page
+# timeout has been given, asks the worker to abandon the page.  The worker
+# only abandons a page while it is in `cancellable()`, i.e., while the page
+# is being extracted, and the page's state in the worker is dropped
+# afterwards.
+#
+# The worker is the only writer of its slot, except for the cancel field
+# that the watchdog sets.  Readers use the sequence number of the slot to
+# detect a concurrent write: it is odd while the worker is writing.
+
+import mmap
+import os
+import signal
+import struct
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from multiprocessing.context import BaseContext
+from pathlib import Path
+from typing import Any
+
+from .wxr_logging import logger
+
+# sequence number, process id, start time (0 when idle), cancel time,
+# length of the UTF-8 encoded title
+SLOT_HEADER = struct.Struct("<QIddH")
+SLOT_SIZE = 512
+MAX_TITLE_BYTES = SLOT_SIZE - SLOT_HEADER.size
+CANCEL_OFFSET = struct.calcsize("<QId")
+CANCEL_FORMAT = struct.Struct("<d")
+
+# Pages running longer than this are reported by the watchdog
+HANG_WARNING_SECONDS = 300.0
+# How often the watchdog reads the slots
+WATCHDOG_INTERVAL = 10.0
+# Signal sent to a worker to abandon a page that exceeded the page timeout
+CANCEL_SIGNAL = getattr(signal, "SIGUSR1", None)
+
+
+class PageTimeoutError(BaseException):
+    """Raised in a worker process to abandon a page.  Not derived from
+    `Exception`, the `except Exception` handlers of the extractors and
+    wikitextprocessor must not catch it."""
+
+
+class StatusSlot:
+    """The status slot of a worker process."""
+
+    __slots__ = ("mm", "offset", "seq", "pid", "start")
+
+    def __init__(self, mm: mmap.mmap, offset: int, pid: int):
+        self.mm = mm
+        self.offset = offset
+        self.seq = 0
+        self.pid = pid
+        self.start = 0.0
+        self.write(b"")
+
+    def write(self, title: bytes) -> None:
+        self.seq += 1
+        SLOT_HEADER.pack_into(
+            self.mm,
+            self.offset,
+            self.seq,
+            self.pid,
+            self.start,
+            0.0,
+            len(title),
+        )
+        end = self.offset + SLOT_HEADER.size
+        self.mm[end : end + len(title)] = title
+        self.seq += 1
+        self.mm[self.offset : self.offset + 8] = self.seq.to_bytes(8, "little")
+
+    def cancel_requested(self) -> bool:
+        (cancel,) = CANCEL_FORMAT.unpack_from(
+            self.mm, self.offset + CANCEL_OFFSET
+        )
+        return self.start != 0.0 and cancel == self.start
+
+
+# Status slot of this worker process
+worker_slot: StatusSlot | None = None
+# The page can be abandoned, see `cancellable()`
+cancel_armed = False
+
+
+def init_worker_slot(status_path: Path, lock: Any, num_slots: int) -> None:
+    """Claims a free slot for this worker process.  Slots of processes that
+    no longer exist are reused."""
+    global worker_slot
+    f = status_path.open("r+b")
+    mm = mmap.mmap(f.fileno(), num_slots * SLOT_SIZE)
+    f.close()
+    pid = os.getpid()
+    with lock:
+        for slot_num in range(num_slots):
+            offset = slot_num * SLOT_SIZE
+            _, slot_pid, *_ = SLOT_HEADER.unpack_from(mm, offset)
+            if slot_pid == 0 or not process_exists(slot_pid):
+                worker_slot = StatusSlot(mm, offset, pid)
+                break
+        else:
+            logger.warning(f"No free page status slot for process {pid}")
+            return
+    if CANCEL_SIGNAL is not None:
+        signal.signal(CANCEL_SIGNAL, cancel_handler)
+
+
+def cancel_handler(signum: int, frame: Any) -> None:
+    if (
+        cancel_armed
+        and worker_slot is not None
+        and worker_slot.cancel_requested()
+    ):
+        raise PageTimeoutError("page timeout")
+
+
+@contextmanager
+def cancellable() -> Iterator[None]:
+    """`PageTimeoutError` may be raised in the `with` block if the page
+    exceeds the page timeout, and nowhere else."""
+    global cancel_armed
+    cancel_armed = True
+    try:
+        yield
+    finally:
+        cancel_armed = False
+
+
+def page_started(title: str) -> None:
+    if worker_slot is not None:
+        worker_slot.start = time.time()
+        worker_slot.write(
+            title.encode("utf-8")[:MAX_TITLE_BYTES]
+            .decode("utf-8", "ignore")
+            .encode("utf-8")
+        )
+
+
+def page_finished() -> None:
+    if worker_slot is not None:
+        worker_slot.start = 0.0
+        worker_slot.write(b"")
+
+
+def process_exists(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class PageStatusBoard:
+    """Parent process side: creates the status file and runs the watchdog
+    thread.  `worker_args()` are passed to `init_worker_slot()` in the
+    worker initializer."""
+
+    __slots__ = (
+        "path",
+        "lock",
+        "num_slots",
+        "mm",
+        "page_timeout",
+        "stop_event",
+        "thread",
+        "reported",
+    )
+
+    def __init__(
+        self,
+        mp_context: BaseContext,
+        num_slots: int,
+        page_timeout: float | None = None,
+    ):
+        shm_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+        fd, path = tempfile.mkstemp(prefix="wiktextract-status-", dir=shm_dir)
+        os.ftruncate(fd, num_slots * SLOT_SIZE)
+        self.mm = mmap.mmap(fd, num_slots * SLOT_SIZE)
+        os.close(fd)
+        self.path = Path(path)
+        self.lock = mp_context.Lock()
+        self.num_slots = num_slots
+        self.page_timeout = page_timeout
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(
+            target=self.watch, name="page-watchdog", daemon=True
+        )
+        # (pid, start time) of the pages already reported
+        self.reported: set[tuple[int, float]] = set()
+        self.thread.start()
+
+    def worker_args(self) -> tuple[Path, Any, int]:
+        return self.path, self.lock, self.num_slots
+
+    def read_slot(self, offset: int) -> tuple[int, float, float, str] | None:
+        for _ in range(100):
+            seq, pid, start, cancel, title_len = SLOT_HEADER.unpack_from(
+                self.mm, offset
+            )
+            if seq % 2 == 1:
+                continue
+            title_start = offset + SLOT_HEADER.size
+            title = self.mm[title_start : title_start + title_len]
+            if int.from_bytes(self.mm[offset : offset + 8], "little") == seq:
+                return pid, start, cancel, title.decode("utf-8", "replace")
+        return None
+
+    def running_pages(self) -> list[tuple[int, float, str]]:
+        """Returns the (pid, start time, title) of the pages being
+        extracted."""
+        pages = []
+        for slot_num in range(self.num_slots):
+            slot = self.read_slot(slot_num * SLOT_SIZE)
+            if slot is not None and slot[0] != 0 and slot[1] != 0.0:
+                pages.append((slot[0], slot[1], slot[3]))
+        return pages
+
+    def watch(self) -> None:
+        while not self.stop_event.wait(WATCHDOG_INTERVAL):
+            self.check()
+
+    def check(self) -> None:
+        now = time.time()
+        for slot_num in range(self.num_slots):
+            offset = slot_num * SLOT_SIZE
+            slot = self.read_slot(offset)
+            if slot is None:
+                continue
+            pid, start, cancel, title = slot
+            if pid == 0 or start == 0.0:
+                continue
+            elapsed = now - start
+            if (
+                self.page_timeout is not None
+                and elapsed > self.page_timeout
+                and cancel != start
+                and CANCEL_SIGNAL is not None
+            ):
+                logger.error(
+                    f"Page {title!r} exceeded the page timeout in process "
+                    f"{pid} ({elapsed:.0f}s), abandoning it"
+                )
+                CANCEL_FORMAT.pack_into(self.mm, offset + CANCEL_OFFSET, start)
+                try:
+                    os.kill(pid, CANCEL_SIGNAL)
+                except ProcessLookupError:
+                    pass
+            elif (
+                elapsed > HANG_WARNING_SECONDS
+                and (pid, start) not in self.reported
+            ):
+                self.reported.add((pid, start))
+                logger.warning(
+                    f"Page {title!r} has been extracted for {elapsed:.0f}s "
+                    f"in process {pid}"
+                )
+
+    def close(self) -> None:
+        self.stop_event.set()
+        self.thread.join()
+        self.mm.close()
+        self.path.unlink(missing_ok=True)
@@ -0,0 +1,416 @@
+# Per-page performance instrumentation for `wiktwords --perf-report`.
+#
+# The worker processes time every extracted page: wall and CPU time, the
+# growth of the peak RSS, and the time spent in each phase of extraction.
+# Phases are timed exclusively, time spent in a nested phase is not
+# counted in the enclosing phase.  The timing wrappers are installed on
+# `Wtp` and pydantic methods only when a report has been requested, and
+# they only record while a page timer is running.  The parent process
+# aggregates the page records into a JSON report and writes one CSV row
+# per page.
+#
+# `wiktwords --profile-workers` runs cProfile in every worker process
+# instead; the workers dump their stats when they exit and the parent
+# merges them into one pstats file.
+
+import cProfile
+import csv
+import heapq
+import json
+import os
+import pstats
+import re
+import resource
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from multiprocessing.util import Finalize
+from pathlib import Path
+from typing import Any, ContextManager
+
+from wikitextprocessor import Wtp
+
+from .wxr_logging import logger
+
+# Number of slowest pages listed in the report
+TOP_SLOW_PAGES = 100
+# Number of templates and sections with the largest total time listed in
+# the report
+TOP_ITEMS = 500
+
+PHASES = (
+    "extractor",
+    "parse",
+    "pre_expand",
+    "expand",
+    "model_dump",
+    "validation",
+    "serialize",
+)
+
+# Timer of the page being extracted in this process
+current_timer: "PageTimer | None" = None
+
+
+class PageTimer:
+    """Times one page.  `push()` and `pop()` enter and leave a phase, the
+    time of the page is counted in the innermost phase."""
+
+    __slots__ = (
+        "start",
+        "start_cpu",
+        "start_max_rss",
+        "last",
+        "stack",
+        "phases",
+        "section",
+        "section_start",
+        "sections",
+        "template_stack",
+        "templates",
+    )
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.start_cpu = time.process_time()
+        self.start_max_rss = max_rss_kb()
+        self.last = self.start
+        self.stack = ["extractor"]
+        self.phases: dict[str, float] = {}
+        self.section = ""
+        self.section_start = self.start
+        self.sections: dict[str, float] = {}
+        self.template_stack: list[tuple[str, float]] = []
+        # template name -> [inclusive seconds, calls]
+        self.templates: dict[str, list] = {}
+
+    def push(self, phase: str) -> None:
+        now = time.perf_counter()
+        top = self.stack[-1]
+        self.phases[top] = self.phases.get(top, 0.0) + now - self.last
+        self.last = now
+        self.stack.append(phase)
+
+    def pop(self) -> None:
+        now = time.perf_counter()
+        top = self.stack.pop()
+        self.phases[top] = self.phases.get(top, 0.0) + now - self.last
+        self.last = now
+
+    @contextmanager
+    def phase(self, phase: str) -> Iterator[None]:
+        self.push(phase)
+        try:
+            yield
+        finally:
+            self.pop()
+
+    def start_section(self, title: str) -> None:
+        now = time.perf_counter()
+        if self.section != "":
+            self.sections[self.section] = (
+                self.sections.get(self.section, 0.0) + now - self.section_start
+            )
+        # "Etymology 2" and "Etymology 1" are the same type of section
+        self.section = re.sub(r"\s*\d+$", "", title.strip())
+        self.section_start = now
+
+    def template_start(self, name: str) -> None:
+        self.template_stack.append((name, time.perf_counter()))
+
+    def template_end(self, name: str) -> None:
+        now = time.perf_counter()
+        while len(self.template_stack) > 0:
+            started_name, start = self.template_stack.pop()
+            if started_name == name:
+                stats = self.templates.setdefault(name.strip(), [0.0, 0])
+                stats[0] += now - start
+                stats[1] += 1
+                break
+
+    def template_hooks(
+        self,
+        template_fn: Callable[[str, Any], str | None] | None,
+        post_template_fn: Callable[[str, Any, str], str | None] | None,
+    ) -> tuple[Callable, Callable]:
+        """Wraps the template functions given to `Wtp` expansion functions
+        to time the expansion of each template."""
+
+        def timed_template_fn(name: str, ht: Any) -> str | None:
+            self.template_start(name)
+            if template_fn is not None:
+                return template_fn(name, ht)
+            return None
+
+        def timed_post_template_fn(name: str, ht: Any, text: str) -> str | None:
+            self.template_end(name)
+            if post_template_fn is not None:
+                return post_template_fn(name, ht, text)
+            return None
+
+        return timed_template_fn, timed_post_template_fn
+
+    def record(self, title: str, namespace_id: int) -> dict:
+        while len(self.stack) > 0:
+            self.pop()
+        self.start_section("")
+        return {
+            "title": title,
+            "namespace_id": namespace_id,
+            "wall": time.perf_counter() - self.start,
+            "cpu": time.process_time() - self.start_cpu,
+            "max_rss_kb": max_rss_kb(),
+            "rss_growth_kb": max_rss_kb() - self.start_max_rss,
+            "phases": self.phases,
+            "sections": self.sections,
+            "templates": self.templates,
+        }
+
+
+def max_rss_kb() -> int:
+    # Kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def memory_usage_kb() -> dict[str, int]:
+    """Resident memory of this process in kilobytes: "rss", "pss",
+    "private" and "shared".  Empty if /proc/self/smaps_rollup can't be
+    read (it is Linux only)."""
+    fields: dict[str, int] = {}
+    try:
+        with open("/proc/self/smaps_rollup", encoding="utf-8") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if value.endswith("kB\n"):
+                    fields[name] = int(value.split()[0])
+    except OSError:
+        return {}
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "private": fields.get("Private_Clean", 0)
+        + fields.get("Private_Dirty", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+    }
+
+
+def log_worker_memory(when: str) -> None:
+    usage = memory_usage_kb()
+    if len(usage) > 0:
+        logger.info(
+            f"Worker {os.getpid()} memory at {when}: "
+            f"RSS {usage['rss'] // 1024} MiB, "
+            f"private {usage['private'] // 1024} MiB, "
+            f"shared {usage['shared'] // 1024} MiB"
+        )
+
+
+def start_page_timer() -> PageTimer:
+    global current_timer
+    current_timer = PageTimer()
+    return current_timer
+
+
+def stop_page_timer() -> None:
+    global current_timer
+    current_timer = None
+
+
+def phase(name: str) -> ContextManager:
+    """Times the `with` block as phase `name` if a page is being timed."""
+    if current_timer is None:
+        return nullcontext()
+    return current_timer.phase(name)
+
+
+def timed_method(
+    cls: type, name: str, phase_fn: Callable[[PageTimer, tuple, dict], str]
+) -> None:
+    method = getattr(cls, name)
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        timer = current_timer
+        if timer is None:
+            return method(*args, **kwargs)
+        timer.push(phase_fn(timer, args, kwargs))
+        try:
+            return method(*args, **kwargs)
+        finally:
+            timer.pop()
+
+    setattr(cls, name, wrapper)
+
+
+def parse_phase(timer: PageTimer, args: tuple, kwargs: dict) -> str:
+    # Wtp.parse(self, text, pre_expand=False, ...)
+    pre_expand = kwargs.get("pre_expand", len(args) > 2 and args[2])
+    return "pre_expand" if pre_expand else "parse"
+
+
+def expand_phase(timer: PageTimer, args: tuple, kwargs: dict) -> str:
+    # Expansion done while pre-expanding a page is a part of pre-expanding
+    return "pre_expand" if timer.stack[-1] == "pre_expand" else "expand"
+
+
+def install_perf_hooks() -> None:
+    """Installs the timing wrappers, called once in each worker process."""
+    from pydantic import BaseModel
+
+    timed_method(Wtp, "parse", parse_phase)
+    timed_method(Wtp, "expand", expand_phase)
+    timed_method(BaseModel, "model_dump", lambda *_: "model_dump")
+    section_method(Wtp, "start_section")
+    section_method(Wtp, "start_subsection")
+
+
+def section_method(cls: type, name: str) -> None:
+    method = getattr(cls, name)
+
+    @wraps(method)
+    def wrapper(self, title, *args, **kwargs):
+        if current_timer is not None and isinstance(title, str):
+            current_timer.start_section(title)
+        return method(self, title, *args, **kwargs)
+
+    setattr(cls, name, wrapper)
+
+
+class PerfReport:
+    """Aggregates the page records of all workers in the parent process.
+    Writes one CSV row per page to `csv_path` as the records arrive and the
+    summary to `json_path` at the end."""
+
+    __slots__ = (
+        "json_path",
+        "csv_f",
+        "csv_writer",
+        "pages",
+        "totals",
+        "phases",
+        "sections",
+        "templates",
+        "slowest",
+    )
+
+    def __init__(self, json_path: Path, csv_path: Path):
+        self.json_path = json_path
+        self.csv_f = csv_path.open("w", encoding="utf-8", newline="")
+        self.csv_writer = csv.writer(self.csv_f)
+        self.csv_writer.writerow(
+            ["title", "namespace_id", "wall", "cpu", "max_rss_kb"]
+            + list(PHASES)
+        )
+        self.pages = 0
+        self.totals = {"wall": 0.0, "cpu": 0.0}
+        self.phases: dict[str, float] = {}
+        self.sections: dict[str, float] = {}
+        self.templates: dict[str, list] = {}
+        # min-heap of (wall, page number, record)
+        self.slowest: list[tuple[float, int, dict]] = []
+
+    def add(self, record: dict) -> None:
+        self.pages += 1
+        self.totals["wall"] += record["wall"]
+        self.totals["cpu"] += record["cpu"]
+        for name, secs in record["phases"].items():
+            self.phases[name] = self.phases.get(name, 0.0) + secs
+        for name, secs in record["sections"].items():
+            self.sections[name] = self.sections.get(name, 0.0) + secs
+        for name, (secs, calls) in record["templates"].items():
+            stats = self.templates.setdefault(name, [0.0, 0])
+            stats[0] += secs
+            stats[1] += calls
+        item = (record["wall"], self.pages, record)
+        if len(self.slowest) < TOP_SLOW_PAGES:
+            heapq.heappush(self.slowest, item)
+        elif item[0] > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, item)
+        self.csv_writer.writerow(
+            [
+                record["title"],
+                record["namespace_id"],
+                f"{record['wall']:.4f}",
+                f"{record['cpu']:.4f}",
+                record["max_rss_kb"],
+            ]
+            + [f"{record['phases'].get(name, 0.0):.4f}" for name in PHASES]
+        )
+
+    def close(self) -> None:
+        self.csv_f.close()
+        slowest = sorted(self.slowest, key=lambda item: -item[0])
+        report = {
+            "pages": self.pages,
+            "wall_seconds": self.totals["wall"],
+            "cpu_seconds": self.totals["cpu"],
+            "phases": dict(
+                sorted(self.phases.items(), key=lambda item: -item[1])
+            ),
+            "sections": dict(
+                sorted(self.sections.items(), key=lambda item: -item[1])[
+                    :TOP_ITEMS
+                ]
+            ),
+            "templates": [
+                {"name": name, "seconds": secs, "calls": calls}
+                for name, (secs, calls) in sorted(
+                    self.templates.items(), key=lambda item: -item[1][0]
+                )[:TOP_ITEMS]
+            ],
+            "slowest_pages": [
+                {
+                    key: record[key]
+                    for key in (
+                        "title",
+                        "namespace_id",
+                        "wall",
+                        "cpu",
+                        "max_rss_kb",
+                        "rss_growth_kb",
+                        "phases",
+                    )
+                }
+                for _, _, record in slowest
+            ],
+        }
+        with self.json_path.open("w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        logger.info(
+            f"Wrote performance report of {self.pages} pages to "
+            f"{self.json_path}"
+        )
+
+
+def start_worker_profiler(profile_dir: Path) -> None:
+    """Profiles the rest of the life of this worker process.  Worker
+    processes exit without running `atexit` functions, the stats are dumped
+    by a multiprocessing finalizer."""
+    profiler = cProfile.Profile()
+    # Recycled workers may get the pid of an earlier worker
+    profile_path = profile_dir / f"{os.getpid()}-{uuid.uuid4().hex}.prof"
+
+    def dump_stats() -> None:
+        profiler.disable()
+        profiler.dump_stats(profile_path)
+
+    Finalize(profiler, dump_stats, exitpriority=10)
+    profiler.enable()
+
+
+def merge_worker_profiles(profile_dir: Path, out_path: Path) -> None:
+    """Merges the stats dumped by the worker processes into `out_path`,
+    which can be read with `pstats` or e.g. snakeviz."""
+    profile_paths = sorted(profile_dir.glob("*.prof"))
+    if len(profile_paths) == 0:
+        logger.warning(f"No worker profiles found in {profile_dir}")
+        return
+    stats = pstats.Stats(*map(str, profile_paths))
+    stats.dump_stats(out_path)
+    logger.info(
+        f"Wrote merged profile of {len(profile_paths)} worker processes to "
+        f"{out_path}"
+    )
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(50)
@@ -0,0 +1,419 @@
+# Scheduling of the second phase pages to worker processes.
+#
+# Pages are sent to the workers in small batches and the results are
+# collected in the order they complete, with a bounded number of batches in
+# flight.  Pages that are known to be slow to extract (they were slow in an
+# earlier run) or that have a large body are sent first, one page per batch,
+# so that they don't hold back the end of the run.  The large pages are
+# found at the end of the first phase, finding them when the second phase
+# starts would delay the first batch.
+#
+# The auxiliary pages (translation subpages, conjugation pages etc.) that
+# each page used in the previous run are saved in the page database.  Pages
+# that use the same auxiliary page are put in the same batch, and the
+# auxiliary pages of a batch are sent with it; see `aux_pages.py`.
+
+import sqlite3
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from typing import Any
+
+from wikitextprocessor import Page
+
+from .wxr_context import WiktextractContext
+from .wxr_logging import logger
+
+# Number of pages sent to a worker at a time
+PAGE_BATCH_SIZE = 50
+# Number of batches waiting or running per worker process
+BATCHES_PER_WORKER = 4
+# Pages with a larger body are extracted first
+HEAVY_PAGE_CHARS = 64 * 1024
+# Maximum number of pages sent first because of their size
+HEAVY_PAGE_LIMIT = 20_000
+# Pages that took longer than this many seconds are remembered in the page
+# database and extracted first in the next run
+SLOW_PAGE_SECONDS = 5.0
+
+PAGE_COLUMNS = "title, namespace_id, redirect_to, need_pre_expand, body, model"
+
+
+def init_slow_pages_table(db_conn: sqlite3.Connection) -> None:
+    db_conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS wiktextract_slow_pages (
+        title TEXT,
+        namespace_id INTEGER,
+        seconds REAL,
+        PRIMARY KEY(title, namespace_id)
+        )
+        """
+    )
+
+
+def save_slow_pages(
+    db_conn: sqlite3.Connection, slow_pages: dict[tuple[str, int], float]
+) -> None:
+    """Replaces the saved slow pages with the ones found in this run."""
+    init_slow_pages_table(db_conn)
+    with db_conn:
+        db_conn.execute("DELETE FROM wiktextract_slow_pages")
+        db_conn.executemany(
+            "INSERT INTO wiktextract_slow_pages (title, namespace_id, seconds) "
+            "VALUES(?, ?, ?)",
+            (
+                (title, ns_id, secs)
+                for (title, ns_id), secs in slow_pages.items()
+            ),
+        )
+
+
+def init_heavy_pages_table(db_conn: sqlite3.Connection) -> None:
+    db_conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS wiktextract_heavy_pages (
+        title TEXT,
+        namespace_id INTEGER,
+        chars INTEGER,
+        PRIMARY KEY(title, namespace_id)
+        )
+        """
+    )
+
+
+def save_heavy_pages(
+    db_conn: sqlite3.Connection, namespace_ids: list[int]
+) -> None:
+    """Saves the pages whose body is larger than `HEAVY_PAGE_CHARS`.  Called
+    at the end of the first phase."""
+    init_heavy_pages_table(db_conn)
+    with db_conn:
+        db_conn.execute("DELETE FROM wiktextract_heavy_pages")
+        db_conn.execute(
+            "INSERT INTO wiktextract_heavy_pages (title, namespace_id, chars) "
+            "SELECT title, namespace_id, length(body) FROM pages "
+            f"WHERE namespace_id IN ({', '.join('?' * len(namespace_ids))}) "
+            "AND model = 'wikitext' AND length(body) > ?",
+            list(namespace_ids) + [HEAVY_PAGE_CHARS],
+        )
+
+
+def init_aux_pages_table(db_conn: sqlite3.Connection) -> None:
+    db_conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS wiktextract_aux_pages (
+        page_title TEXT,
+        page_ns INTEGER,
+        aux_title TEXT,
+        aux_ns INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS wiktextract_aux_pages_page
+        ON wiktextract_aux_pages (page_title, page_ns);
+        """
+    )
+
+
+def save_aux_pages(
+    db_conn: sqlite3.Connection,
+    aux_pages: dict[tuple[str, int], list[tuple[str, int]]],
+) -> None:
+    """Replaces the saved auxiliary pages of the given pages, the other
+    pages keep theirs.  The caller commits."""
+    db_conn.executemany(
+        "DELETE FROM wiktextract_aux_pages "
+        "WHERE page_title = ? AND page_ns = ?",
+        aux_pages.keys(),
+    )
+    db_conn.executemany(
+        "INSERT INTO wiktextract_aux_pages "
+        "(page_title, page_ns, aux_title, aux_ns) VALUES(?, ?, ?, ?)",
+        (
+            (title, ns_id, aux_title, aux_ns)
+            for (title, ns_id), keys in aux_pages.items()
+            for aux_title, aux_ns in keys
+        ),
+    )
+
+
+def page_filter_sql(
+    namespace_ids: list[int],
+    search_pattern: str | None,
+    language_filter: tuple[str, list] | None = None,
+) -> tuple[str, list]:
+    sql = (
+        f"namespace_id IN ({', '.join('?' * len(namespace_ids))}) "
+        "AND model = 'wikitext'"
+    )
+    values: list = list(namespace_ids)
+    if search_pattern is not None:
+        sql += " AND body LIKE ?"
+        values.append(search_pattern)
+    if language_filter is not None:
+        # See `language_sections.page_language_filter_sql()`
+        sql += f" AND {language_filter[0]}"
+        values.extend(language_filter[1])
+    return sql, values
+
+
+def heavy_page_keys(
+    db_conn: sqlite3.Connection,
+    namespace_ids: list[int],
+    search_pattern: str | None,
+    language_filter: tuple[str, list] | None = None,
+) -> list[tuple[str, int]]:
+    """Returns the pages that should be extracted first: pages that were
+    slow in an earlier run, slowest first, followed by the largest pages
+    saved by `save_heavy_pages()`."""
+    init_slow_pages_table(db_conn)
+    init_heavy_pages_table(db_conn)
+    filter_sql, filter_values = page_filter_sql(
+        namespace_ids, search_pattern, language_filter
+    )
+    keys: dict[tuple[str, int], None] = {}
+    for title, ns_id in db_conn.execute(
+        "SELECT title, namespace_id FROM pages "
+        "JOIN wiktextract_slow_pages USING (title, namespace_id) "
+        f"WHERE {filter_sql} ORDER BY seconds DESC",
+        filter_values,
+    ):
+        keys[(title, ns_id)] = None
+    for title, ns_id in db_conn.execute(
+        "SELECT title, namespace_id FROM pages "
+        "JOIN wiktextract_heavy_pages USING (title, namespace_id) "
+        f"WHERE {filter_sql} ORDER BY chars DESC LIMIT ?",
+        filter_values + [HEAVY_PAGE_LIMIT],
+    ):
+        keys[(title, ns_id)] = None
+    return list(keys)
+
+
+def iter_page_batches(
+    wxr: WiktextractContext,
+    namespace_ids: list[int],
+    search_pattern: str | None = None,
+    language_filter: tuple[str, list] | None = None,
+) -> Iterator[list[Page]]:
+    """Yields the pages to extract in batches, heavy pages first and then
+    the pages that share auxiliary pages.  Pages that don't match
+    `language_filter` are not extracted; see
+    `language_sections.page_language_filter_sql()`."""
+    db_conn = wxr.wtp.db_conn
+    heavy_keys = heavy_page_keys(
+        db_conn, namespace_ids, search_pattern, language_filter
+    )
+    for title, ns_id in heavy_keys:
+        for row in db_conn.execute(
+            f"SELECT {PAGE_COLUMNS} FROM pages "
+            "WHERE title = ? AND namespace_id = ?",
+            (title, ns_id),
+        ):
+            yield [page_from_row(row)]
+
+    skipped_keys = set(heavy_keys)
+    # Pages that share an auxiliary page are extracted by the same worker
+    batch: list[Page] = []
+    for title, ns_id in shared_aux_page_keys(
+        db_conn, namespace_ids, search_pattern, language_filter
+    ):
+        if (title, ns_id) in skipped_keys:
+            continue
+        skipped_keys.add((title, ns_id))
+        for row in db_conn.execute(
+            f"SELECT {PAGE_COLUMNS} FROM pages "
+            "WHERE title = ? AND namespace_id = ?",
+            (title, ns_id),
+        ):
+            batch.append(page_from_row(row))
+        if len(batch) >= PAGE_BATCH_SIZE:
+            yield batch
+            batch = []
+
+    for page in iter_pages(wxr, namespace_ids, search_pattern, language_filter):
+        if (page.title, page.namespace_id) in skipped_keys:
+            continue
+        batch.append(page)
+        if len(batch) == PAGE_BATCH_SIZE:
+            yield batch
+            batch = []
+    if len(batch) > 0:
+        yield batch
+
+
+def iter_pages(
+    wxr: WiktextractContext,
+    namespace_ids: list[int],
+    search_pattern: str | None,
+    language_filter: tuple[str, list] | None,
+) -> Iterator[Page]:
+    if language_filter is None:
+        yield from wxr.wtp.get_all_pages(
+            namespace_ids, True, "wikitext", search_pattern
+        )
+        return
+    filter_sql, filter_values = page_filter_sql(
+        namespace_ids, search_pattern, language_filter
+    )
+    for row in wxr.wtp.db_conn.execute(
+        f"SELECT {PAGE_COLUMNS} FROM pages WHERE {filter_sql} ORDER BY title",
+        filter_values,
+    ):
+        yield page_from_row(row)
+
+
+def shared_aux_page_keys(
+    db_conn: sqlite3.Connection,
+    namespace_ids: list[int],
+    search_pattern: str | None,
+    language_filter: tuple[str, list] | None = None,
+) -> list[tuple[str, int]]:
+    """Returns the pages that use an auxiliary page that is also used by
+    other pages, the pages of each auxiliary page one after another."""
+    init_aux_pages_table(db_conn)
+    filter_sql, filter_values = page_filter_sql(
+        namespace_ids, search_pattern, language_filter
+    )
+    keys: dict[tuple[str, int], None] = {}
+    for title, ns_id in db_conn.execute(
+        "SELECT title, namespace_id FROM wiktextract_aux_pages AS a "
+        "JOIN pages ON pages.title = a.page_title "
+        "AND pages.namespace_id = a.page_ns "
+        "WHERE (a.aux_title, a.aux_ns) IN ("
+        "SELECT aux_title, aux_ns FROM wiktextract_aux_pages "
+        "GROUP BY aux_title, aux_ns HAVING count(*) > 1) "
+        f"AND {filter_sql} ORDER BY a.aux_ns, a.aux_title, title",
+        filter_values,
+    ):
+        keys[(title, ns_id)] = None
+    return list(keys)
+
+
+def with_aux_pages(
+    db_conn: sqlite3.Connection, batches: Iterable[list[Page]]
+) -> Iterator[
+    tuple[list[Page], dict[tuple[str, int], str], set[tuple[str, int]]]
+]:
+    """Adds the bodies of the saved auxiliary pages of the pages to each
+    batch, and the (title, namespace id) of the pages that have saved
+    auxiliary pages."""
+    init_aux_pages_table(db_conn)
+    if (
+        db_conn.execute(
+            "SELECT 1 FROM wiktextract_aux_pages LIMIT 1"
+        ).fetchone()
+        is None
+    ):
+        for batch in batches:
+            yield batch, {}, set()
+        return
+    for batch in batches:
+        values = ", ".join("(?, ?)" for _ in batch)
+        page_keys = [
+            value for page in batch for value in (page.title, page.namespace_id)
+        ]
+        saved_pages = set(
+            db_conn.execute(
+                "SELECT DISTINCT page_title, page_ns "
+                "FROM wiktextract_aux_pages "
+                f"WHERE (page_title, page_ns) IN (VALUES {values})",
+                page_keys,
+            )
+        )
+        aux_pages = {
+            (title, ns_id): body
+            for title, ns_id, body in db_conn.execute(
+                "SELECT DISTINCT title, namespace_id, body "
+                "FROM wiktextract_aux_pages AS a "
+                "JOIN pages ON pages.title = a.aux_title "
+                "AND pages.namespace_id = a.aux_ns "
+                f"WHERE (a.page_title, a.page_ns) IN (VALUES {values}) "
+                "AND redirect_to IS NULL AND body IS NOT NULL",
+                page_keys,
+            )
+        }
+        yield batch, aux_pages, saved_pages
+
+
+def page_from_row(row: tuple) -> Page:
+    # Row of `PAGE_COLUMNS`
+    return Page(
+        title=row[0],
+        namespace_id=row[1],
+        redirect_to=row[2],
+        need_pre_expand=bool(row[3]),
+        body=row[4],
+        model=row[5],
+    )
+
+
+def count_skipped_pages(
+    db_conn: sqlite3.Connection,
+    namespace_ids: list[int],
+    search_pattern: str | None,
+    language_filter: tuple[str, list],
+) -> int:
+    """Returns the number of pages that `language_filter` excludes."""
+    filter_sql, filter_values = page_filter_sql(namespace_ids, search_pattern)
+    return db_conn.execute(
+        f"SELECT count(*) FROM pages WHERE {filter_sql} "
+        f"AND NOT {language_filter[0]}",
+        filter_values + language_filter[1],
+    ).fetchone()[0]
+
+
+def run_unordered(
+    executor: Executor,
+    fn: Callable[[Any], Any],
+    tasks: Iterable[Any],
+    max_in_flight: int,
+    stop: Callable[[], bool] | None = None,
+) -> Iterator[Any]:
+    """Like `executor.map()` but yields the results in the order they
+    complete and takes at most `max_in_flight` tasks from `tasks` before
+    their results have been consumed.  Once `stop()` returns True no more
+    tasks are taken, the results of the submitted tasks are still
+    yielded."""
+    task_iter = iter(tasks)
+    pending: set[Future] = set()
+    tasks_left = True
+    while True:
+        while (
+            tasks_left
+            and len(pending) < max_in_flight
+            and (stop is None or not stop())
+        ):
+            task = next(task_iter, None)
+            if task is None:
+                tasks_left = False
+                break
+            pending.add(executor.submit(fn, task))
+        if len(pending) == 0:
+            return
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield future.result()
+
+
+def run_recycled(
+    create_executor: Callable[[], Executor],
+    fn: Callable[[Any], Any],
+    tasks: Iterable[Any],
+    max_in_flight: int,
+    recycle_requested: Callable[[Any], bool],
+) -> Iterator[Any]:
+    """Like `run_unordered()` but replaces the executor when
+    `recycle_requested()` is True for a result: the executor is given no
+    more tasks and is shut down when its tasks are done, then a new
+    executor from `create_executor()` takes the rest of the tasks."""
+    task_iter = iter(tasks)
+    while True:
+        recycle = False
+        with create_executor() as executor:
+            for result in run_unordered(
+                executor, fn, task_iter, max_in_flight, lambda: recycle
+            ):
+                if not recycle and recycle_requested(result):
+                    recycle = True
+                yield result
+        if not recycle:
+            return
+        logger.info("Replacing the worker processes")
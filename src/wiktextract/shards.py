@@ -0,0 +1,126 @@
+# Sharded JSONL output.  With `wiktwords --out-shards N` every worker
+# process writes the entries it extracts to its own shard file instead of
+# sending them to the parent process.  Each shard has an index file that
+# records the title, byte offset and length of every page written to the
+# shard, sorted by title.  `merge_shards()` uses these indexes to produce
+# title-sorted output without loading the data into memory.
+
+import heapq
+import json
+from collections.abc import Iterator
+from pathlib import Path
+from typing import BinaryIO
+
+from .wxr_logging import logger
+
+MANIFEST_NAME = "manifest.json"
+DATA_SUFFIX = ".jsonl"
+INDEX_SUFFIX = ".index"
+
+
+class ShardWriter:
+    """Writes JSONL text to one shard file and remembers the location of
+    each page for the shard index, which is written when the shard is
+    closed.  Fails if a shard named `name` already exists, the output of
+    another writer would be lost."""
+
+    __slots__ = ("data_path", "index_path", "f", "offset", "index")
+
+    def __init__(self, shard_dir: Path, name: str):
+        self.data_path = shard_dir / (name + DATA_SUFFIX)
+        self.index_path = shard_dir / (name + INDEX_SUFFIX)
+        self.f = self.data_path.open("xb")
+        self.offset = 0
+        self.index: list[tuple[str, int, int]] = []
+
+    def write(self, title: str, text: str) -> None:
+        data = text.encode("utf-8")
+        self.f.write(data)
+        self.index.append((title, self.offset, len(data)))
+        self.offset += len(data)
+
+    def close(self) -> None:
+        if self.f.closed:
+            return
+        self.f.close()
+        self.index.sort()
+        with self.index_path.open("x", encoding="utf-8") as f:
+            for record in self.index:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.index = []
+
+
+def prepare_shard_dir(shard_dir: Path) -> None:
+    """Creates the shard directory and removes shard files left by an
+    earlier run, they would otherwise be merged with the new shards."""
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    old_files = [
+        path
+        for path in shard_dir.iterdir()
+        if path.name == MANIFEST_NAME
+        or path.suffix in (DATA_SUFFIX, INDEX_SUFFIX)
+    ]
+    if len(old_files) > 0:
+        logger.info(f"Removing {len(old_files)} old shard files in {shard_dir}")
+        for path in old_files:
+            path.unlink()
+
+
+def write_shard_manifest(shard_dir: Path, human_readable: bool) -> None:
+    """Lists the shards written to `shard_dir`.  Must be called after all
+    shard writers have been closed."""
+    shards = []
+    for index_path in sorted(shard_dir.glob("*" + INDEX_SUFFIX)):
+        with index_path.open(encoding="utf-8") as f:
+            num_pages = sum(1 for _ in f)
+        shards.append(
+            {
+                "data": index_path.stem + DATA_SUFFIX,
+                "index": index_path.name,
+                "pages": num_pages,
+            }
+        )
+    with (shard_dir / MANIFEST_NAME).open("w", encoding="utf-8") as f:
+        json.dump(
+            {"human_readable": human_readable, "shards": shards}, f, indent=2
+        )
+    logger.info(
+        "Wrote {} pages to {} shards in {}".format(
+            sum(shard["pages"] for shard in shards), len(shards), shard_dir
+        )
+    )
+
+
+def iter_shard_index(
+    index_path: Path, shard_num: int
+) -> Iterator[tuple[str, int, int, int]]:
+    with index_path.open(encoding="utf-8") as f:
+        for line in f:
+            title, offset, length = json.loads(line)
+            yield title, shard_num, offset, length
+
+
+def merge_shards(shard_dir: Path, out_f: BinaryIO) -> int:
+    """Merges the shards listed in the manifest file of `shard_dir` into
+    `out_f` sorted by page title.  Entries of the same page are kept in
+    their extraction order.  Returns the number of merged pages."""
+    with (shard_dir / MANIFEST_NAME).open(encoding="utf-8") as f:
+        manifest = json.load(f)
+    data_files = []
+    index_iters = []
+    try:
+        for shard_num, shard in enumerate(manifest["shards"]):
+            data_files.append((shard_dir / shard["data"]).open("rb"))
+            index_iters.append(
+                iter_shard_index(shard_dir / shard["index"], shard_num)
+            )
+        num_pages = 0
+        for _, shard_num, offset, length in heapq.merge(*index_iters):
+            data_f = data_files[shard_num]
+            data_f.seek(offset)
+            out_f.write(data_f.read(length))
+            num_pages += 1
+    finally:
+        for data_f in data_files:
+            data_f.close()
+    return num_pages
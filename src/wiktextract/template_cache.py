@@ -0,0 +1,123 @@
+# Cache of template expansions shared by the pages extracted in a process.
+#
+# Qualifier and gloss templates like {{q|informal}} are called with the
+# same arguments on thousands of pages.  The expansion of a template that
+# only depends on its arguments and on the template and module code is the
+# same on every page, so the expanded text of the templates listed in the
+# "pure_templates" setting of the edition (data/<lang>/config.json) is
+# kept in an LRU cache.  Only templates that have been checked not to use
+# the page title, the namespace or the parent frame may be listed.  Link,
+# label and pronunciation templates like {{l}}, {{lb}} and {{IPA}} are not
+# pure: a link to the current page is shown as bold text, also when it
+# only matches the title after the diacritics are stripped ({{l|la|amō}} on
+# page "amo"), and labels and pronunciations add categories that depend on
+# the namespace.  Calls that have the page title as an argument are not
+# cached either.  Messages logged while expanding a template are not
+# logged again when its cached text is used.
+#
+# The cache is enabled with `wiktwords --template-cache SIZE`, which sets
+# `WiktextractContext.template_cache`, and is used by `page.clean_node()`.
+
+import re
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from wikitextprocessor import MAGIC_FIRST, MAGIC_LAST
+
+# Magic characters refer to data of the page being expanded
+MAGIC_RE = re.compile(f"[{chr(MAGIC_FIRST)}-{chr(MAGIC_LAST)}]")
+
+
+class TemplateCache:
+    """LRU cache of the expanded text of the templates in `templates`, by
+    template name and arguments.  `hits` and `misses` count the lookups of
+    cacheable calls."""
+
+    __slots__ = ("max_size", "templates", "entries", "hits", "misses")
+
+    def __init__(self, max_size: int, templates: Iterable[str]):
+        self.max_size = max_size
+        self.templates = frozenset(templates)
+        self.entries: OrderedDict[tuple, str] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def call_key(
+        self, name: str, ht: Any, page_title: str | None
+    ) -> tuple | None:
+        """Returns the cache key of the template call, None if the call
+        can't be cached."""
+        name = name.strip().replace("_", " ")
+        if name not in self.templates:
+            return None
+        args = []
+        for k, v in ht.items():
+            if v.strip() == page_title:
+                return None
+            args.append((str(k), v))
+        args.sort()
+        return (name, tuple(args))
+
+    def lookup(self, key: tuple) -> str | None:
+        text = self.entries.get(key)
+        if text is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return text
+
+    def save(self, key: tuple, text: str) -> None:
+        if MAGIC_RE.search(text) is not None:
+            return
+        self.entries[key] = text
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def take_counts(self) -> tuple[int, int]:
+        """Returns the hits and misses since the last call."""
+        counts = (self.hits, self.misses)
+        self.hits = 0
+        self.misses = 0
+        return counts
+
+    def template_hooks(
+        self,
+        page_title: str | None,
+        template_fn: Callable[[str, Any], str | None] | None,
+        post_template_fn: Callable[[str, Any, str], str | None] | None,
+    ) -> tuple[Callable, Callable]:
+        """Wraps the template functions given to `Wtp` expansion functions
+        to use the cached text of the template calls.  Calls that
+        `template_fn` replaces are not cached."""
+        # Cache keys of the calls being expanded, None if the call isn't
+        # saved after it has been expanded
+        stack: list[tuple | None] = []
+
+        def cached_template_fn(name: str, ht: Any) -> str | None:
+            if template_fn is not None:
+                text = template_fn(name, ht)
+                if text is not None:
+                    stack.append(None)
+                    return text
+            key = self.call_key(name, ht, page_title)
+            if key is not None:
+                text = self.lookup(key)
+                if text is not None:
+                    stack.append(None)
+                    return text
+            stack.append(key)
+            return None
+
+        def cached_post_template_fn(
+            name: str, ht: Any, text: str
+        ) -> str | None:
+            key = stack.pop() if len(stack) > 0 else None
+            if key is not None:
+                self.save(key, text)
+            if post_template_fn is not None:
+                return post_template_fn(name, ht, text)
+            return None
+
+        return cached_template_fn, cached_post_template_fn
@@ -3,15 +3,17 @@
 #
 # Copyright (c) 2021 Tatu Ylonen.  See file LICENSE and https://ylonen.org
 import atexit
+import gc
 import os
 import sqlite3
 import tempfile
 import time
-from collections.abc import Iterable
+from collections.abc import Iterable, Iterator
 from concurrent.futures import ProcessPoolExecutor
-from copy import deepcopy
 from dataclasses import dataclass, field
-from multiprocessing import current_process, get_all_start_methods, get_context
+from itertools import chain, groupby
+from multiprocessing import current_process
+from operator import itemgetter
 from pathlib import Path
 from traceback import format_exc
 from typing import Optional, TextIO
@@ -20,7 +22,11 @@ from mediawiki_langcodes import code_to_name
 from wikitextprocessor import Page
 from wikitextprocessor.core import CollatedErrorReturnData, NamespaceDataEntry
 
-from .import_utils import import_extractor_module
+from . import page_status
+from .extractor_registry import edition_extractor
+from .import_utils import worker_mp_context
+from .page_status import PageStatusBoard
+from .thesaurus_index import ThesaurusRow
 from .wxr_context import WiktextractContext
 from .wxr_logging import logger
 
@@ -40,8 +46,19 @@ class ThesaurusTerm:
     sense: str = ""
 
 
-def init_worker(wxr: WiktextractContext) -> None:
+# (entry, language_code, pos), sense and the rows of the terms of the entry
+# in a page: (term, linkage, tags, topics, roman, raw_tags)
+GroupedTerms = tuple[tuple[str, str, str], str, list[tuple[str, ...]]]
+
+# Number of term rows inserted in one transaction
+THESAURUS_BATCH_SIZE = 50_000
+
+
+def init_worker(wxr: WiktextractContext, status_args: tuple) -> None:
     global worker_wxr
+    # See `wiktionary.init_worker()`
+    gc.freeze()
+    page_status.init_worker_slot(*status_args)
     worker_wxr = wxr
     worker_wxr.reconnect_databases()
     atexit.register(worker_wxr.remove_unpicklable_objects)
@@ -49,34 +66,35 @@ def init_worker(wxr: WiktextractContext) -> None:
 
 def worker_func(
     page: Page,
-) -> tuple[bool, list[ThesaurusTerm], CollatedErrorReturnData, Optional[str]]:
-    with tempfile.TemporaryDirectory(prefix="wiktextract") as tmpdirname:
-        debug_path = "{}/wiktextract-{}".format(tmpdirname, os.getpid())
-        with open(debug_path, "w", encoding="utf-8") as f:
-            f.write(page.title + "\n")
-
-        worker_wxr.wtp.start_page(page.title)
-        try:
-            terms = extract_thesaurus_page(worker_wxr, page)
-            return True, terms, worker_wxr.wtp.to_return(), None
-        except Exception:
-            msg = (
-                '=== EXCEPTION while parsing page "{}":\n in process {}'.format(
-                    page.title,
-                    current_process().name,
-                )
-                + format_exc()
+) -> tuple[bool, list[GroupedTerms], CollatedErrorReturnData, Optional[str]]:
+    page_status.page_started(page.title)
+    worker_wxr.wtp.start_page(page.title)
+    try:
+        terms = extract_thesaurus_page(worker_wxr, page)
+        return (
+            True,
+            group_thesaurus_terms(terms),
+            worker_wxr.wtp.to_return(),
+            None,
+        )
+    except Exception:
+        msg = (
+            '=== EXCEPTION while parsing page "{}":\n in process {}'.format(
+                page.title,
+                current_process().name,
             )
-            return False, [], {}, msg  # type:ignore[typeddict-item]
+            + format_exc()
+        )
+        return False, [], {}, msg  # type:ignore[typeddict-item]
+    finally:
+        page_status.page_finished()
 
 
 def extract_thesaurus_page(
     wxr: WiktextractContext, page: Page
 ) -> list[ThesaurusTerm]:
-    thesaurus_extractor_mod = import_extractor_module(
-        wxr.wtp.lang_code, "thesaurus"
-    )
-    return thesaurus_extractor_mod.extract_thesaurus_page(wxr, page)
+    extract_fn = edition_extractor(wxr.wtp.lang_code).extract_thesaurus_page
+    return extract_fn(wxr, page)  # type: ignore[misc]
 
 
 def extract_thesaurus_data(
@@ -90,17 +108,20 @@ def extract_thesaurus_data(
     )
     thesaurus_ns_id = thesaurus_ns_data.get("id", 0)
 
+    mp_context = worker_mp_context(wxr.wtp.lang_code)
+    status_board = PageStatusBoard(
+        mp_context, num_processes or os.cpu_count() or 1
+    )
     wxr.remove_unpicklable_objects()
     with ProcessPoolExecutor(
         max_workers=num_processes,
-        mp_context=get_context(
-            "forkserver" if "forkserver" in get_all_start_methods() else "spawn"
-        ),
+        mp_context=mp_context,
         initializer=init_worker,
-        initargs=(deepcopy(wxr),),
+        initargs=(wxr.worker_copy(), status_board.worker_args()),
     ) as executor:
         wxr.reconnect_databases()
-        for success, terms, stats, err in executor.map(
+        loader = ThesaurusLoader(wxr.thesaurus_db_conn)  # type:ignore[arg-type]
+        for success, grouped_terms, stats, err in executor.map(
             worker_func,
             wxr.wtp.get_all_pages([thesaurus_ns_id], False),
             chunksize=100,  # default is 1 too slow
@@ -109,11 +130,11 @@ def extract_thesaurus_data(
                 # Print error in parent process - do not remove
                 logger.error(err)
                 continue
-            for term in terms:
-                insert_thesaurus_term(wxr.thesaurus_db_conn, term)  # type:ignore[arg-type]
+            loader.add(grouped_terms)
             wxr.config.merge_return(stats)
+        loader.close()
+    status_board.close()
 
-    wxr.thesaurus_db_conn.commit()  # type:ignore[union-attr]
     num_pages = wxr.wtp.saved_page_nums([thesaurus_ns_id], False)
     total = thesaurus_linkage_number(wxr.thesaurus_db_conn)  # type:ignore[arg-type]
     logger.info(
@@ -195,6 +216,32 @@ def search_thesaurus(
         )
 
 
+def lookup_thesaurus(
+    wxr: WiktextractContext, entry: str, lang_code: str, pos: str
+) -> list[ThesaurusRow]:
+    """Returns the terms of a thesaurus entry from the thesaurus lookup file
+    if there is one, from the thesaurus database otherwise."""
+    if wxr.thesaurus_index is not None:
+        return wxr.thesaurus_index.lookup(entry, lang_code, pos)
+    return [
+        (
+            term.term,
+            term.linkage,
+            term.tags,
+            term.topics,
+            term.roman,
+            term.sense,
+            term.raw_tags,
+        )
+        for term in search_thesaurus(
+            wxr.thesaurus_db_conn,  # type:ignore[arg-type]
+            entry,
+            lang_code,
+            pos,
+        )
+    ]
+
+
 def insert_thesaurus_term(
     db_conn: sqlite3.Connection, term: ThesaurusTerm
 ) -> None:
@@ -230,31 +277,177 @@ def insert_thesaurus_term(
     )
 
 
+def group_thesaurus_terms(terms: list[ThesaurusTerm]) -> list[GroupedTerms]:
+    """Groups the terms extracted from a page by entry and converts them to
+    rows of the thesaurus database in the worker process."""
+    groups: dict[tuple[str, str, str], GroupedTerms] = {}
+    for term in terms:
+        key = (term.entry, term.language_code, term.pos)
+        group = groups.get(key)
+        if group is None:
+            group = (key, term.sense, [])
+            groups[key] = group
+        group[2].append(
+            (
+                term.term,
+                term.linkage,
+                "|".join(term.tags),
+                "|".join(term.topics),
+                term.roman,
+                "|".join(term.raw_tags),
+            )
+        )
+    return list(groups.values())
+
+
+class ThesaurusLoader:
+    """Inserts the grouped terms returned by the workers in large
+    transactions.  Entry ids are assigned here, so the entries don't need to
+    be looked up in the database, and the entry indexes are created after
+    all terms have been inserted.  Like `insert_thesaurus_term()`, the first
+    sense of an entry and the first copy of a term are kept."""
+
+    __slots__ = (
+        "db_conn",
+        "entry_ids",
+        "next_entry_id",
+        "entry_rows",
+        "term_rows",
+    )
+
+    def __init__(self, db_conn: sqlite3.Connection):
+        self.db_conn = db_conn
+        self.db_conn.execute("DROP INDEX IF EXISTS entries_index")
+        self.entry_ids: dict[tuple[str, str, str], int] = {
+            (entry, lang_code, pos): entry_id
+            for entry_id, entry, lang_code, pos in db_conn.execute(
+                "SELECT id, entry, language_code, pos FROM entries"
+            )
+        }
+        self.next_entry_id = max(self.entry_ids.values(), default=0) + 1
+        self.entry_rows: list[tuple] = []
+        self.term_rows: list[tuple] = []
+
+    def add(self, grouped_terms: list[GroupedTerms]) -> None:
+        for key, sense, rows in grouped_terms:
+            entry_id = self.entry_ids.get(key)
+            if entry_id is None:
+                entry_id = self.next_entry_id
+                self.next_entry_id += 1
+                self.entry_ids[key] = entry_id
+                entry, lang_code, pos = key
+                self.entry_rows.append((entry_id, entry, pos, lang_code, sense))
+            for term, *columns in rows:
+                self.term_rows.append((term, entry_id, *columns))
+        if len(self.term_rows) >= THESAURUS_BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        with self.db_conn:
+            self.db_conn.executemany(
+                "INSERT INTO entries (id, entry, pos, language_code, sense) "
+                "VALUES(?, ?, ?, ?, ?)",
+                self.entry_rows,
+            )
+            self.db_conn.executemany(
+                "INSERT OR IGNORE INTO terms "
+                "(term, entry_id, linkage, tags, topics, roman, raw_tags) "
+                "VALUES(?, ?, ?, ?, ?, ?, ?)",
+                self.term_rows,
+            )
+        self.entry_rows = []
+        self.term_rows = []
+
+    def close(self) -> None:
+        self.flush()
+        self.db_conn.executescript(
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS entries_index
+            ON entries(entry, pos, language_code);
+            CREATE INDEX IF NOT EXISTS terms_entry_id_index
+            ON terms(entry_id);
+            """
+        )
+
+
 def close_thesaurus_db(db_path: Path, db_conn: sqlite3.Connection) -> None:
     db_conn.close()
     if db_path.parent.samefile(Path(tempfile.gettempdir())):
         db_path.unlink(True)
 
 
+def init_emitted_keys_table(db_conn: sqlite3.Connection) -> None:
+    # A temporary table is written to a temporary file instead of being kept
+    # in memory, and it is dropped when the connection is closed.
+    db_conn.executescript(
+        """
+        CREATE TEMP TABLE IF NOT EXISTS emitted_keys (
+        entry TEXT,
+        language_code TEXT,
+        pos TEXT
+        );
+        """
+    )
+
+
+def save_emitted_keys(
+    db_conn: sqlite3.Connection, keys: Iterable[tuple[str, str, str]]
+) -> None:
+    """Saves the (word, lang_code, pos) keys of extracted entries, the
+    thesaurus entries that don't have them are emitted by
+    `words_only_in_thesaurus()`."""
+    db_conn.executemany(
+        "INSERT INTO emitted_keys (entry, language_code, pos) VALUES(?, ?, ?)",
+        keys,
+    )
+
+
 def emit_words_in_thesaurus(
     wxr: WiktextractContext,
-    emitted: set[tuple[str, str, str]],
     out_f: TextIO,
     human_readable: bool,
 ) -> None:
+    from .wiktionary import write_json_data
+
+    for entry in words_only_in_thesaurus(wxr):
+        write_json_data(entry, out_f, human_readable)
+
+
+def words_only_in_thesaurus(wxr: WiktextractContext) -> Iterator[dict]:
     # Emit words that occur in thesaurus as main words but for which
     # Wiktionary has no word in the main namespace. This seems to happen
     # sometimes.
-    from .wiktionary import write_json_data
-
     logger.info("Emitting words that only occur in thesaurus")
-    for entry_id, entry, pos, lang_code, sense in wxr.thesaurus_db_conn.execute(  # type:ignore[union-attr]
-        "SELECT id, entry, pos, language_code, sense FROM entries "
-        "WHERE pos IS NOT NULL AND language_code IS NOT NULL"
-    ):
-        if (entry, lang_code, pos) in emitted:
-            continue
-
+    db_conn: sqlite3.Connection = wxr.thesaurus_db_conn  # type:ignore[assignment]
+    init_emitted_keys_table(db_conn)
+    # Created after the keys are saved, it's faster than updating the index
+    # for every inserted row
+    db_conn.executescript(
+        """
+        CREATE INDEX IF NOT EXISTS temp.emitted_keys_index
+        ON emitted_keys(entry, language_code, pos);
+        """
+    )
+    # One query for all the entries and their terms, entries without terms
+    # have a row of NULL terms
+    rows = db_conn.execute(
+        """
+        SELECT entries.id, entry, pos, language_code, sense, term, linkage,
+        tags, topics, raw_tags
+        FROM entries LEFT JOIN terms ON terms.entry_id = entries.id
+        WHERE pos IS NOT NULL AND language_code IS NOT NULL
+        AND NOT EXISTS (
+            SELECT 1 FROM emitted_keys
+            WHERE emitted_keys.entry = entries.entry
+            AND emitted_keys.language_code = entries.language_code
+            AND emitted_keys.pos = entries.pos
+        )
+        ORDER BY entries.id, terms.rowid
+        """
+    )
+    for _, entry_rows in groupby(rows, key=itemgetter(0)):
+        first_row = next(entry_rows)
+        _, entry, pos, lang_code, sense = first_row[:5]
         if None in (entry, lang_code, pos):
             logger.info(
                 f"'None' in entry, lang_code or"
@@ -272,20 +465,10 @@ def emit_words_in_thesaurus(
         if sense:
             sense_dict["glosses"] = [sense]
 
-        for (
-            term,
-            linkage,
-            tags,
-            topics,
-            roman,
-            raw_tags,
-        ) in wxr.thesaurus_db_conn.execute(  # type:ignore[union-attr]
-            """
-            SELECT term, linkage, tags, topics, roman, raw_tags
-            FROM terms WHERE entry_id = ?
-            """,
-            (entry_id,),
-        ):
+        for row in chain((first_row,), entry_rows):
+            term, linkage, tags, topics, raw_tags = row[5:]
+            if term is None:
+                continue
             relation_dict = {"word": term, "source": f"Thesaurus:{entry}"}
             if len(tags) > 0:
                 relation_dict["tags"] = tags.split("|")
@@ -308,5 +491,4 @@ def emit_words_in_thesaurus(
             "senses": [sense_dict] if sense_dict else [],
             "source": "thesaurus",
         }
-        entry = {k: v for k, v in entry.items() if v}
-        write_json_data(entry, out_f, human_readable)
+        yield {k: v for k, v in entry.items() if v}
@@ -0,0 +1,157 @@
+# Read-only lookup file of the thesaurus terms, used instead of the
+# thesaurus database when `wiktwords --thesaurus-index` is given.
+#
+# The file is written once after the thesaurus pages have been extracted
+# and memory-mapped by every worker process, so the operating system shares
+# one copy of it.  Looking up the terms of an entry is a probe of an
+# open-addressing hash table and one `json.loads()`, with no SQL query and
+# no `ThesaurusTerm` objects.
+#
+# Layout: header (magic, number of buckets), the hash table of (key hash,
+# record offset) buckets, and the records (key length, payload length, key,
+# payload).  The key is "entry\0language code\0pos" and the payload is a
+# JSON list of `ThesaurusRow` lists.
+
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import struct
+from pathlib import Path
+
+from .wxr_logging import logger
+
+MAGIC = b"WXTHES01"
+HEADER = struct.Struct("<8sQ")
+BUCKET = struct.Struct("<QQ")
+RECORD = struct.Struct("<II")
+
+# term, linkage, tags, topics, roman, sense, raw_tags
+ThesaurusRow = tuple[str, str, list[str], list[str], str, str, list[str]]
+
+
+def key_bytes(entry: str, lang_code: str, pos: str) -> bytes:
+    return f"{entry}\0{lang_code}\0{pos}".encode("utf-8")
+
+
+def key_hash(key: bytes) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(key, digest_size=8).digest(), "little"
+    )
+
+
+def split_tags(value: str) -> list[str]:
+    return value.split("|") if len(value) > 0 else []
+
+
+def build_thesaurus_index(db_conn: sqlite3.Connection, path: Path) -> None:
+    """Writes the terms of the thesaurus database to the lookup file
+    `path`.  The terms of an entry are in the same order as
+    `search_thesaurus()` returns them."""
+    num_entries = db_conn.execute("SELECT count(*) FROM entries").fetchone()[0]
+    num_buckets = 1
+    while num_buckets < num_entries * 2:
+        num_buckets *= 2
+    table_offset = HEADER.size
+    buckets = [(0, 0)] * num_buckets
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("wb") as f:
+        f.write(HEADER.pack(MAGIC, num_buckets))
+        f.write(b"\0" * (num_buckets * BUCKET.size))
+        offset = table_offset + num_buckets * BUCKET.size
+        key = None
+        rows: list[ThesaurusRow] = []
+
+        def write_record() -> None:
+            nonlocal offset
+            payload = json.dumps(rows, ensure_ascii=False).encode("utf-8")
+            h = key_hash(key)  # type: ignore[arg-type]
+            index = h & (num_buckets - 1)
+            while buckets[index][1] != 0:
+                index = (index + 1) & (num_buckets - 1)
+            buckets[index] = (h, offset)
+            f.write(RECORD.pack(len(key), len(payload)))  # type: ignore[arg-type]
+            f.write(key)  # type: ignore[arg-type]
+            f.write(payload)
+            offset += RECORD.size + len(key) + len(payload)  # type: ignore[arg-type]
+
+        for (
+            entry,
+            lang_code,
+            pos,
+            term,
+            linkage,
+            tags,
+            topics,
+            roman,
+            sense,
+            raw_tags,
+        ) in db_conn.execute(
+            "SELECT entry, language_code, pos, term, linkage, tags, topics, "
+            "roman, sense, raw_tags "
+            "FROM terms JOIN entries ON terms.entry_id = entries.id "
+            "WHERE language_code IS NOT NULL AND pos IS NOT NULL "
+            "ORDER BY entries.id, terms.rowid"
+        ):
+            row_key = key_bytes(entry, lang_code, pos)
+            if row_key != key:
+                if key is not None:
+                    write_record()
+                key = row_key
+                rows = []
+            rows.append(
+                (
+                    term,
+                    linkage,
+                    split_tags(tags),
+                    split_tags(topics),
+                    roman,
+                    sense,
+                    split_tags(raw_tags),
+                )
+            )
+        if key is not None:
+            write_record()
+        f.seek(table_offset)
+        f.write(b"".join(BUCKET.pack(h, off) for h, off in buckets))
+    os.replace(tmp_path, path)
+    logger.info(f"Wrote thesaurus lookup file {path}")
+
+
+class ThesaurusIndex:
+    """Memory-mapped thesaurus lookup file."""
+
+    __slots__ = ("path", "mm", "mask")
+
+    def __init__(self, path: Path):
+        self.path = path
+        with path.open("rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, num_buckets = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a thesaurus lookup file")
+        self.mask = num_buckets - 1
+
+    def lookup(
+        self, entry: str, lang_code: str, pos: str
+    ) -> list[ThesaurusRow]:
+        key = key_bytes(entry, lang_code, pos)
+        h = key_hash(key)
+        index = h & self.mask
+        while True:
+            bucket_hash, offset = BUCKET.unpack_from(
+                self.mm, HEADER.size + index * BUCKET.size
+            )
+            if offset == 0:
+                return []
+            if bucket_hash == h:
+                key_len, payload_len = RECORD.unpack_from(self.mm, offset)
+                start = offset + RECORD.size
+                if self.mm[start : start + key_len] == key:
+                    start += key_len
+                    return json.loads(self.mm[start : start + payload_len])
+            index = (index + 1) & self.mask
+
+    def close(self) -> None:
+        self.mm.close()
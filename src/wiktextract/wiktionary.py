@@ -5,16 +5,21 @@
 # Copyright (c) 2018-2022, 2024 Tatu Ylonen.  See file LICENSE and https://ylonen.org
 
 import atexit
+import gc
 import io
 import json
 import os
 import re
+import shutil
 import tarfile
 import tempfile
 import time
+import uuid
 from concurrent.futures import ProcessPoolExecutor
-from copy import deepcopy
-from multiprocessing import current_process, get_all_start_methods, get_context
+from dataclasses import dataclass
+from functools import partial
+from multiprocessing import current_process
+from multiprocessing.util import Finalize
 from pathlib import Path
 from traceback import format_exc
 from typing import TextIO
@@ -23,68 +28,296 @@ from wikitextprocessor import Page
 from wikitextprocessor.core import CollatedErrorReturnData, ErrorMessageData
 from wikitextprocessor.dumpparser import process_dump
 
-from .import_utils import import_extractor_module
+from . import page_status, perf
+from .dependencies import (
+    DependencyHasher,
+    UsedPageRecorder,
+    init_dependency_table,
+    recording_analyze_template,
+    save_dependencies,
+    save_module_dependencies,
+)
+from .extract_cache import (
+    CachedPageLookup,
+    ExtractCache,
+    extraction_fingerprint,
+)
+from .extractor_registry import edition_extractor
+from .import_utils import worker_mp_context
+from .language_sections import (
+    clear_page_languages,
+    index_page_languages_if_needed,
+    page_language_filter_sql,
+)
 from .page import parse_page
+from .page_status import PageStatusBoard
+from .scheduler import (
+    BATCHES_PER_WORKER,
+    SLOW_PAGE_SECONDS,
+    count_skipped_pages,
+    init_aux_pages_table,
+    iter_page_batches,
+    run_recycled,
+    save_aux_pages,
+    save_heavy_pages,
+    save_slow_pages,
+    with_aux_pages,
+)
+from .shards import ShardWriter, prepare_shard_dir, write_shard_manifest
 from .thesaurus import (
     emit_words_in_thesaurus,
     extract_thesaurus_data,
+    init_emitted_keys_table,
+    save_emitted_keys,
     thesaurus_linkage_number,
+    words_only_in_thesaurus,
 )
+from .thesaurus_index import build_thesaurus_index
 from .wxr_context import WiktextractContext
 from .wxr_logging import logger
 
 
-def page_handler(
-    page: Page,
-) -> tuple[list[dict[str, str]], CollatedErrorReturnData]:
+@dataclass
+class PageResult:
+    """Result of extracting one page, sent from a worker process to the
+    parent.  `text` is the ready-to-write JSONL text (empty if it was
+    written to a shard) and `emitted` has the (word, lang_code, pos) keys
+    of the extracted entries."""
+
+    title: str
+    namespace_id: int
+    text: str
+    emitted: list[tuple[str, str, str]]
+    stats: CollatedErrorReturnData
+    duration: float = 0.0
+    # The output was taken from the extraction cache
+    cached: bool = False
+    # (content hash, dependency hash, thesaurus hash, auxiliary pages,
+    # auxiliary page hash, used templates and modules, their hash, text) to
+    # save in the extraction cache
+    cache_entry: (
+        tuple[
+            str,
+            str,
+            str,
+            list[tuple[str, int]],
+            str,
+            list[tuple[int, str]],
+            str,
+            str,
+        ]
+        | None
+    ) = None
+    # Templates and modules fetched while extracting the page, (namespace
+    # id, title)
+    dependencies: list[tuple[int, str]] | None = None
+    # Timing record of the page, see `perf.PageTimer.record()`
+    perf: dict | None = None
+    # Auxiliary pages used by the page, (title, namespace id), None if it
+    # used none and had none saved; see `aux_pages.py`
+    aux_pages: list[tuple[str, int]] | None = None
+    # Hits and misses of the template cache; see `template_cache.py`
+    template_cache_counts: tuple[int, int] | None = None
+    # The worker process has reached its page or memory limit and asks to
+    # be replaced
+    recycle_worker: bool = False
+
+
+def page_batch_handler(
+    batch: tuple[list[Page], dict[tuple[str, int], str], set[tuple[str, int]]],
+) -> list[PageResult]:
+    """Extracts a batch of pages, the batch has the bodies of the auxiliary
+    pages the pages used in the previous run and the pages that have saved
+    auxiliary pages; see `scheduler.with_aux_pages()`."""
+    global worker_pages
+    pages, aux_pages, saved_pages = batch
+    worker_wxr.aux_pages.start_batch(aux_pages, saved_pages)
+    results = [page_handler(page) for page in pages]
+    worker_pages += len(pages)
+    if (worker_max_pages is not None and worker_pages >= worker_max_pages) or (
+        worker_max_rss_kb is not None and perf.max_rss_kb() >= worker_max_rss_kb
+    ):
+        results[-1].recycle_worker = True
+    return results
+
+
+def recycle_requested(results: list[PageResult]) -> bool:
+    return len(results) > 0 and results[-1].recycle_worker
+
+
+def page_handler(page: Page) -> PageResult:
+    """Extracts one page in a worker process.  The extracted entries are
+    checked and serialized here, so that only the ready-to-write JSONL text,
+    the emitted (word, lang_code, pos) keys and the collected messages are
+    sent back to the parent process."""
     # Make sure there are no newlines or other strange characters in the
     # title.  They could cause security problems at several post-processing
     # steps.
     # We've given the page_handler function an extra wxr attribute previously.
     # This should never cause an exception, and if it does, we want it to.
 
-    # Helps debug extraction hangs. This writes the path of each file being
-    # processed into /tmp/wiktextract*/wiktextract-*.  Once a hang
-    # has been observed, these files contain page(s) that hang.  They should
-    # be checked before aborting the process, as an interrupt might delete them.
-    with tempfile.TemporaryDirectory(prefix="wiktextract") as tmpdirname:
-        debug_path = "{}/wiktextract-{}".format(tmpdirname, os.getpid())
-        with open(debug_path, "w", encoding="utf-8") as f:
-            f.write(page.title + "\n")
-
-        worker_wxr.wtp.start_page(page.title)
-        try:
-            title = re.sub(r"[\s\000-\037]+", " ", page.title)
-            title = title.strip()
-            if page.redirect_to is not None:
-                page_data = [
-                    {
-                        "title": title,
-                        "redirect": page.redirect_to,
-                        "pos": "hard-redirect",
-                    }
-                ]
+    # The parent process reports pages that take very long or hang from
+    # the status slot of this worker; see page_status.py.
+    page_status.page_started(page.title)
+    worker_wxr.wtp.start_page(page.title)
+    worker_wxr.aux_pages.start_page(page.title)
+    worker_wxr.expanded_templates.start_page()
+    title = re.sub(r"[\s\000-\037]+", " ", page.title)
+    title = title.strip()
+    dur = 0.0
+    cached = False
+    cache_entry = None
+    dependencies = None
+    perf_record = None
+    aux_pages = None
+    used_pages = None
+    template_cache_counts = None
+    try:
+        if page.redirect_to is not None:
+            page_data = [
+                {
+                    "title": title,
+                    "redirect": page.redirect_to,
+                    "pos": "hard-redirect",
+                }
+            ]
+            text, emitted = serialize_page_data(
+                worker_wxr, page_data, worker_human_readable
+            )
+        else:
+            hashes = None
+            cached_data = None
+            if worker_cache is not None:
+                hashes = worker_cache.page_hashes(page.body)  # type: ignore[arg-type]
+                cached_data = worker_cache.lookup(
+                    title, page.namespace_id, *hashes
+                )
+            if cached_data is not None:
+                text, emitted, aux_pages, used_pages = cached_data
+                cached = True
             else:
                 # XXX Sign gloss pages?
                 start_t = time.time()
-                page_data = parse_page(worker_wxr, title, page.body)  # type: ignore[arg-type]
+                timer = perf.start_page_timer() if worker_perf else None
+                if worker_used_pages is not None:
+                    worker_used_pages.start_page()
+                with page_status.cancellable():
+                    page_data = parse_page(
+                        worker_wxr,
+                        title,
+                        page.body,  # type: ignore[arg-type]
+                    )
                 dur = time.time() - start_t
+                aux_pages = list(worker_wxr.aux_pages.used)
+                if worker_used_pages is not None:
+                    used_pages = worker_used_pages.stop_page()
+                if worker_wxr.template_cache is not None:
+                    template_cache_counts = (
+                        worker_wxr.template_cache.take_counts()
+                    )
                 if dur > 100:
                     logger.warning(
-                        "====== WARNING: PARSING PAGE TOOK {:.1f}s: {}".format(
-                            dur, title
-                        )
+                        f"====== WARNING: PARSING PAGE TOOK {dur:.1f}s: {title}"
                     )
-
-            return page_data, worker_wxr.wtp.to_return()
-        except Exception:
-            worker_wxr.wtp.error(
-                f'=== EXCEPTION while parsing page "{page.title}" '
-                f"in process {current_process().name}",
-                format_exc(),
-                "page_handler_exception",
+                text, emitted = serialize_page_data(
+                    worker_wxr, page_data, worker_human_readable
+                )
+                if timer is not None:
+                    perf_record = timer.record(title, page.namespace_id)
+                    perf.stop_page_timer()
+                if hashes is not None:
+                    cache_entry = (
+                        *hashes,
+                        worker_cache.thesaurus_hash(emitted),  # type: ignore[union-attr]
+                        aux_pages,
+                        worker_cache.aux_pages_hash(aux_pages),  # type: ignore[union-attr]
+                        used_pages,  # type: ignore[arg-type]
+                        worker_cache.used_pages_hash(used_pages),  # type: ignore[union-attr, arg-type]
+                        text,
+                    )
+            if worker_dependencies:
+                dependencies = used_pages
+            aux_pages = worker_wxr.aux_pages.pages_to_save(
+                (page.title, page.namespace_id),
+                aux_pages,  # type: ignore[arg-type]
             )
-            return [], worker_wxr.wtp.to_return()
+
+        if worker_shard is not None and len(text) > 0:
+            worker_shard.write(title, text)
+            text = ""
+        return PageResult(
+            title,
+            page.namespace_id,
+            text,
+            emitted,
+            worker_return_data(),
+            dur,
+            cached,
+            cache_entry,
+            dependencies,
+            perf_record,
+            aux_pages,
+            template_cache_counts,
+        )
+    except page_status.PageTimeoutError:
+        perf.stop_page_timer()
+        # The page may have been abandoned in the middle of a Lua call or
+        # of updating the page state
+        worker_wxr.reset_page_state()
+        worker_wxr.wtp.error(
+            f'=== TIMEOUT while parsing page "{page.title}" '
+            f"in process {current_process().name}",
+            None,
+            "page_handler_timeout",
+        )
+        return PageResult(
+            title, page.namespace_id, "", [], worker_return_data()
+        )
+    except Exception:
+        perf.stop_page_timer()
+        worker_wxr.wtp.error(
+            f'=== EXCEPTION while parsing page "{page.title}" '
+            f"in process {current_process().name}",
+            format_exc(),
+            "page_handler_exception",
+        )
+        return PageResult(
+            title, page.namespace_id, "", [], worker_return_data()
+        )
+    finally:
+        page_status.page_finished()
+
+
+def worker_return_data() -> CollatedErrorReturnData:
+    """Returns the messages collected by the worker for the current page,
+    including the data format check messages that `check_json_data()`
+    saved to the worker's config object."""
+    ret = worker_wxr.wtp.to_return()
+    if len(worker_wxr.config.debugs) > 0:
+        ret["debugs"] = ret.get("debugs", []) + worker_wxr.config.debugs
+        worker_wxr.config.debugs = []
+    return ret
+
+
+def serialize_page_data(
+    wxr: WiktextractContext, page_data: list[dict], human_readable: bool
+) -> tuple[str, list[tuple[str, str, str]]]:
+    """Checks the extracted entries of a page and converts them to JSONL
+    text.  Also returns the (word, lang_code, pos) keys of the entries,
+    which are used to find words that only occur in the thesaurus."""
+    lines = []
+    emitted = []
+    for dt in page_data:
+        with perf.phase("validation"):
+            check_json_data(wxr, dt)
+        with perf.phase("serialize"):
+            lines.append(format_json_data(dt, human_readable))
+        word = dt.get("word")
+        lang_code = dt.get("lang_code")
+        pos = dt.get("pos")
+        if word and lang_code and pos:
+            emitted.append((word, lang_code, pos))
+    return "".join(lines), emitted
 
 
 def parse_wiktionary(
@@ -98,10 +331,22 @@ def parse_wiktionary(
     override_folders: list[str] | list[Path] | None = None,
     skip_extract_dump: bool = False,
     save_pages_path: str | Path | None = None,
+    out_shard_dir: str | Path | None = None,
+    extract_cache_path: str | Path | None = None,
+    save_page_dependencies: bool = False,
+    perf_report_path: str | Path | None = None,
+    profile_path: str | Path | None = None,
+    page_timeout: float | None = None,
+    thesaurus_index: bool = False,
+    max_worker_pages: int | None = None,
+    max_worker_rss: int | None = None,
+    save_template_dependencies: bool = False,
 ) -> None:
     """Parses Wiktionary from the dump file ``path`` (which should point
     to a "enwiktionary-<date>-pages-articles.xml.bz2" file.  This
-    calls `word_cb(data)` for all words defined for languages in `languages`."""
+    calls `word_cb(data)` for all words defined for languages in `languages`.
+    If `save_template_dependencies` is True, the template and module
+    inclusion graph is saved in the first phase; see `dependencies.py`."""
     capture_language_codes = wxr.config.capture_language_codes
     if capture_language_codes is not None:
         assert isinstance(capture_language_codes, (list, tuple, set))
@@ -114,9 +359,10 @@ def parse_wiktionary(
     if save_pages_path is not None:
         save_pages_path = Path(save_pages_path)
 
-    analyze_template_mod = import_extractor_module(
-        wxr.wtp.lang_code, "analyze_template"
-    )
+    analyze_template = edition_extractor(wxr.wtp.lang_code).analyze_template
+    if save_template_dependencies:
+        # Also saves the template inclusion graph
+        analyze_template = recording_analyze_template(wxr, analyze_template)
     process_dump(
         wxr.wtp,
         dump_path,
@@ -124,24 +370,45 @@ def parse_wiktionary(
         override_folders,
         skip_extract_dump,
         save_pages_path,
-        analyze_template_mod.analyze_template
-        if analyze_template_mod is not None
-        else None,
+        analyze_template,
     )
+    if save_template_dependencies:
+        save_module_dependencies(wxr)
+    # The saved page languages may not match the new page texts, they are
+    # saved again when they are needed
+    clear_page_languages(wxr.wtp.db_conn)
+    save_heavy_pages(wxr.wtp.db_conn, extract_namespace_ids(wxr))
 
     if not phase1_only:
-        reprocess_wiktionary(wxr, num_processes, out_f, human_readable)
+        reprocess_wiktionary(
+            wxr,
+            num_processes,
+            out_f,
+            human_readable,
+            out_shard_dir=out_shard_dir,
+            extract_cache_path=extract_cache_path,
+            save_page_dependencies=save_page_dependencies,
+            perf_report_path=perf_report_path,
+            profile_path=profile_path,
+            page_timeout=page_timeout,
+            thesaurus_index=thesaurus_index,
+            max_worker_pages=max_worker_pages,
+            max_worker_rss=max_worker_rss,
+        )
+
+
+def format_json_data(data: dict, human_readable: bool) -> str:
+    if human_readable:
+        return (
+            json.dumps(data, indent=2, sort_keys=True, ensure_ascii=False)
+            + "\n"
+        )
+    return json.dumps(data, ensure_ascii=False) + "\n"
 
 
 def write_json_data(data: dict, out_f: TextIO, human_readable: bool) -> None:
     if out_f is not None:
-        if human_readable:
-            out_f.write(
-                json.dumps(data, indent=2, sort_keys=True, ensure_ascii=False)
-            )
-        else:
-            out_f.write(json.dumps(data, ensure_ascii=False))
-        out_f.write("\n")
+        out_f.write(format_json_data(data, human_readable))
 
 
 def estimate_progress(
@@ -749,11 +1016,68 @@ def check_json_data(wxr: WiktextractContext, dt: dict) -> None:
         # template checking code above into a function
 
 
-def init_worker(wxr: WiktextractContext) -> None:
-    global worker_wxr
+def init_worker(
+    wxr: WiktextractContext,
+    human_readable: bool = False,
+    out_shard_dir: Path | None = None,
+    extract_cache_path: Path | None = None,
+    save_page_dependencies: bool = False,
+    perf_report: bool = False,
+    profile_dir: Path | None = None,
+    status_args: tuple | None = None,
+    max_pages: int | None = None,
+    max_rss_kb: int | None = None,
+) -> None:
+    global worker_wxr, worker_human_readable, worker_shard, worker_cache
+    global worker_dependencies, worker_used_pages, worker_perf
+    global worker_pages, worker_max_pages, worker_max_rss_kb
+    # The modules imported by the forkserver are shared with it, the
+    # garbage collector would write to all their objects' pages.
+    gc.freeze()
+    if profile_dir is not None:
+        perf.start_worker_profiler(profile_dir)
+    if status_args is not None:
+        page_status.init_worker_slot(*status_args)
     worker_wxr = wxr
+    worker_human_readable = human_readable
+    worker_shard = None
+    if out_shard_dir is not None:
+        # Worker processes exit without running `atexit` functions, the
+        # shard is closed by a multiprocessing finalizer.  Recycled workers
+        # may get the pid of an earlier worker, the name must be unique.
+        worker_shard = ShardWriter(
+            out_shard_dir, f"{os.getpid()}-{uuid.uuid4().hex}"
+        )
+        Finalize(worker_shard, worker_shard.close, exitpriority=10)
     worker_wxr.reconnect_databases()
+    worker_cache = None
+    if extract_cache_path is not None:
+        worker_cache = CachedPageLookup(worker_wxr, extract_cache_path)
+    worker_dependencies = save_page_dependencies
+    # Templates and modules fetched while extracting a page are saved in
+    # the extraction cache and the dependency table
+    worker_used_pages = None
+    if extract_cache_path is not None or save_page_dependencies:
+        worker_used_pages = UsedPageRecorder(DependencyHasher(worker_wxr))
+        worker_used_pages.install()
+    worker_perf = perf_report
+    worker_pages = 0
+    worker_max_pages = max_pages
+    worker_max_rss_kb = max_rss_kb
+    if perf_report:
+        perf.install_perf_hooks()
     atexit.register(worker_wxr.remove_unpicklable_objects)
+    perf.log_worker_memory("start")
+    Finalize(None, perf.log_worker_memory, args=("exit",), exitpriority=5)
+
+
+def extract_namespace_ids(wxr: WiktextractContext) -> list[int]:
+    return list(
+        {
+            wxr.wtp.NAMESPACE_DATA.get(ns, {}).get("id", 0)  # type: ignore[call-overload]
+            for ns in wxr.config.extract_ns_names
+        }
+    )
 
 
 def reprocess_wiktionary(
@@ -762,9 +1086,41 @@ def reprocess_wiktionary(
     out_f: TextIO,
     human_readable: bool = False,
     search_pattern: str | None = None,
+    out_shard_dir: str | Path | None = None,
+    extract_cache_path: str | Path | None = None,
+    save_page_dependencies: bool = False,
+    perf_report_path: str | Path | None = None,
+    profile_path: str | Path | None = None,
+    page_timeout: float | None = None,
+    thesaurus_index: bool = False,
+    max_worker_pages: int | None = None,
+    max_worker_rss: int | None = None,
 ) -> None:
-    """Reprocesses the Wiktionary from the sqlite db."""
+    """Reprocesses the Wiktionary from the sqlite db.  If `out_shard_dir` is
+    given, every worker process writes its output to a shard file in that
+    directory and `out_f` is not used; see `shards.merge_shards()`.  If
+    `extract_cache_path` is given, the output of pages whose text and
+    templates haven't changed since the last run is taken from that
+    extraction cache database; see `extract_cache.py`.  If
+    `save_page_dependencies` is True, the templates and modules fetched
+    while extracting each page are saved in the dependency table of the
+    page database; see
+    `dependencies.affected_pages()`.  If `perf_report_path` is given, the
+    worker processes time each page and a JSON report is written to that
+    path and a CSV file of the page times next to it; see `perf.py`.  If
+    `profile_path` is given, the worker processes are profiled with cProfile
+    and their merged stats are written to that path.  Pages that are still
+    being extracted after `page_timeout` seconds are abandoned; see
+    `page_status.py`.  If `thesaurus_index` is True, the worker processes
+    look up thesaurus terms in a memory-mapped file written from the
+    thesaurus database; see `thesaurus_index.py`.  The pool of worker
+    processes is replaced by a new one when a worker has extracted
+    `max_worker_pages` pages or its peak RSS has reached `max_worker_rss`
+    MiB; see `scheduler.run_recycled()`."""
     logger.info("Second phase - processing pages")
+    if out_shard_dir is not None:
+        out_shard_dir = Path(out_shard_dir)
+        prepare_shard_dir(out_shard_dir)
 
     # Extract thesaurus data. This iterates over thesaurus pages,
     # but is very fast.
@@ -773,53 +1129,208 @@ def reprocess_wiktionary(
         and thesaurus_linkage_number(wxr.thesaurus_db_conn) == 0  # type: ignore[arg-type]
     ):
         extract_thesaurus_data(wxr, num_processes)
+    if thesaurus_index and wxr.config.extract_thesaurus_pages:
+        # Opened by `reconnect_databases()` in the worker processes
+        wxr.thesaurus_index_path = wxr.thesaurus_db_path.with_suffix(".index")
+        build_thesaurus_index(
+            wxr.thesaurus_db_conn,  # type: ignore[arg-type]
+            wxr.thesaurus_index_path,
+        )
 
-    emitted = set()
-    process_ns_ids: list[int] = list(
-        {
-            wxr.wtp.NAMESPACE_DATA.get(ns, {}).get("id", 0)  # type: ignore[call-overload]
-            for ns in wxr.config.extract_ns_names
-        }
+    # Entries of the thesaurus pages that don't have an extracted entry are
+    # emitted at the end, the keys of the extracted entries are saved in a
+    # temporary table of the thesaurus database.
+    emit_thesaurus_words = (
+        wxr.config.dump_file_lang_code == "en"
+        and wxr.config.extract_thesaurus_pages
     )
+    process_ns_ids = extract_namespace_ids(wxr)
     start_time = time.time()
     last_time = start_time
     all_page_nums = wxr.wtp.saved_page_nums(
         process_ns_ids, True, "wikitext", search_pattern
     )
+    # Pages that have no sections of the captured languages are not
+    # extracted.  Runs of a few pages don't read every page to index them.
+    if search_pattern is None:
+        index_page_languages_if_needed(wxr, process_ns_ids)
+    language_filter = page_language_filter_sql(wxr)
+    if language_filter is not None:
+        skipped_pages = count_skipped_pages(
+            wxr.wtp.db_conn, process_ns_ids, search_pattern, language_filter
+        )
+        all_page_nums -= skipped_pages
+        logger.info(
+            f"Skipping {skipped_pages} pages without sections of the "
+            "captured languages"
+        )
+    num_workers = num_processes or os.cpu_count() or 1
+    slow_pages: dict[tuple[str, int], float] = {}
+    processed_pages = 0
+    extract_cache = None
+    cached_pages = 0
+    template_cache_hits = 0
+    template_cache_misses = 0
+    if extract_cache_path is not None:
+        extract_cache_path = Path(extract_cache_path)
+        extract_cache = ExtractCache(
+            extract_cache_path, extraction_fingerprint(wxr, human_readable)
+        )
+    if save_page_dependencies:
+        init_dependency_table(wxr.wtp.db_conn)
+    init_aux_pages_table(wxr.wtp.db_conn)
+    wxr.wtp.db_conn.commit()
+    perf_report = None
+    if perf_report_path is not None:
+        perf_report_path = Path(perf_report_path)
+        csv_path = perf_report_path.with_suffix(".csv")
+        if csv_path == perf_report_path:
+            perf_report_path = perf_report_path.with_suffix(".json")
+        perf_report = perf.PerfReport(perf_report_path, csv_path)
+    profile_dir = None
+    if profile_path is not None:
+        profile_dir = Path(tempfile.mkdtemp(prefix="wiktextract-profile-"))
+    mp_context = worker_mp_context(wxr.wtp.lang_code)
+    status_board = PageStatusBoard(mp_context, num_workers, page_timeout)
+    # Importing the extractor builds the missing import cache snapshots
+    # once, before the worker processes import it; see `import_cache.py`.
+    edition_extractor(wxr.wtp.lang_code)
     wxr.remove_unpicklable_objects()
-    with ProcessPoolExecutor(
-        max_workers=num_processes,
-        mp_context=get_context(
-            "forkserver" if "forkserver" in get_all_start_methods() else "spawn"
-        ),
+    # The worker pool is replaced when a worker process asks to be
+    # recycled, the new workers are forked from the forkserver.
+    create_executor = partial(
+        ProcessPoolExecutor,
+        max_workers=num_workers,
+        mp_context=mp_context,
         initializer=init_worker,
-        initargs=(deepcopy(wxr),),
-    ) as executor:
-        wxr.reconnect_databases()
-        for processed_pages, (page_data, wtp_stats) in enumerate(
-            executor.map(
-                page_handler,
-                wxr.wtp.get_all_pages(
-                    process_ns_ids, True, "wikitext", search_pattern
-                ),
-                chunksize=100,  # default is 1 too slow
-            )
-        ):
-            wxr.config.merge_return(wtp_stats)
-            for dt in page_data:
-                check_json_data(wxr, dt)
-                write_json_data(dt, out_f, human_readable)
-                word = dt.get("word")
-                lang_code = dt.get("lang_code")
-                pos = dt.get("pos")
-                if word and lang_code and pos:
-                    emitted.add((word, lang_code, pos))
+        initargs=(
+            wxr.worker_copy(),
+            human_readable,
+            out_shard_dir,
+            extract_cache_path,
+            save_page_dependencies,
+            perf_report is not None,
+            profile_dir,
+            status_board.worker_args(),
+            max_worker_pages,
+            max_worker_rss * 1024 if max_worker_rss is not None else None,
+        ),
+    )
+    wxr.reconnect_databases()
+    if emit_thesaurus_words:
+        init_emitted_keys_table(wxr.thesaurus_db_conn)  # type: ignore[arg-type]
+    # Results are handled in the order they complete, so that a slow
+    # page doesn't stall the output of the pages after it.
+    for results in run_recycled(
+        create_executor,
+        page_batch_handler,
+        with_aux_pages(
+            wxr.wtp.db_conn,
+            iter_page_batches(
+                wxr, process_ns_ids, search_pattern, language_filter
+            ),
+        ),
+        num_workers * BATCHES_PER_WORKER,
+        recycle_requested,
+    ):
+        # Auxiliary pages used by the extracted pages of the batch
+        aux_pages: dict[tuple[str, int], list[tuple[str, int]]] = {}
+        for result in results:
+            # Entries are checked and serialized in the worker
+            # processes, the parent only concatenates the returned text.
+            wxr.config.merge_return(result.stats)
+            if out_f is not None and len(result.text) > 0:
+                out_f.write(result.text)
+            if emit_thesaurus_words:
+                save_emitted_keys(
+                    wxr.thesaurus_db_conn,  # type: ignore[arg-type]
+                    result.emitted,
+                )
+            if result.duration > SLOW_PAGE_SECONDS:
+                slow_pages[(result.title, result.namespace_id)] = (
+                    result.duration
+                )
+            if extract_cache is not None:
+                if result.cached:
+                    cached_pages += 1
+                    extract_cache.save(
+                        result.title,
+                        result.namespace_id,
+                        None,
+                        result.emitted,
+                    )
+                elif result.cache_entry is not None:
+                    extract_cache.save(
+                        result.title,
+                        result.namespace_id,
+                        result.cache_entry,
+                        result.emitted,
+                    )
+            if perf_report is not None and result.perf is not None:
+                perf_report.add(result.perf)
+            if result.template_cache_counts is not None:
+                template_cache_hits += result.template_cache_counts[0]
+                template_cache_misses += result.template_cache_counts[1]
+            if result.aux_pages is not None:
+                aux_pages[(result.title, result.namespace_id)] = (
+                    result.aux_pages
+                )
+            if result.dependencies is not None:
+                save_dependencies(
+                    wxr.wtp.db_conn,
+                    (result.namespace_id, result.title),
+                    result.dependencies,
+                )
             last_time = estimate_progress(
                 processed_pages, all_page_nums, start_time, last_time
             )
+            processed_pages += 1
+        if len(aux_pages) > 0:
+            save_aux_pages(wxr.wtp.db_conn, aux_pages)
+        if save_page_dependencies or len(aux_pages) > 0:
+            # Short write transactions, the workers read the database
+            wxr.wtp.db_conn.commit()
+        if emit_thesaurus_words:
+            wxr.thesaurus_db_conn.commit()  # type: ignore[union-attr]
+    status_board.close()
+
+    if search_pattern is None:
+        save_slow_pages(wxr.wtp.db_conn, slow_pages)
+    if perf_report is not None:
+        perf_report.close()
+    if profile_dir is not None:
+        # The workers have exited and dumped their stats
+        perf.merge_worker_profiles(profile_dir, Path(profile_path))  # type: ignore[arg-type]
+        shutil.rmtree(profile_dir)
+    if extract_cache is not None:
+        extract_cache.close(remove_unused=search_pattern is None)
+        logger.info(
+            f"Used cached output of {cached_pages} pages, "
+            f"extracted {processed_pages - cached_pages} pages"
+        )
+    if wxr.template_cache is not None:
+        logger.info(
+            f"Template cache: {template_cache_hits} hits, "
+            f"{template_cache_misses} misses"
+        )
 
-    if wxr.config.dump_file_lang_code == "en":
-        emit_words_in_thesaurus(wxr, emitted, out_f, human_readable)
+    if out_shard_dir is not None:
+        if emit_thesaurus_words:
+            thesaurus_shard = ShardWriter(out_shard_dir, "thesaurus")
+            for entry in words_only_in_thesaurus(wxr):
+                thesaurus_shard.write(
+                    entry["word"], format_json_data(entry, human_readable)
+                )
+            thesaurus_shard.close()
+        write_shard_manifest(out_shard_dir, human_readable)
+    elif emit_thesaurus_words:
+        emit_words_in_thesaurus(wxr, out_f, human_readable)
+    if wxr.thesaurus_index_path is not None:
+        if wxr.thesaurus_index is not None:
+            wxr.thesaurus_index.close()
+            wxr.thesaurus_index = None
+        wxr.thesaurus_index_path.unlink(missing_ok=True)
+        wxr.thesaurus_index_path = None
     logger.info("Reprocessing wiktionary complete")
 
 
@@ -25,6 +25,15 @@ from wikitextprocessor.dumpparser import analyze_and_overwrite_pages
 
 from .categories import extract_categories
 from .config import WiktionaryConfig
+from .dependencies import (
+    DependencyHasher,
+    affected_pages,
+    save_template_dependencies,
+)
+from .error_sink import JsonlErrorSink
+from .language_sections import clear_page_languages
+from .scheduler import save_heavy_pages
+from .template_cache import TemplateCache
 from .template_override import template_override_fns
 from .thesaurus import (
     close_thesaurus_db,
@@ -34,6 +43,7 @@ from .thesaurus import (
 from .wiktionary import (
     check_json_data,
     extract_namespace,
+    extract_namespace_ids,
     parse_page,
     parse_wiktionary,
     reprocess_wiktionary,
@@ -101,9 +111,54 @@ def main():
         default=None,
         help="Path where to write output (- for stdout)",
     )
+    parser.add_argument(
+        "--out-shards",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Use N worker processes that each write their output to a "
+        "shard file in the directory given with --out; merge the shards with "
+        "usertools/json-merge-shards.py",
+    )
+    parser.add_argument(
+        "--extract-cache",
+        type=str,
+        nargs="?",
+        const="",
+        default=None,
+        metavar="PATH",
+        help="Reuse the output of pages whose text and templates haven't "
+        "changed since the last run with the same extraction cache database "
+        "(default: next to the --db-path database)",
+    )
+    parser.add_argument(
+        "--dependency-graph",
+        action="store_true",
+        default=False,
+        help="Save the template and module inclusion graph and the templates "
+        "and modules used by each extracted page in the page database, used "
+        "by --affected-pages",
+    )
+    parser.add_argument(
+        "--affected-pages",
+        type=str,
+        action="append",
+        metavar="TITLE",
+        help="Print the titles of pages that use the given template or "
+        "module, directly or indirectly. Can be specified multiple times.",
+    )
     parser.add_argument(
         "--errors", type=str, help="File in which to save error information"
     )
+    parser.add_argument(
+        "--error-log",
+        type=str,
+        default=None,
+        metavar="PATH",
+        help="Write error, warning and debug messages to the JSON Lines file "
+        "PATH as they arrive, and their counts by called_from and language "
+        "to PATH with the suffix .summary.json",
+    )
     parser.add_argument(
         "--dump-file-language-code",
         "--edition",
@@ -265,6 +320,65 @@ def main():
         default=False,
         help="Enable CPU time profiling",
     )
+    parser.add_argument(
+        "--profile-workers",
+        type=str,
+        default=None,
+        metavar="PATH",
+        help="Profile the page extraction worker processes with cProfile and "
+        "save their merged stats to PATH",
+    )
+    parser.add_argument(
+        "--page-timeout",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Abandon pages that are still being extracted after SECONDS "
+        "(pages running over five minutes are always reported)",
+    )
+    parser.add_argument(
+        "--max-worker-pages",
+        type=int,
+        default=None,
+        metavar="PAGES",
+        help="Replace the worker processes after a worker has extracted "
+        "PAGES pages (the whole pool is replaced once the pages in "
+        "progress are done)",
+    )
+    parser.add_argument(
+        "--max-worker-rss",
+        type=int,
+        default=None,
+        metavar="MIB",
+        help="Replace the worker processes after the peak resident memory "
+        "of a worker has reached MIB mebibytes (one worker over the limit "
+        "replaces the whole pool once the pages in progress are done)",
+    )
+    parser.add_argument(
+        "--template-cache",
+        type=int,
+        default=None,
+        metavar="SIZE",
+        help="Cache the expanded text of up to SIZE calls of the templates "
+        "listed in the pure_templates setting of the edition in each worker "
+        "process",
+    )
+    parser.add_argument(
+        "--thesaurus-index",
+        action="store_true",
+        default=False,
+        help="Look up thesaurus terms in a memory-mapped file shared by the "
+        "worker processes instead of the thesaurus database",
+    )
+    parser.add_argument(
+        "--perf-report",
+        type=str,
+        default=None,
+        metavar="PATH",
+        help="Time each page in the worker processes and write a JSON report "
+        "of the slowest pages and the time spent in each phase, section and "
+        "template to PATH, and the time of each page to a CSV file next to it",
+    )
     parser.add_argument(
         "--categories-file",
         type=str,
@@ -362,9 +476,23 @@ def main():
     else:
         logger.info(f"Capturing words for: {', '.join(capture_lang_codes)}")
 
+    if args.errors and args.error_log:
+        print("--errors and --error-log can't be used together")
+        sys.exit(1)
+
+    if args.out_shards is not None:
+        if not args.out or args.out == "-" or args.out_shards < 1:
+            print("--out-shards requires a positive number and an --out path")
+            sys.exit(1)
+        # Each worker process writes one shard
+        args.num_processes = args.out_shards
+        out_shard_dir = args.out
+    else:
+        out_shard_dir = None
+
     # Open output file.
     out_path = args.out
-    if not out_path and args.pages_dir:
+    if (not out_path and args.pages_dir) or out_shard_dir is not None:
         out_f = None
     elif out_path and out_path != "-":
         if out_path.startswith("/dev/"):
@@ -393,6 +521,11 @@ def main():
         verbose=args.verbose,
         expand_tables=args.inflection_tables_file,
     )
+    if args.error_log:
+        error_log_path = Path(args.error_log)
+        conf.error_sink = JsonlErrorSink(
+            error_log_path, error_log_path.with_suffix(".summary.json")
+        )
 
     if not args.path and not args.db_path:
         print(
@@ -412,6 +545,18 @@ def main():
         quiet=args.quiet,
     )
     wxr = WiktextractContext(wtp, conf)
+    if args.template_cache is not None:
+        wxr.template_cache = TemplateCache(
+            args.template_cache, conf.pure_templates
+        )
+
+    if args.extract_cache == "":
+        db_path = wxr.wtp.db_path
+        extract_cache_path = db_path.with_stem(db_path.stem + "_extract_cache")
+    elif args.extract_cache is not None:
+        extract_cache_path = Path(args.extract_cache)
+    else:
+        extract_cache_path = None
 
     # load redirects if given
     if args.redirects_file:
@@ -437,6 +582,8 @@ def main():
         elif default_override_json_path not in args.override:
             args.override.append(default_override_json_path)
 
+    # The template and module inclusion graph is only saved when it is used
+    save_graph = args.dependency_graph or bool(args.affected_pages)
     try:
         if args.path is not None:
             namespace_ids = {
@@ -457,6 +604,16 @@ def main():
                 args.override,
                 skip_extract_dump,
                 args.pages_dir,
+                out_shard_dir,
+                extract_cache_path,
+                args.dependency_graph,
+                args.perf_report,
+                args.profile_workers,
+                args.page_timeout,
+                args.thesaurus_index,
+                args.max_worker_pages,
+                args.max_worker_rss,
+                save_template_dependencies=save_graph,
             )
 
         if args.override is not None and args.path is None:
@@ -466,6 +623,13 @@ def main():
                 skip_extract_dump,
                 None,
             )
+            if save_graph:
+                # Overridden templates and modules may call other pages
+                save_template_dependencies(wxr)
+            # The saved page languages and sizes may not match the new page
+            # texts, the languages are saved again when they are needed
+            clear_page_languages(wxr.wtp.db_conn)
+            save_heavy_pages(wxr.wtp.db_conn, extract_namespace_ids(wxr))
 
         if args.page and not args.skip_extraction:
             # Parse a single Wiktionary page (extracted using --pages-dir)
@@ -492,6 +656,15 @@ def main():
                 out_f,
                 args.human_readable,
                 search_pattern=args.search_pattern,
+                out_shard_dir=out_shard_dir,
+                extract_cache_path=extract_cache_path,
+                save_page_dependencies=args.dependency_graph,
+                perf_report_path=args.perf_report,
+                profile_path=args.profile_workers,
+                page_timeout=args.page_timeout,
+                thesaurus_index=args.thesaurus_index,
+                max_worker_pages=args.max_worker_pages,
+                max_worker_rss=args.max_worker_rss,
             )
 
     finally:
@@ -502,6 +675,17 @@ def main():
         extract_namespace(wxr, "Module", args.modules_file)
     if args.templates_file:
         extract_namespace(wxr, "Template", args.templates_file)
+    if args.affected_pages:
+        hasher = DependencyHasher(wxr)
+        changed = []
+        for title in args.affected_pages:
+            key = hasher.page_key(title)
+            if key is None:
+                logger.warning(f"{title} is not a template or module")
+            else:
+                changed.append(key)
+        for _, title in affected_pages(wxr.wtp.db_conn, changed):
+            print(title)
     if args.categories_file and args.dump_file_language_code == "en":
         logger.info("Extracting category tree")
         tree = extract_categories(wxr)
@@ -524,6 +708,8 @@ def main():
             pass
         os.rename(out_tmp_path, out_path)
 
+    if conf.error_sink is not None:
+        conf.error_sink.close()
     if args.errors:
         with open(args.errors, "w", encoding="utf-8") as f:
             json.dump(
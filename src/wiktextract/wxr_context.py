@@ -1,10 +1,93 @@
 # Wiktextract context object
 import re
 import sqlite3
+from copy import deepcopy
+from pathlib import Path
 
-from wikitextprocessor import Wtp
+from wikitextprocessor import WikiNode, Wtp
+from wikitextprocessor.core import NamespaceDataEntry
 
+from .aux_pages import AuxPageCache
 from .config import WiktionaryConfig
+from .template_cache import TemplateCache
+from .thesaurus_index import ThesaurusIndex
+
+
+class NamespacePatterns:
+    """Compiled regular expressions built from the namespace names of the
+    Wiktionary edition, used by `clean.clean_value()`, `page.clean_node()`
+    and `page.extract_links_from_node()`."""
+
+    __slots__ = (
+        "category_ns_names",
+        "category_link_re",
+        "category_tag_re",
+        "category_sup_re",
+        "image_link_re",
+        "namespace_ids",
+    )
+
+    def __init__(self, wtp: Wtp):
+        category_ns_data: NamespaceDataEntry
+        # XXX "Category" -> config variable for portability
+        category_ns_data = wtp.NAMESPACE_DATA.get("Category", {})  # type: ignore[typeddict-item]
+        # Fail if we received empty dict from .get()
+        self.category_ns_names: set[str] = {
+            "Category",
+            "category",
+            category_ns_data["name"],
+        } | set(category_ns_data["aliases"])
+        category_names_pattern = rf"(?:{'|'.join(self.category_ns_names)})"
+        # Category links removed by `clean_value()`
+        self.category_link_re = re.compile(
+            rf"(?si)\s*\[\[\s*{category_names_pattern}\s*:\s*([^]]+?)\s*\]\]"
+        )
+        # Category links captured by `clean_node()`
+        self.category_tag_re = re.compile(
+            rf"(?is)\[\[:?\s*{category_names_pattern}\s*:([^]|]+)"
+        )
+        # Some templates create <sup>(Category: ...)</sup>
+        self.category_sup_re = re.compile(
+            rf"(?si)\s*(?:<sup>)?\({category_names_pattern}:[^)]+\)(?:</sup>)?"
+        )
+        image_link_prefixes = wtp.namespace_prefixes(
+            wtp.NAMESPACE_DATA["File"]["id"], suffix=""
+        )
+        self.image_link_re = re.compile(
+            rf"(?:\s*{'|'.join(image_link_prefixes)})\s*:", re.IGNORECASE
+        )
+        # Case-folded namespace name or alias -> namespace id
+        self.namespace_ids: dict[str, int] = {}
+        for canonical_name, ns_data in wtp.NAMESPACE_DATA.items():
+            for name in [canonical_name, ns_data["name"], *ns_data["aliases"]]:
+                if name != "":
+                    self.namespace_ids[name.casefold()] = ns_data["id"]
+
+    def title_namespace_id(self, title: str) -> int:
+        """Returns the id of the namespace of page `title`, found from the
+        prefix of the title."""
+        prefix, colon, _ = title.partition(":")
+        if colon == "":
+            return 0
+        return self.namespace_ids.get(
+            prefix.strip().replace("_", " ").casefold(), 0
+        )
+
+
+class ExpandedTemplateCache:
+    """Parse trees of the template calls expanded by
+    `page.expand_template_node()` while extracting a page, by the title
+    being expanded and the wikitext of the call.  Extractors that expand
+    templates in the context of other titles change `Wtp.title`, so the
+    trees are cleared by `start_page()` and not when the title changes."""
+
+    __slots__ = ("trees",)
+
+    def __init__(self) -> None:
+        self.trees: dict[tuple[str | None, str], WikiNode] = {}
+
+    def start_page(self) -> None:
+        self.trees.clear()
 
 
 class WiktextractContext:
@@ -16,6 +99,12 @@ class WiktextractContext:
         "pos",
         "thesaurus_db_path",
         "thesaurus_db_conn",
+        "thesaurus_index_path",
+        "thesaurus_index",
+        "namespace_patterns_cache",
+        "aux_pages",
+        "expanded_templates",
+        "template_cache",
     )
 
     def __init__(self, wtp: Wtp, config: WiktionaryConfig):
@@ -26,6 +115,7 @@ class WiktextractContext:
         self.lang = None
         self.word = None
         self.pos = None
+        self.namespace_patterns_cache: NamespacePatterns | None = None
         self.thesaurus_db_path = wtp.db_path.with_stem(  # type: ignore[union-attr]
             f"{wtp.db_path.stem}_thesaurus"  # type: ignore[union-attr]
         )
@@ -34,11 +124,27 @@ class WiktextractContext:
             if config.extract_thesaurus_pages
             else None
         )
+        # Memory-mapped thesaurus lookup file, see `thesaurus_index.py`
+        self.thesaurus_index_path: Path | None = None
+        self.thesaurus_index: ThesaurusIndex | None = None
+        # Parse trees of the subpages of the current page, see `aux_pages.py`
+        self.aux_pages = AuxPageCache()
+        self.expanded_templates = ExpandedTemplateCache()
+        # Expansions of pure templates shared by all pages, set by
+        # `wiktwords --template-cache`; see `template_cache.py`
+        self.template_cache: TemplateCache | None = None
         if config.linktrailing_regex_pattern is not None:
             self.wtp.linktrailing_re = re.compile(
                 config.linktrailing_regex_pattern
             )
 
+    @property
+    def namespace_patterns(self) -> NamespacePatterns:
+        """Namespace patterns of the edition, created on first use."""
+        if self.namespace_patterns_cache is None:
+            self.namespace_patterns_cache = NamespacePatterns(self.wtp)
+        return self.namespace_patterns_cache
+
     def reconnect_databases(self, check_same_thread: bool = True) -> None:
         # `multiprocessing.pool.Pool.imap()` runs in another thread, if the db
         # connection is used to create iterable data for `imap`,
@@ -47,17 +153,43 @@ class WiktextractContext:
             self.thesaurus_db_conn = sqlite3.connect(
                 self.thesaurus_db_path, check_same_thread=check_same_thread
             )
+            if self.thesaurus_index_path is not None:
+                self.thesaurus_index = ThesaurusIndex(self.thesaurus_index_path)
         self.wtp.db_conn = sqlite3.connect(
             self.wtp.db_path,
             check_same_thread=check_same_thread,  # type: ignore[arg-type]
         )
 
+    def worker_copy(self) -> "WiktextractContext":
+        """Returns a copy of the context for the worker processes.  The
+        error sink is not copied, the workers return their messages to the
+        parent process."""
+        error_sink = self.config.error_sink
+        self.config.error_sink = None
+        try:
+            return deepcopy(self)
+        finally:
+            self.config.error_sink = error_sink
+
+    def reset_page_state(self) -> None:
+        """Drops the state of a page whose extraction was interrupted.  The
+        Lua runtime is created again when it is needed."""
+        self.wtp.lua = None
+        self.wtp.lua_invoke = None
+        self.wtp.lua_reset_env = None
+        self.wtp.lua_clear_loaddata_cache = None
+        self.aux_pages.start_page(None)
+        self.expanded_templates.start_page()
+
     def remove_unpicklable_objects(self) -> None:
         # remove these variables before passing the `WiktextractContext` object
         # to worker processes
         if self.config.extract_thesaurus_pages:
             self.thesaurus_db_conn.close()  # type: ignore[union-attr]
         self.thesaurus_db_conn = None
+        if self.thesaurus_index is not None:
+            self.thesaurus_index.close()
+            self.thesaurus_index = None
         self.wtp.db_conn.close()
         self.wtp.db_conn = None  # type: ignore[assignment]
         self.wtp.lua = None
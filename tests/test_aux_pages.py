@@ -0,0 +1,130 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from wikitextprocessor import TemplateNode, Wtp
+
+from wiktextract.aux_pages import find_aux_page_section, parse_aux_page
+from wiktextract.config import WiktionaryConfig
+from wiktextract.page import expand_template_node
+from wiktextract.wxr_context import WiktextractContext
+
+
+class TestAuxPages(TestCase):
+    def setUp(self) -> None:
+        self.wxr = WiktextractContext(
+            Wtp(lang_code="en"),
+            WiktionaryConfig(
+                dump_file_lang_code="en", capture_language_codes=None
+            ),
+        )
+        self.wxr.wtp.add_page(
+            "water/translations", 0, "==English==\n===Noun===\n"
+        )
+
+    def tearDown(self) -> None:
+        self.wxr.wtp.close_db_conn()
+
+    def test_parsed_once_per_page(self):
+        self.wxr.wtp.start_page("water")
+        with patch.object(
+            self.wxr.wtp, "parse", wraps=self.wxr.wtp.parse
+        ) as mock_parse:
+            tree = parse_aux_page(self.wxr, "water/translations", 0)
+            self.assertIs(
+                parse_aux_page(self.wxr, "water/translations", 0), tree
+            )
+            self.assertIsNone(parse_aux_page(self.wxr, "water/xyz", 0))
+            self.assertIsNone(parse_aux_page(self.wxr, "water/xyz", 0))
+            self.assertEqual(mock_parse.call_count, 1)
+            self.wxr.wtp.start_page("drink")
+            self.assertIsNot(
+                parse_aux_page(self.wxr, "water/translations", 0), tree
+            )
+            self.assertEqual(mock_parse.call_count, 2)
+
+    def test_section_found_once(self):
+        self.wxr.wtp.start_page("water")
+        tree = parse_aux_page(self.wxr, "water/translations", 0)
+        sections = []
+
+        def find():
+            sections.append(tree.children[0])
+            return tree.children[0]
+
+        for _ in range(2):
+            self.assertIs(
+                find_aux_page_section(self.wxr, tree, ("english",), find),
+                tree.children[0],
+            )
+        self.assertEqual(len(sections), 1)
+
+    def test_prefetched_page(self):
+        # Pages sent with the batch are not read from the database, and
+        # trees parsed without expanding templates are shared by the pages
+        # of the batch
+        self.wxr.aux_pages.start_batch(
+            {("Flexion:gehen", 108): "gehen"}, {("gehen", 0), ("ging", 0)}
+        )
+        self.wxr.wtp.start_page("gehen")
+        tree = parse_aux_page(self.wxr, "Flexion:gehen", 108)
+        self.assertEqual(tree.children, ["gehen"])
+        self.assertEqual(
+            list(self.wxr.aux_pages.used), [("Flexion:gehen", 108)]
+        )
+        self.wxr.wtp.start_page("ging")
+        self.assertIs(parse_aux_page(self.wxr, "Flexion:gehen", 108), tree)
+        self.assertIsNot(
+            parse_aux_page(self.wxr, "Flexion:gehen", 108, pre_expand=True),
+            tree,
+        )
+
+    def test_page_without_namespace(self):
+        # Pages looked up without a namespace are saved with the namespace
+        # of their title
+        self.wxr.wtp.add_page("Appendix:water", 100, "water forms")
+        self.wxr.aux_pages.start_batch(
+            {("Appendix:water", 100): "prefetched"}, {("water", 0)}
+        )
+        self.wxr.wtp.start_page("water")
+        tree = parse_aux_page(self.wxr, "Appendix:water")
+        self.assertEqual(tree.children, ["prefetched"])
+        parse_aux_page(self.wxr, "water/translations")
+        self.assertEqual(
+            list(self.wxr.aux_pages.used),
+            [("Appendix:water", 100), ("water/translations", 0)],
+        )
+
+    def test_pages_to_save(self):
+        # Pages that use no auxiliary pages are only sent back to the
+        # parent process if they had some saved
+        self.wxr.aux_pages.start_batch({}, {("water", 0)})
+        self.assertEqual(self.wxr.aux_pages.pages_to_save(("water", 0), []), [])
+        self.assertIsNone(self.wxr.aux_pages.pages_to_save(("drink", 0), []))
+        self.assertEqual(
+            self.wxr.aux_pages.pages_to_save(
+                ("drink", 0), [("drink/translations", 0)]
+            ),
+            [("drink/translations", 0)],
+        )
+
+    def test_expanded_template_once_per_page(self):
+        self.wxr.wtp.add_page("Template:pron", 10, "* {{{1}}}")
+        self.wxr.wtp.start_page("water")
+        t_node = self.wxr.wtp.parse("{{pron|a}}").children[0]
+        self.assertIsInstance(t_node, TemplateNode)
+        with patch.object(
+            self.wxr.wtp, "parse", wraps=self.wxr.wtp.parse
+        ) as mock_parse:
+            tree = expand_template_node(self.wxr, t_node)
+            self.assertIs(expand_template_node(self.wxr, t_node), tree)
+            self.assertEqual(mock_parse.call_count, 1)
+            self.wxr.wtp.start_page("drink")
+            self.assertIsNot(expand_template_node(self.wxr, t_node), tree)
+            self.assertEqual(mock_parse.call_count, 2)
+            # Switching back to the title of the page keeps its trees
+            self.wxr.wtp.start_page("water")
+            self.assertIs(expand_template_node(self.wxr, t_node), tree)
+            self.assertEqual(mock_parse.call_count, 2)
+            self.wxr.expanded_templates.start_page()
+            self.assertIsNot(expand_template_node(self.wxr, t_node), tree)
+            self.assertEqual(mock_parse.call_count, 3)
@@ -3,7 +3,6 @@ import unittest
 from wikitextprocessor import Wtp
 
 from wiktextract.clean import clean_value
-import wiktextract.clean as clean_module
 from wiktextract.config import WiktionaryConfig
 from wiktextract.thesaurus import close_thesaurus_db
 from wiktextract.wxr_context import WiktextractContext
@@ -131,7 +130,6 @@ class CleanTests(unittest.TestCase):
         # does not have anything from a set of parameters (left, right,
         # thumb etc.) that would not make it inline, it is an inline
         # image and its alt= text should be printer with [Alt: ...]
-        clean_module.IMAGE_LINK_RE = None  # clear cache
         v = "[[ File :bar.JPG|conf bar|baz|baz2|baz3|baz4|alt=Bar]]"
         v = clean_value(self.wxr, v)
         self.assertEqual(v, "[Alt: Bar]")
@@ -439,3 +437,12 @@ class CleanTests(unittest.TestCase):
     def test_html_numeric_character(self):
         # https://de.wiktionary.org/wiki/Sonne
         self.assertEqual(clean_value(self.wxr, "[[&#x2609;]]"), "☉")
+
+    def test_namespace_patterns_cached(self):
+        patterns = self.wxr.namespace_patterns
+        self.assertIs(self.wxr.namespace_patterns, patterns)
+        self.assertIn("Category", patterns.category_ns_names)
+        self.assertEqual(
+            clean_value(self.wxr, "[[Image:Foo.png]][[Category:Bar]]Baz"),
+            "Baz",
+        )
@@ -0,0 +1,125 @@
+import unittest
+from unittest.mock import patch
+
+from wikitextprocessor import Page, Wtp
+
+from wiktextract.config import WiktionaryConfig
+from wiktextract.dependencies import (
+    DependencyHasher,
+    UsedPageRecorder,
+    affected_pages,
+    init_dependency_table,
+    recording_analyze_template,
+    save_dependencies,
+    save_module_dependencies,
+    save_template_dependencies,
+)
+from wiktextract.extractor.en.analyze_template import analyze_template
+from wiktextract.thesaurus import close_thesaurus_db
+from wiktextract.wxr_context import WiktextractContext
+
+
+class DependencyGraphTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.wxr = WiktextractContext(
+            Wtp(), WiktionaryConfig(capture_language_codes=None)
+        )
+
+    def tearDown(self) -> None:
+        self.wxr.wtp.close_db_conn()
+        close_thesaurus_db(
+            self.wxr.thesaurus_db_path, self.wxr.thesaurus_db_conn
+        )
+
+    def test_affected_pages(self):
+        self.wxr.wtp.add_page("Module:m", 828, 'require("Module:m/data")')
+        self.wxr.wtp.add_page("Module:m/data", 828, "return {}")
+        analyze = recording_analyze_template(self.wxr, analyze_template)
+        for title, body in (
+            ("Template:a", "{{b|x}}"),
+            ("Template:b", "{{#invoke:m|f}}"),
+            ("Template:c", "c"),
+        ):
+            analyze(
+                self.wxr.wtp,
+                Page(title=title, namespace_id=10, body=body),
+            )
+        save_module_dependencies(self.wxr)
+        save_dependencies(
+            self.wxr.wtp.db_conn, (0, "word"), [(10, "Template:a")]
+        )
+        self.assertEqual(
+            set(affected_pages(self.wxr.wtp.db_conn, [(828, "Module:m/data")])),
+            {
+                (828, "Module:m/data"),
+                (828, "Module:m"),
+                (10, "Template:b"),
+                (10, "Template:a"),
+                (0, "word"),
+            },
+        )
+        self.assertEqual(
+            set(affected_pages(self.wxr.wtp.db_conn, [(10, "Template:c")])),
+            {(10, "Template:c")},
+        )
+
+    def test_overridden_template(self):
+        self.wxr.wtp.add_page("Template:a", 10, "{{b}}")
+        self.wxr.wtp.add_page("Template:b", 10, "b")
+        self.wxr.wtp.add_page("Template:c", 10, "c")
+        save_template_dependencies(self.wxr)
+        self.wxr.wtp.add_page("Template:a", 10, "{{c}}")
+        save_template_dependencies(self.wxr)
+        self.assertEqual(
+            set(affected_pages(self.wxr.wtp.db_conn, [(10, "Template:b")])),
+            {(10, "Template:b")},
+        )
+        self.assertEqual(
+            set(affected_pages(self.wxr.wtp.db_conn, [(10, "Template:c")])),
+            {(10, "Template:c"), (10, "Template:a")},
+        )
+
+    def test_used_pages(self):
+        self.wxr.wtp.add_page("Template:a", 10, "a")
+        self.wxr.wtp.add_page("Module:m", 828, "return {}")
+        recorder = UsedPageRecorder(DependencyHasher(self.wxr))
+        with (
+            patch.object(Wtp, "get_page", Wtp.get_page),
+            patch.object(Wtp, "get_page_body", Wtp.get_page_body),
+        ):
+            recorder.install()
+            self.wxr.wtp.get_page("a", 10)
+            recorder.start_page()
+            self.wxr.wtp.get_page("a", 10)
+            self.wxr.wtp.get_page_body("m", 828)
+            self.wxr.wtp.get_page("Template:b")
+            self.wxr.wtp.get_page("word/translations", 0)
+            self.assertEqual(
+                recorder.stop_page(),
+                [(10, "Template:a"), (828, "Module:m"), (10, "Template:b")],
+            )
+            self.wxr.wtp.get_page("c", 10)
+            self.assertEqual(recorder.stop_page(), [])
+
+    def test_computed_template_name(self):
+        self.wxr.wtp.add_page("Template:a", 10, "{{{{{1}}}-decl}}")
+        self.wxr.wtp.add_page("Template:x-decl", 10, "x")
+        init_dependency_table(self.wxr.wtp.db_conn)
+        recorder = UsedPageRecorder(DependencyHasher(self.wxr))
+        with (
+            patch.object(Wtp, "get_page", Wtp.get_page),
+            patch.object(Wtp, "get_page_body", Wtp.get_page_body),
+        ):
+            recorder.install()
+            self.wxr.wtp.start_page("word")
+            recorder.start_page()
+            self.assertEqual(self.wxr.wtp.expand("{{a|x}}"), "x")
+            save_dependencies(
+                self.wxr.wtp.db_conn, (0, "word"), recorder.stop_page()
+            )
+        self.assertIn(
+            (0, "word"),
+            set(
+                affected_pages(self.wxr.wtp.db_conn, [(10, "Template:x-decl")])
+            ),
+        )
@@ -59,6 +59,19 @@ class InflTests(unittest.TestCase):
         expected = [("error-unrecognized-form",)]
         self.assertEqual(expected, ret)
 
+    def test_cached_expansion(self):
+        # Expansions are cached, but not across different infl_maps
+        ret = self.xexpand_header("foo", {"foo": "counterfactual"})
+        self.assertEqual([("counterfactual",)], ret)
+        ret = self.xexpand_header("foo", {"foo": "positive"})
+        self.assertEqual([("positive",)], ret)
+        # Debug messages are printed for every expansion
+        infl_map = {"bar": "counterfactual"}
+        for _ in range(2):
+            ret = self.xexpand_header("foo", infl_map)
+            self.assertEqual([("error-unrecognized-form",)], ret)
+        self.assertEqual(len(self.wxr.wtp.debugs), 2)
+
     def test_if1(self):
         infl_map = {
             "foo": {
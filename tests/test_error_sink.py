@@ -0,0 +1,102 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from wikitextprocessor import Wtp
+
+from wiktextract.config import WiktionaryConfig
+from wiktextract.error_sink import JsonlErrorSink
+from wiktextract.thesaurus import close_thesaurus_db
+from wiktextract.wxr_context import WiktextractContext
+
+
+def message(msg: str, called_from: str, section: str) -> dict:
+    return {
+        "msg": msg,
+        "trace": "",
+        "title": "dog",
+        "section": section,
+        "subsection": "noun",
+        "called_from": called_from,
+        "path": ["dog"],
+    }
+
+
+class ErrorSinkTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.log_path = Path(self.tmp_dir.name) / "errors.jsonl"
+        self.summary_path = Path(self.tmp_dir.name) / "errors.summary.json"
+        self.config = WiktionaryConfig(capture_language_codes=None)
+        self.config.error_sink = JsonlErrorSink(
+            self.log_path, self.summary_path
+        )
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_merge_return(self):
+        self.config.merge_return(
+            {
+                "errors": [
+                    message("a", "page/1/20240101", "English"),
+                    message("b", "page/1/20240101", "English"),
+                ],
+                "warnings": [message("c", "page/2/20240101", "Finnish")],
+            }
+        )
+        self.config.merge_return(
+            {"errors": [message("d", "page/1/20240101", "English")]}
+        )
+        self.assertEqual(self.config.errors, [])
+        self.config.error_sink.close()
+
+        with self.log_path.open(encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(
+            [(line["kind"], line["msg"]) for line in lines],
+            [
+                ("errors", "a"),
+                ("errors", "b"),
+                ("warnings", "c"),
+                ("errors", "d"),
+            ],
+        )
+        with self.summary_path.open(encoding="utf-8") as f:
+            summary = json.load(f)
+        self.assertEqual(
+            summary["totals"],
+            {
+                "errors": 3,
+                "warnings": 1,
+                "debugs": 0,
+                "notes": 0,
+                "wiki_notices": 0,
+            },
+        )
+        self.assertEqual(
+            summary["counts"],
+            [
+                {
+                    "kind": "errors",
+                    "called_from": "page/1/20240101",
+                    "language": "English",
+                    "count": 3,
+                },
+                {
+                    "kind": "warnings",
+                    "called_from": "page/2/20240101",
+                    "language": "Finnish",
+                    "count": 1,
+                },
+            ],
+        )
+
+    def test_not_copied_to_workers(self):
+        wxr = WiktextractContext(Wtp(), self.config)
+        self.assertIsNone(wxr.worker_copy().config.error_sink)
+        self.assertIsNotNone(wxr.config.error_sink)
+        wxr.wtp.close_db_conn()
+        close_thesaurus_db(wxr.thesaurus_db_path, wxr.thesaurus_db_conn)
+        self.config.error_sink.close()
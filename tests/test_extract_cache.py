@@ -0,0 +1,98 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from wikitextprocessor import Wtp
+
+from wiktextract.config import WiktionaryConfig
+from wiktextract.dependencies import DependencyHasher
+from wiktextract.extract_cache import CachedPageLookup, ExtractCache
+from wiktextract.thesaurus import close_thesaurus_db
+from wiktextract.wxr_context import WiktextractContext
+
+
+class ExtractCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.wxr = WiktextractContext(
+            Wtp(), WiktionaryConfig(capture_language_codes=None)
+        )
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = Path(self.tmp_dir.name) / "cache.db"
+
+    def tearDown(self) -> None:
+        self.wxr.wtp.close_db_conn()
+        close_thesaurus_db(
+            self.wxr.thesaurus_db_path, self.wxr.thesaurus_db_conn
+        )
+        self.tmp_dir.cleanup()
+
+    def test_transitive_dependencies(self):
+        self.wxr.wtp.add_page("Template:a", 10, "{{b}}{{#invoke:m|f}}")
+        self.wxr.wtp.add_page("Template:b", 10, "b")
+        self.wxr.wtp.add_page(
+            "Module:m", 828, 'local d = mw.loadData("Module:m/data")'
+        )
+        self.wxr.wtp.add_page("Module:m/data", 828, "return {}")
+        hasher = DependencyHasher(self.wxr)
+        self.assertEqual(
+            set(hasher.transitive_dependencies("{{a|x}} {{#if:1|2}}")),
+            {
+                (10, "Template:a"),
+                (10, "Template:b"),
+                (828, "Module:m"),
+                (828, "Module:m/data"),
+            },
+        )
+
+    def test_dependency_hash_changes(self):
+        self.wxr.wtp.add_page("Template:a", 10, "{{b}}")
+        self.wxr.wtp.add_page("Template:b", 10, "b")
+        old_hash = DependencyHasher(self.wxr).dependency_hash("{{a}}")
+        self.wxr.wtp.add_page("Template:b", 10, "new b")
+        new_hash = DependencyHasher(self.wxr).dependency_hash("{{a}}")
+        self.assertNotEqual(old_hash, new_hash)
+
+    def test_lookup_saved_page(self):
+        self.wxr.wtp.add_page("Template:a", 10, "a")
+        self.wxr.wtp.add_page("word/translations", 0, "translations")
+        cache = ExtractCache(self.cache_path, "fingerprint")
+        lookup = CachedPageLookup(self.wxr, self.cache_path)
+        content_hash, deps_hash = lookup.page_hashes("{{a}}")
+        emitted = [("word", "en", "noun")]
+        aux_pages = [("word/translations", 0)]
+        # Fetched with a name computed during expansion
+        used_pages = [(10, "Template:a"), (10, "Template:a-decl")]
+        cache.save(
+            "word",
+            0,
+            (
+                content_hash,
+                deps_hash,
+                lookup.thesaurus_hash(emitted),
+                aux_pages,
+                lookup.aux_pages_hash(aux_pages),
+                used_pages,
+                lookup.used_pages_hash(used_pages),
+                '{"word": "word"}\n',
+            ),
+            emitted,
+        )
+        cache.close(remove_unused=True)
+        self.assertEqual(
+            lookup.lookup("word", 0, content_hash, deps_hash),
+            ('{"word": "word"}\n', emitted, aux_pages, used_pages),
+        )
+        self.assertIsNone(lookup.lookup("word", 0, content_hash, "changed"))
+        # Created template that the dependency hash doesn't find
+        self.wxr.wtp.add_page("Template:a-decl", 10, "decl")
+        self.assertIsNone(
+            CachedPageLookup(self.wxr, self.cache_path).lookup(
+                "word", 0, content_hash, deps_hash
+            )
+        )
+        # Changed auxiliary page
+        self.wxr.wtp.add_page("word/translations", 0, "new translations")
+        self.assertIsNone(lookup.lookup("word", 0, content_hash, deps_hash))
+        # Different extractor code or configuration
+        ExtractCache(self.cache_path, "new fingerprint").close(True)
+        self.assertIsNone(lookup.lookup("word", 0, content_hash, deps_hash))
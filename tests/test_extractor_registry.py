@@ -0,0 +1,21 @@
+import unittest
+
+from wiktextract.extractor.en.page import parse_page
+from wiktextract.extractor_registry import edition_extractor
+
+
+class ExtractorRegistryTests(unittest.TestCase):
+    def test_en(self):
+        extractor = edition_extractor("en")
+        self.assertIs(extractor, edition_extractor("en"))
+        self.assertIs(extractor.parse_page, parse_page)
+        self.assertIsNotNone(extractor.extract_thesaurus_page)
+        self.assertIsNotNone(extractor.analyze_template)
+        self.assertTrue(extractor.is_panel_template("CJKV"))
+        self.assertTrue(extractor.is_panel_template("RQ:Shakespeare"))
+        self.assertFalse(extractor.is_panel_template("l"))
+
+    def test_edition_without_panel_templates(self):
+        extractor = edition_extractor("fr")
+        self.assertEqual(extractor.panel_prefixes, ())
+        self.assertFalse(extractor.is_panel_template("RQ:Shakespeare"))
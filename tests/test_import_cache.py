@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from wiktextract.import_cache import cached_import_data
+
+
+class ImportCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.tmp_dir.name) / "cache"
+        self.source_path = Path(self.tmp_dir.name) / "source.py"
+        self.source_path.write_text("words = 1")
+        self.builds = 0
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def build(self) -> set[str]:
+        self.builds += 1
+        return {"a", "b"}
+
+    def load(self, versions: tuple[str, ...] = ()) -> set[str]:
+        with patch.dict(
+            os.environ, {"WIKTEXTRACT_CACHE_DIR": str(self.cache_dir)}
+        ):
+            return cached_import_data(
+                "words", [self.source_path], self.build, versions
+            )
+
+    def test_snapshot(self):
+        self.assertEqual(self.load(), {"a", "b"})
+        self.assertEqual(self.load(), {"a", "b"})
+        self.assertEqual(self.builds, 1)
+        snapshots = list(self.cache_dir.glob("words-*.pickle"))
+        self.assertEqual(len(snapshots), 1)
+
+        # Changed source file
+        self.source_path.write_text("words = 2")
+        self.assertEqual(self.load(), {"a", "b"})
+        self.assertEqual(self.builds, 2)
+        new_snapshots = list(self.cache_dir.glob("words-*.pickle"))
+        self.assertEqual(len(new_snapshots), 1)
+        self.assertNotEqual(snapshots, new_snapshots)
+
+    def test_package_version(self):
+        self.load(("nltk 3.8",))
+        self.load(("nltk 3.8",))
+        self.assertEqual(self.builds, 1)
+        self.load(("nltk 3.9",))
+        self.assertEqual(self.builds, 2)
+        self.assertEqual(len(list(self.cache_dir.glob("words-*.pickle"))), 1)
@@ -1,5 +1,4 @@
 from unittest import TestCase
-from unittest.mock import patch
 
 from wikitextprocessor import Wtp
 
@@ -116,9 +115,7 @@ class TestJaLinkage(TestCase):
             data[0]["phrases"], [{"word": "みそをつける", "sense": "失敗。"}]
         )
 
-    # set to None to force using ja edition ns prefixes
-    @patch("wiktextract.clean.IMAGE_LINK_RE", return_value=None)
-    def test_bagua_image(self, mock_re):
+    def test_bagua_image(self):
         # no image link
         self.wxr.wtp.start_page("太陽")
         data = WordEntry(word="太陽", lang="日本語", lang_code="ja", pos="noun")
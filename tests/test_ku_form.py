@@ -149,9 +149,6 @@ class TestKuForm(TestCase):
         )
 
     def test_etîket_tewandin(self):
-        import wiktextract.clean as clean_module
-
-        clean_module.IMAGE_LINK_RE = None  # clear cache
         self.wxr.wtp.add_page("Şablon:ziman", 10, "Kurmancî")
         self.wxr.wtp.add_page(
             "Şablon:ku-tewîn-lk",
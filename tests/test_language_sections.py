@@ -0,0 +1,147 @@
+import unittest
+
+from wikitextprocessor import Wtp
+
+from wiktextract.config import WiktionaryConfig
+from wiktextract.extractor.en.page import (
+    language_section_code as en_language_section_code,
+)
+from wiktextract.extractor.fr.page import (
+    language_section_code as fr_language_section_code,
+)
+from wiktextract.extractor.pt.page import (
+    language_section_code as pt_language_section_code,
+)
+from wiktextract.language_sections import (
+    index_page_languages,
+    index_page_languages_if_needed,
+    page_language_filter_sql,
+    select_language_sections,
+)
+from wiktextract.scheduler import count_skipped_pages, iter_page_batches
+from wiktextract.thesaurus import close_thesaurus_db
+from wiktextract.wxr_context import WiktextractContext
+
+
+class LanguageSectionTests(unittest.TestCase):
+    maxDiff = None
+
+    def setUp(self) -> None:
+        self.wxr = WiktextractContext(
+            Wtp(), WiktionaryConfig(capture_language_codes=["en"])
+        )
+
+    def tearDown(self) -> None:
+        self.wxr.wtp.close_db_conn()
+        close_thesaurus_db(
+            self.wxr.thesaurus_db_path, self.wxr.thesaurus_db_conn
+        )
+
+    def test_en(self):
+        text = """{{also|Do}}
+==Translingual==
+===Symbol===
+do
+==English==
+===Noun===
+# gloss
+<!--
+==French==
+-->
+====Derived terms====
+==French==
+===Verb===
+# gloss
+===[[Latin]]===
+===Verb===
+# gloss"""
+        self.assertEqual(
+            select_language_sections(self.wxr, text, en_language_section_code),
+            """{{also|Do}}
+==English==
+===Noun===
+# gloss
+<!--
+==French==
+-->
+====Derived terms====
+""",
+        )
+
+    def test_fr(self):
+        self.wxr.config.capture_language_codes = ["fr"]
+        text = """== {{langue|en}} ==
+=== {{S|nom|en}} ===
+== {{langue|fr}} ==
+=== {{S|nom|fr}} ===
+== {{langue|{{x}}}} ==
+=== {{S|nom}} ==="""
+        self.assertEqual(
+            select_language_sections(self.wxr, text, fr_language_section_code),
+            """== {{langue|fr}} ==
+=== {{S|nom|fr}} ===
+== {{langue|{{x}}}} ==
+=== {{S|nom}} ===""",
+        )
+
+    def test_heading_comment(self):
+        text = """==French==
+# gloss
+==English== <!-- comment -->
+===Noun===
+# gloss
+==German==<!-- multi-line
+comment -->
+# gloss"""
+        self.assertEqual(
+            select_language_sections(self.wxr, text, en_language_section_code),
+            """==English== <!-- comment -->
+===Noun===
+# gloss
+""",
+        )
+
+    def test_pt_last_template(self):
+        self.assertEqual(pt_language_section_code(1, "{{x}} {{-pt-}}"), "pt")
+
+    def test_all_languages(self):
+        self.wxr.config.capture_language_codes = None
+        text = "==English==\n==French==\n"
+        self.assertIs(
+            select_language_sections(self.wxr, text, en_language_section_code),
+            text,
+        )
+
+    def test_page_language_index(self):
+        self.wxr.wtp.add_page("dog", 0, "==English==\n===Noun===\n# gloss")
+        self.wxr.wtp.add_page("chien", 0, "==French==\n===Noun===\n# gloss")
+        self.wxr.wtp.add_page("notes", 0, "no language sections")
+        self.wxr.wtp.add_page("hund", 0, "", redirect_to="dog")
+        self.assertIsNone(page_language_filter_sql(self.wxr))
+        index_page_languages(self.wxr, [0])
+        language_filter = page_language_filter_sql(self.wxr)
+        self.assertEqual(
+            count_skipped_pages(
+                self.wxr.wtp.db_conn, [0], None, language_filter
+            ),
+            1,
+        )
+        self.assertEqual(
+            {
+                page.title
+                for batch in iter_page_batches(
+                    self.wxr, [0], None, language_filter
+                )
+                for page in batch
+            },
+            {"dog", "notes", "hund"},
+        )
+
+    def test_page_language_index_if_needed(self):
+        self.wxr.wtp.add_page("dog", 0, "==English==\n===Noun===\n# gloss")
+        self.wxr.config.capture_language_codes = None
+        index_page_languages_if_needed(self.wxr, [0])
+        self.assertIsNone(page_language_filter_sql(self.wxr))
+        self.wxr.config.capture_language_codes = {"en"}
+        index_page_languages_if_needed(self.wxr, [0])
+        self.assertIsNotNone(page_language_filter_sql(self.wxr))
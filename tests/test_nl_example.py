@@ -56,9 +56,6 @@ class TestNlExample(TestCase):
         )
 
     def test_citeer(self):
-        import wiktextract.clean as clean_module
-
-        clean_module.IMAGE_LINK_RE = None  # clear cache
         self.wxr.wtp.add_page(
             "Sjabloon:=eng=",
             10,
@@ -0,0 +1,71 @@
+import multiprocessing
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+from wiktextract import page_status
+
+
+class PageStatusTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.board = page_status.PageStatusBoard(
+            multiprocessing.get_context(), 2
+        )
+
+    def tearDown(self) -> None:
+        page_status.worker_slot = None
+        self.board.close()
+
+    def test_running_pages(self):
+        page_status.init_worker_slot(*self.board.worker_args())
+        self.assertEqual(self.board.running_pages(), [])
+        page_status.page_started("dog")
+        pages = self.board.running_pages()
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(pages[0][0], os.getpid())
+        self.assertEqual(pages[0][2], "dog")
+        page_status.page_finished()
+        self.assertEqual(self.board.running_pages(), [])
+
+    def test_long_title_truncated(self):
+        page_status.init_worker_slot(*self.board.worker_args())
+        page_status.page_started("ä" * 1000)
+        title = self.board.running_pages()[0][2]
+        self.assertEqual(title, "ä" * (page_status.MAX_TITLE_BYTES // 2))
+
+    def test_hung_page_reported(self):
+        page_status.init_worker_slot(*self.board.worker_args())
+        page_status.page_started("hang")
+        page_status.worker_slot.start -= page_status.HANG_WARNING_SECONDS + 1
+        page_status.worker_slot.write(b"hang")
+        with self.assertLogs("wiktextract", "WARNING") as logs:
+            self.board.check()
+            self.board.check()
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("hang", logs.output[0])
+
+    def test_page_timeout(self):
+        self.board.page_timeout = 1.0
+        page_status.init_worker_slot(*self.board.worker_args())
+        page_status.page_started("slow")
+        page_status.worker_slot.start = time.time() - 2.0
+        page_status.worker_slot.write(b"slow")
+        with (
+            patch("os.kill") as kill,
+            self.assertLogs("wiktextract", "ERROR"),
+        ):
+            self.board.check()
+        kill.assert_called_once_with(os.getpid(), page_status.CANCEL_SIGNAL)
+        self.assertTrue(page_status.worker_slot.cancel_requested())
+        # Outside of the extraction
+        page_status.cancel_handler(page_status.CANCEL_SIGNAL, None)
+        with self.assertRaises(page_status.PageTimeoutError):
+            with page_status.cancellable():
+                try:
+                    page_status.cancel_handler(page_status.CANCEL_SIGNAL, None)
+                except Exception:
+                    pass
+        self.assertFalse(page_status.cancel_armed)
+        page_status.page_finished()
+        page_status.cancel_handler(page_status.CANCEL_SIGNAL, None)
@@ -0,0 +1,105 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from wiktextract import perf
+
+
+class PerfTests(unittest.TestCase):
+    def tearDown(self) -> None:
+        perf.stop_page_timer()
+
+    def test_page_timer(self):
+        timer = perf.start_page_timer()
+        timer.start_section("Etymology 1")
+        with perf.phase("validation"):
+            timer.push("parse")
+            timer.pop()
+        template_fn, post_template_fn = timer.template_hooks(None, None)
+        self.assertIsNone(template_fn("outer", {}))
+        template_fn("inner", {})
+        post_template_fn("inner", {}, "")
+        post_template_fn("outer", {}, "")
+        timer.start_section("Etymology 2")
+        record = timer.record("word", 0)
+        self.assertEqual(
+            set(record["phases"]), {"extractor", "validation", "parse"}
+        )
+        self.assertEqual(list(record["sections"]), ["Etymology"])
+        self.assertEqual(record["templates"]["outer"][1], 1)
+        self.assertEqual(record["templates"]["inner"][1], 1)
+        self.assertGreaterEqual(
+            record["templates"]["outer"][0], record["templates"]["inner"][0]
+        )
+
+    def test_phase_without_timer(self):
+        perf.stop_page_timer()
+        with perf.phase("validation"):
+            pass
+
+    @unittest.skipUnless(
+        Path("/proc/self/smaps_rollup").exists(), "needs smaps_rollup"
+    )
+    def test_memory_usage(self):
+        usage = perf.memory_usage_kb()
+        self.assertGreater(usage["rss"], 0)
+        self.assertGreater(usage["private"], 0)
+        self.assertLessEqual(usage["private"], usage["rss"])
+
+    def test_report(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            json_path = Path(tmp_dir) / "perf.json"
+            report = perf.PerfReport(json_path, json_path.with_suffix(".csv"))
+            for title, wall in (("a", 1.0), ("b", 3.0), ("c", 2.0)):
+                report.add(
+                    {
+                        "title": title,
+                        "namespace_id": 0,
+                        "wall": wall,
+                        "cpu": wall,
+                        "max_rss_kb": 100,
+                        "rss_growth_kb": 0,
+                        "phases": {"parse": wall},
+                        "sections": {"Noun": wall},
+                        "templates": {"l": [wall, 2]},
+                    }
+                )
+            report.close()
+            with json_path.open(encoding="utf-8") as f:
+                data = json.load(f)
+            with json_path.with_suffix(".csv").open(encoding="utf-8") as f:
+                csv_lines = f.read().splitlines()
+        self.assertEqual(data["pages"], 3)
+        self.assertEqual(data["phases"], {"parse": 6.0})
+        self.assertEqual(data["sections"], {"Noun": 6.0})
+        self.assertEqual(
+            data["templates"], [{"name": "l", "seconds": 6.0, "calls": 6}]
+        )
+        self.assertEqual(
+            [page["title"] for page in data["slowest_pages"]], ["b", "c", "a"]
+        )
+        self.assertEqual(len(csv_lines), 4)
+
+    def test_merge_worker_profiles(self):
+        import cProfile
+        import pstats
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            profile_dir = Path(tmp_dir)
+            for name in ("1", "2"):
+                profiler = cProfile.Profile()
+                profiler.enable()
+                sorted(range(10))
+                profiler.disable()
+                profiler.dump_stats(profile_dir / f"{name}.prof")
+            out_path = profile_dir / "merged.pstats"
+            perf.merge_worker_profiles(profile_dir, out_path)
+            stats = pstats.Stats(str(out_path))
+        self.assertTrue(
+            any(
+                calls == 2
+                for func, (_, calls, *_) in stats.stats.items()
+                if "sorted" in func[2]
+            )
+        )
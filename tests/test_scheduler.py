@@ -0,0 +1,121 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from wikitextprocessor import Wtp
+
+from wiktextract.config import WiktionaryConfig
+from wiktextract.scheduler import (
+    init_aux_pages_table,
+    iter_page_batches,
+    run_recycled,
+    run_unordered,
+    save_aux_pages,
+    save_heavy_pages,
+    with_aux_pages,
+)
+from wiktextract.thesaurus import close_thesaurus_db
+from wiktextract.wxr_context import WiktextractContext
+
+
+def square(n: int) -> int:
+    return n * n
+
+
+class SchedulerTests(unittest.TestCase):
+    def test_run_unordered(self):
+        with ThreadPoolExecutor(2) as executor:
+            self.assertEqual(
+                sorted(run_unordered(executor, square, range(10), 3)),
+                [n * n for n in range(10)],
+            )
+
+    def test_run_unordered_stop(self):
+        with ThreadPoolExecutor(1) as executor:
+            tasks = iter(range(10))
+            results = list(
+                run_unordered(executor, square, tasks, 1, lambda: True)
+            )
+        self.assertEqual(results, [])
+        self.assertEqual(next(tasks), 0)
+
+    def test_run_recycled(self):
+        executors = []
+
+        def create_executor() -> ThreadPoolExecutor:
+            executor = ThreadPoolExecutor(1)
+            executors.append(executor)
+            return executor
+
+        results = list(
+            run_recycled(
+                create_executor, square, range(10), 1, lambda r: r in (4, 49)
+            )
+        )
+        self.assertEqual(results, [n * n for n in range(10)])
+        self.assertEqual(len(executors), 3)
+
+
+class PageBatchTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.wxr = WiktextractContext(
+            Wtp(), WiktionaryConfig(capture_language_codes=None)
+        )
+
+    def tearDown(self) -> None:
+        self.wxr.wtp.close_db_conn()
+        close_thesaurus_db(
+            self.wxr.thesaurus_db_path, self.wxr.thesaurus_db_conn
+        )
+
+    def test_aux_pages(self):
+        for title in ["a", "b", "c", "d"]:
+            self.wxr.wtp.add_page(title, 0, "==English==")
+        self.wxr.wtp.add_page("Appendix:b", 100, "b forms")
+        self.wxr.wtp.add_page("d/translations", 0, "d translations")
+        init_aux_pages_table(self.wxr.wtp.db_conn)
+        save_aux_pages(
+            self.wxr.wtp.db_conn,
+            {
+                ("b", 0): [("Appendix:b", 100)],
+                ("d", 0): [("Appendix:b", 100), ("d/translations", 0)],
+            },
+        )
+        batches = list(
+            with_aux_pages(
+                self.wxr.wtp.db_conn, iter_page_batches(self.wxr, [0])
+            )
+        )
+        self.assertEqual(len(batches), 1)
+        titles = [page.title for page in batches[0][0]]
+        # Pages that share an auxiliary page are sent first
+        self.assertEqual(titles[:2], ["b", "d"])
+        self.assertEqual(sorted(titles), ["a", "b", "c", "d", "d/translations"])
+        self.assertEqual(
+            batches[0][1],
+            {
+                ("Appendix:b", 100): "b forms",
+                ("d/translations", 0): "d translations",
+            },
+        )
+        self.assertEqual(batches[0][2], {("b", 0), ("d", 0)})
+
+        # Only the auxiliary pages of the extracted pages are replaced
+        save_aux_pages(self.wxr.wtp.db_conn, {("b", 0): []})
+        self.assertEqual(
+            self.wxr.wtp.db_conn.execute(
+                "SELECT page_title, aux_title FROM wiktextract_aux_pages "
+                "ORDER BY page_title, aux_title"
+            ).fetchall(),
+            [("d", "Appendix:b"), ("d", "d/translations")],
+        )
+
+    def test_heavy_pages(self):
+        self.wxr.wtp.add_page("a", 0, "==English==")
+        self.wxr.wtp.add_page("b", 0, "==English==" + "b" * 70_000)
+        self.wxr.wtp.add_page("c", 0, "==English==" + "c" * 80_000)
+        save_heavy_pages(self.wxr.wtp.db_conn, [0])
+        batches = [
+            [page.title for page in batch]
+            for batch in iter_page_batches(self.wxr, [0])
+        ]
+        self.assertEqual(batches, [["c"], ["b"], ["a"]])
@@ -0,0 +1,89 @@
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from wiktextract.shards import (
+    ShardWriter,
+    merge_shards,
+    prepare_shard_dir,
+    write_shard_manifest,
+)
+
+
+class ShardTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.shard_dir = Path(self.tmp_dir.name)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def write_shard(self, name: str, pages: list[tuple[str, list[dict]]]):
+        shard = ShardWriter(self.shard_dir, name)
+        for title, entries in pages:
+            shard.write(
+                title,
+                "".join(
+                    json.dumps(entry, ensure_ascii=False) + "\n"
+                    for entry in entries
+                ),
+            )
+        shard.close()
+
+    def test_merge_sorted_by_title(self):
+        prepare_shard_dir(self.shard_dir)
+        self.write_shard(
+            "1",
+            [
+                ("dog", [{"word": "dog", "pos": "noun"}]),
+                ("ärrä", [{"word": "ärrä", "pos": "intj"}]),
+                ("cat", [{"word": "cat", "pos": "noun"}]),
+            ],
+        )
+        self.write_shard(
+            "2",
+            [
+                (
+                    "bird",
+                    [
+                        {"word": "bird", "pos": "noun"},
+                        {"word": "bird", "pos": "verb"},
+                    ],
+                ),
+                ("eel", [{"word": "eel", "pos": "noun"}]),
+            ],
+        )
+        write_shard_manifest(self.shard_dir, False)
+        out_f = io.BytesIO()
+        self.assertEqual(merge_shards(self.shard_dir, out_f), 5)
+        self.assertEqual(
+            [
+                (data["word"], data["pos"])
+                for data in map(
+                    json.loads, out_f.getvalue().decode().splitlines()
+                )
+            ],
+            [
+                ("bird", "noun"),
+                ("bird", "verb"),
+                ("cat", "noun"),
+                ("dog", "noun"),
+                ("eel", "noun"),
+                ("ärrä", "intj"),
+            ],
+        )
+
+    def test_prepare_removes_old_shards(self):
+        self.write_shard("old", [("dog", [{"word": "dog"}])])
+        write_shard_manifest(self.shard_dir, False)
+        other_file = self.shard_dir / "notes.txt"
+        other_file.write_text("keep")
+        prepare_shard_dir(self.shard_dir)
+        self.assertEqual(list(self.shard_dir.iterdir()), [other_file])
+
+    def test_existing_shard(self):
+        self.write_shard("1", [("dog", [{"word": "dog"}])])
+        with self.assertRaises(FileExistsError):
+            ShardWriter(self.shard_dir, "1")
@@ -0,0 +1,82 @@
+from unittest import TestCase
+
+from wikitextprocessor import MAGIC_FIRST, Wtp
+
+from wiktextract.config import WiktionaryConfig
+from wiktextract.page import clean_node
+from wiktextract.template_cache import TemplateCache
+from wiktextract.thesaurus import close_thesaurus_db
+from wiktextract.wxr_context import WiktextractContext
+
+
+class TestTemplateCache(TestCase):
+    maxDiff = None
+
+    def setUp(self) -> None:
+        self.wxr = WiktextractContext(
+            Wtp(lang_code="en"),
+            WiktionaryConfig(
+                dump_file_lang_code="en", capture_language_codes=None
+            ),
+        )
+        self.wxr.template_cache = TemplateCache(2, ["l"])
+
+    def tearDown(self) -> None:
+        self.wxr.wtp.close_db_conn()
+        close_thesaurus_db(
+            self.wxr.thesaurus_db_path, self.wxr.thesaurus_db_conn
+        )
+
+    def test_cached_expansion(self):
+        self.wxr.wtp.add_page("Template:l", 10, "<i>{{{2}}}</i>")
+        self.wxr.wtp.start_page("dog")
+        root = self.wxr.wtp.parse("{{l|en|cat}}")
+        self.assertEqual(clean_node(self.wxr, None, root), "cat")
+        self.assertEqual(self.wxr.template_cache.take_counts(), (0, 1))
+        self.wxr.wtp.start_page("mouse")
+        root = self.wxr.wtp.parse("{{l|en|cat}}")
+        self.assertEqual(clean_node(self.wxr, None, root), "cat")
+        self.assertEqual(self.wxr.template_cache.take_counts(), (1, 0))
+        # Page title as argument
+        self.wxr.wtp.start_page("cat")
+        root = self.wxr.wtp.parse("{{l|en|cat}}")
+        self.assertEqual(clean_node(self.wxr, None, root), "cat")
+        self.assertEqual(self.wxr.template_cache.take_counts(), (0, 0))
+
+    def test_template_fn(self):
+        cache = TemplateCache(2, ["l"])
+        template_fn, post_template_fn = cache.template_hooks(
+            "dog",
+            lambda name, ht: "replaced" if ht.get(2) == "a" else None,
+            None,
+        )
+        self.assertEqual(template_fn("l", {1: "en", 2: "a"}), "replaced")
+        post_template_fn("l", {1: "en", 2: "a"}, "replaced")
+        self.assertIsNone(template_fn("l", {1: "en", 2: "b"}))
+        # Nested call of a template that isn't cached
+        self.assertIsNone(template_fn("m", {1: "en", 2: "b"}))
+        post_template_fn("m", {1: "en", 2: "b"}, "b")
+        post_template_fn("l", {1: "en", 2: "b"}, "b")
+        # Text with magic characters isn't saved
+        self.assertIsNone(template_fn("l", {1: "en", 2: "c"}))
+        post_template_fn("l", {1: "en", 2: "c"}, chr(MAGIC_FIRST))
+        self.assertEqual(
+            list(cache.entries), [("l", (("1", "en"), ("2", "b")))]
+        )
+        self.assertEqual(template_fn("l", {"1": "en", 2: "b"}), "b")
+        self.assertEqual(cache.take_counts(), (1, 2))
+
+    def test_edition_templates(self):
+        # Link templates depend on the page title, also when an argument
+        # only matches it without diacritics
+        cache = TemplateCache(2, self.wxr.config.pure_templates)
+        self.assertIsNone(cache.call_key("l", {1: "la", 2: "amō"}, "amo"))
+        self.assertIsNotNone(cache.call_key("q", {1: "rare"}, "amo"))
+
+    def test_lru(self):
+        cache = TemplateCache(2, ["l"])
+        for word in ["a", "b", "a", "c"]:
+            key = cache.call_key("l", {1: "en", 2: word}, "dog")
+            if cache.lookup(key) is None:
+                cache.save(key, word)
+        self.assertEqual([key[1][1][1] for key in cache.entries], ["a", "c"])
@@ -0,0 +1,188 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from wikitextprocessor import Wtp
+
+from wiktextract.config import WiktionaryConfig
+from wiktextract.thesaurus import (
+    ThesaurusLoader,
+    ThesaurusTerm,
+    close_thesaurus_db,
+    group_thesaurus_terms,
+    init_emitted_keys_table,
+    init_thesaurus_db,
+    insert_thesaurus_term,
+    save_emitted_keys,
+    search_thesaurus,
+    words_only_in_thesaurus,
+)
+from wiktextract.thesaurus_index import ThesaurusIndex, build_thesaurus_index
+from wiktextract.wxr_context import WiktextractContext
+
+TERMS = [
+    ThesaurusTerm(
+        entry="dog",
+        language_code="en",
+        pos="noun",
+        linkage="synonyms",
+        term="hound",
+        tags=["archaic"],
+        sense="animal",
+    ),
+    ThesaurusTerm(
+        entry="dog",
+        language_code="en",
+        pos="noun",
+        linkage="hyponyms",
+        term="puppy",
+        sense="another sense",
+    ),
+    ThesaurusTerm(
+        entry="dog",
+        language_code="en",
+        pos="verb",
+        linkage="synonyms",
+        term="follow",
+        topics=["hunting"],
+    ),
+    ThesaurusTerm(
+        entry="dog",
+        language_code="en",
+        pos="noun",
+        linkage="synonyms",
+        term="hound",
+    ),
+]
+
+
+class ThesaurusLoaderTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def load(self, name: str, bulk: bool) -> list[ThesaurusTerm]:
+        db_conn = init_thesaurus_db(Path(self.tmp_dir.name) / name)
+        if bulk:
+            loader = ThesaurusLoader(db_conn)
+            loader.add(group_thesaurus_terms(TERMS[:2]))
+            loader.flush()
+            loader.add(group_thesaurus_terms(TERMS[2:]))
+            loader.close()
+        else:
+            for term in TERMS:
+                insert_thesaurus_term(db_conn, term)
+            db_conn.commit()
+        terms = [
+            term
+            for pos in ("noun", "verb")
+            for term in search_thesaurus(db_conn, "dog", "en", pos)
+        ]
+        self.assertEqual(
+            db_conn.execute(
+                "SELECT count(*) FROM sqlite_master WHERE name = ?",
+                ("entries_index",),
+            ).fetchone()[0],
+            1,
+        )
+        db_conn.close()
+        return terms
+
+    def test_same_as_insert_thesaurus_term(self):
+        bulk_terms = self.load("bulk.db", True)
+        self.assertEqual(len(bulk_terms), 3)
+        self.assertEqual(
+            sorted(bulk_terms, key=lambda t: (t.pos, t.term)),
+            sorted(
+                self.load("single.db", False), key=lambda t: (t.pos, t.term)
+            ),
+        )
+
+
+class ThesaurusIndexTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_same_as_search_thesaurus(self):
+        db_conn = init_thesaurus_db(Path(self.tmp_dir.name) / "thesaurus.db")
+        for term in TERMS:
+            insert_thesaurus_term(db_conn, term)
+        db_conn.commit()
+        index_path = Path(self.tmp_dir.name) / "thesaurus.index"
+        build_thesaurus_index(db_conn, index_path)
+        index = ThesaurusIndex(index_path)
+        for pos in ("noun", "verb"):
+            self.assertEqual(
+                index.lookup("dog", "en", pos),
+                [
+                    [
+                        term.term,
+                        term.linkage,
+                        term.tags,
+                        term.topics,
+                        term.roman,
+                        term.sense,
+                        term.raw_tags,
+                    ]
+                    for term in search_thesaurus(db_conn, "dog", "en", pos)
+                ],
+            )
+        self.assertEqual(index.lookup("dog", "en", "adj"), [])
+        self.assertEqual(index.lookup("cat", "en", "noun"), [])
+        index.close()
+        db_conn.close()
+
+
+class WordsOnlyInThesaurusTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.wxr = WiktextractContext(
+            Wtp(), WiktionaryConfig(capture_language_codes=None)
+        )
+
+    def tearDown(self) -> None:
+        self.wxr.wtp.close_db_conn()
+        close_thesaurus_db(
+            self.wxr.thesaurus_db_path, self.wxr.thesaurus_db_conn
+        )
+
+    def test_emitted_entries_are_skipped(self):
+        db_conn = self.wxr.thesaurus_db_conn
+        for term in TERMS:
+            insert_thesaurus_term(db_conn, term)
+        db_conn.commit()
+        init_emitted_keys_table(db_conn)
+        save_emitted_keys(
+            db_conn, [("dog", "en", "verb"), ("cat", "en", "noun")]
+        )
+        self.assertEqual(
+            list(words_only_in_thesaurus(self.wxr)),
+            [
+                {
+                    "word": "dog",
+                    "lang": "English",
+                    "lang_code": "en",
+                    "pos": "noun",
+                    "senses": [
+                        {
+                            "glosses": ["animal"],
+                            "synonyms": [
+                                {
+                                    "word": "hound",
+                                    "source": "Thesaurus:dog",
+                                    "tags": ["archaic"],
+                                }
+                            ],
+                            "hyponyms": [
+                                {"word": "puppy", "source": "Thesaurus:dog"}
+                            ],
+                        }
+                    ],
+                    "source": "thesaurus",
+                }
+            ],
+        )
@@ -0,0 +1,122 @@
+"""
+Measures the time `clean_value()` and `clean_node()` spend per gloss and
+how much the namespace patterns cached in `WiktextractContext` save
+compared to building them on every call.
+
+Usage: python tools/benchmark_clean.py [--edition en] [GLOSS_FILE]
+
+GLOSS_FILE has one expanded gloss per line, a small built-in sample of
+English Wiktionary glosses is used if it isn't given.
+"""
+
+import argparse
+import re
+import timeit
+
+from wikitextprocessor import Wtp
+
+from wiktextract.clean import clean_value
+from wiktextract.config import WiktionaryConfig
+from wiktextract.page import clean_node
+from wiktextract.thesaurus import close_thesaurus_db
+from wiktextract.wxr_context import WiktextractContext
+
+SAMPLE_GLOSSES = [
+    "A domesticated [[carnivorous]] [[mammal]].",
+    "(''transitive'') To [[follow]] [[persistently]]; to [[hound]].",
+    '<span class="ib-brac">(</span><span class="ib-content">'
+    '<a href="/wiki/Appendix:Glossary#slang">slang</a></span>'
+    '<span class="ib-brac">)</span> A [[fellow]], [[guy]].',
+    "[[Category:en:Dogs]] A [[hot dog]] [[sausage]].",
+    "Used other than figuratively or idiomatically: see "
+    "''[[dog]]'', ''[[days]]''.",
+    "The [[chemical element]] with [[atomic number]] 8; O<sub>2</sub>.",
+    "&quot;[[man]]&quot;, [[person]] &ndash; [[w:Human|human being]]",
+    "Plural of [[dog]]",
+    "An [[unattractive]] [[woman]].<ref>Some reference</ref>",
+    "[[File:Dog.jpg|thumb|A dog]]A [[mechanical]] [[device]] for "
+    "[[hold|holding]], [[grip|gripping]] or [[fasten|fastening]].",
+]
+
+
+def uncached_patterns(wxr: WiktextractContext) -> tuple[re.Pattern, ...]:
+    """Builds the category and image link patterns like `clean_node()` and
+    `clean_value()` did on every call before they were cached."""
+    category_ns_data = wxr.wtp.NAMESPACE_DATA.get("Category", {})
+    category_ns_names = {
+        category_ns_data.get("name"),
+        "Category",
+        "category",
+    } | set(category_ns_data.get("aliases"))
+    category_names_pattern = rf"(?:{'|'.join(category_ns_names)})"
+    image_link_prefixes = wxr.wtp.namespace_prefixes(
+        wxr.wtp.NAMESPACE_DATA["File"]["id"], suffix=""
+    )
+    return (
+        re.compile(
+            rf"(?si)\s*\[\[\s*{category_names_pattern}\s*:\s*([^]]+?)\s*\]\]"
+        ),
+        re.compile(rf"(?is)\[\[:?\s*{category_names_pattern}\s*:([^]|]+)"),
+        re.compile(
+            rf"(?si)\s*(?:<sup>)?\({category_names_pattern}:[^)]+\)"
+            r"(?:</sup>)?"
+        ),
+        re.compile(
+            rf"(?:\s*{'|'.join(image_link_prefixes)})\s*:", re.IGNORECASE
+        ),
+    )
+
+
+def per_call_us(fn, glosses: list[str], number: int) -> float:
+    seconds = timeit.timeit(
+        lambda: [fn(gloss) for gloss in glosses], number=number
+    )
+    return seconds / (number * len(glosses)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("gloss_file", nargs="?", default=None)
+    parser.add_argument("--edition", default="en")
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.gloss_file is not None:
+        with open(args.gloss_file, encoding="utf-8") as f:
+            glosses = [line.rstrip("\n") for line in f if line.strip()]
+    else:
+        glosses = SAMPLE_GLOSSES
+
+    wxr = WiktextractContext(
+        Wtp(lang_code=args.edition),
+        WiktionaryConfig(
+            dump_file_lang_code=args.edition, capture_language_codes=None
+        ),
+    )
+    wxr.wtp.start_page("benchmark")
+    nodes = [wxr.wtp.parse(gloss) for gloss in glosses]
+
+    uncached = per_call_us(
+        lambda _: uncached_patterns(wxr), glosses, args.number
+    )
+    cached = per_call_us(lambda _: wxr.namespace_patterns, glosses, args.number)
+    print(f"{len(glosses)} glosses, {args.number} rounds")
+    print(f"namespace patterns built per call: {uncached:8.2f} us/call")
+    print(f"namespace patterns from context:   {cached:8.2f} us/call")
+    print(f"saved per call:                    {uncached - cached:8.2f} us")
+    clean_value_us = per_call_us(
+        lambda gloss: clean_value(wxr, gloss), glosses, args.number
+    )
+    print(f"clean_value():                     {clean_value_us:8.2f} us/call")
+    node_iter = iter(nodes * args.number)
+    clean_node_us = per_call_us(
+        lambda _: clean_node(wxr, {}, next(node_iter)), glosses, args.number
+    )
+    print(f"clean_node():                      {clean_node_us:8.2f} us/call")
+
+    wxr.wtp.close_db_conn()
+    close_thesaurus_db(wxr.thesaurus_db_path, wxr.thesaurus_db_conn)
+
+
+if __name__ == "__main__":
+    main()
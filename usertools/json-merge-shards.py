@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+#
+# Merge the shard files written by `wiktwords --out-shards N --out DIR`
+# into one JSONL file sorted by page title.
+# The shards are merged using the sorted index files written next to each
+# shard, so the data is never loaded into memory and the output of two
+# runs over the same dump is identical.
+
+import sys
+from pathlib import Path
+
+from wiktextract.shards import merge_shards
+
+if len(sys.argv) > 1:
+    shard_dir = Path(sys.argv[1])
+else:
+    print("python json-merge-shards.py shard_dir [merged_output_file]")
+    quit()
+if len(sys.argv) > 2:
+    output_file = Path(sys.argv[2])
+else:
+    output_file = shard_dir.with_name(shard_dir.name + ".jsonl")
+
+with output_file.open("wb", buffering=16 * 1024 * 1024) as output:
+    num_pages = merge_shards(shard_dir, output)
+print(f"Merged {num_pages} pages into {output_file}")
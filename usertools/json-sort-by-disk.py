@@ -9,6 +9,8 @@
 # file.
 # This version of the script does not load the whole json data into memory,
 # but there is a big index that is still probably a pretty big memory hog.
+# Output written with `wiktwords --out-shards` should be merged with
+# json-merge-shards.py instead, which does not need to build the index.
 #
 # Copyright (c) 2020-2022 Tatu Ylonen.  See file LICENSE and https://ylonen.org
 